@@ -0,0 +1,258 @@
+"""Arena: many snakes and apples on one board.
+
+All snakes share one occupancy map from cell to the snake covering it,
+so the collisions of every snake are found in a single pass over the
+heads and a tick costs O(number of snakes), not O(snakes squared)::
+
+    arena = Arena(snakes=20, apples=10, seed=1)
+    for index in range(1, 20):
+        greedy_policy(arena, index)
+    rewards, collisions = arena.step()
+"""
+import heapq
+import random
+from collections import namedtuple
+
+from the_snake import (APPLE_REWARD, DEFAULT_GRID, DIRECTIONS, SNAKE_COLOR,
+                       FreeCells, Snake, opposite, wrapped_distance)
+
+# Виды столкновений:
+CAUSE_SELF = 'self'  # Голова врезалась в собственное тело
+CAUSE_BODY = 'body'  # Голова врезалась в тело другой змейки
+CAUSE_HEAD = 'head'  # Две головы пришли в одну клетку
+
+# Цвета змеек: первая — цвет игрока, остальные — ботов
+SNAKE_COLORS = (SNAKE_COLOR, (255, 200, 0), (0, 200, 255), (255, 0, 255),
+                (255, 128, 0), (160, 255, 160), (200, 120, 255))
+
+Collision = namedtuple('Collision', 'snake cause other')
+
+
+class Arena:
+    """
+    Headless game with several snakes and apples on a shared board.
+
+    The rules for each snake are those of ``SnakeGame``: tails move
+    before heads, so entering a cell vacated on the same tick is safe.
+    A snake dies when its head enters any body, its own included, or the
+    cell another head enters on the same tick. The bodies of dead snakes
+    are removed at the end of the tick.
+
+    Attributes:
+        snakes (list): The snakes, dead ones included.
+        alive (list): Whether each snake is still in the game.
+        scores (list): Score of each snake.
+        apples (set): Positions of the apples.
+        owners (dict): Index of the snake covering each occupied cell.
+        free_cells (FreeCells): Cells covered neither by snakes nor apples.
+        ticks (int): Number of steps made.
+        rng (random.Random): Source of randomness of the arena.
+        grid (GridConfig): The board.
+    """
+
+    def __init__(self, snakes=2, apples=1, seed=None, grid=None):
+        """
+        Place the snakes and apples on random free cells.
+
+        Args:
+            snakes (int): Number of snakes.
+            apples (int): Number of apples kept on the board.
+            seed (int, optional): Seed of the arena's random generator.
+            grid (GridConfig, optional): The board, DEFAULT_GRID by default.
+
+        Raises:
+            BoardFullError: If the board is too small for all of them.
+        """
+        self.grid = grid or DEFAULT_GRID
+        self.rng = random.Random(seed)
+        self.apple_count = apples
+        self.owners = {}
+        self.free_cells = FreeCells.for_board(grid=self.grid)
+        self.snakes = []
+        self.alive = []
+        self.scores = []
+        self.ticks = 0
+        self._free_slots = []  # Индексы ушедших змеек, по возрастанию
+        for _ in range(snakes):
+            self.add_snake()
+        self.apples = set()
+        self._fill_apples()
+
+    def add_snake(self):
+        """
+        Put a new snake on a random free cell.
+
+        The smallest index released by ``remove_snake`` is reused, so the
+        lists of snakes grow with the number of snakes in the game at once,
+        not with the number ever added.
+
+        Returns:
+            int: Index of the new snake.
+
+        Raises:
+            BoardFullError: If there is no free cell.
+        """
+        if self._free_slots:
+            index = self._free_slots[0]
+            self.respawn(index)
+            heapq.heappop(self._free_slots)
+            return index
+        index = len(self.snakes)
+        self.snakes.append(self._spawn_snake(index))
+        self.alive.append(True)
+        self.scores.append(0)
+        return index
+
+    def remove_snake(self, index):
+        """Remove a snake for good and free its index for a new one."""
+        self.kill(index)
+        heapq.heappush(self._free_slots, index)
+
+    def respawn(self, index):
+        """Replace a dead snake with a new one on a random free cell."""
+        self.snakes[index] = self._spawn_snake(index)
+        self.alive[index] = True
+        self.scores[index] = 0
+
+    def kill(self, index):
+        """Remove a living snake from the board, e.g. when its player left."""
+        if self.alive[index]:
+            self._remove(index)
+
+    def step(self, actions=None):
+        """
+        Advance every living snake by one tick.
+
+        Args:
+            actions (sequence, optional): New direction for each snake or
+                None to keep it. Reversals are ignored.
+
+        Returns:
+            tuple: ``(rewards, collisions)`` - the reward of every snake on
+            this tick and a Collision for every snake that died.
+        """
+        living = [index for index, alive in enumerate(self.alive) if alive]
+        self._move(living, actions)
+        self.ticks += 1
+        collisions = self._collisions(living)
+        dead = {collision.snake for collision in collisions}
+
+        rewards = [0] * len(self.snakes)
+        for index in living:
+            if index not in dead:
+                rewards[index] = self._advance(index)
+        for index in dead:
+            self._remove(index)
+        self._fill_apples()
+        return rewards, collisions
+
+    def positions(self):
+        """Iterate over ``(position, snake index)`` of all bodies."""
+        return self.owners.items()
+
+    def _move(self, living, actions):
+        for index in living:
+            snake = self.snakes[index]
+            if actions is not None:
+                self._turn(snake, actions[index])
+            snake.move()
+            # Хвосты освобождаются до проверки столкновений
+            if snake.last is not None:
+                del self.owners[snake.last]
+                self.free_cells.add(snake.last)
+
+    def _collisions(self, living):
+        # Один проход по головам: кто куда пришёл, затем проверка каждой
+        heads = {}
+        for index in living:
+            heads.setdefault(self.snakes[index].get_head_position(),
+                             []).append(index)
+        collisions = []
+        for index in living:
+            collision = self._collision(index, heads)
+            if collision is not None:
+                collisions.append(collision)
+        return collisions
+
+    def _collision(self, index, heads):
+        head = self.snakes[index].get_head_position()
+        rivals = heads[head]
+        if len(rivals) > 1:
+            other = rivals[1] if rivals[0] == index else rivals[0]
+            return Collision(index, CAUSE_HEAD, other)
+        other = self.owners.get(head)
+        if other is None:
+            return None
+        return Collision(index, CAUSE_SELF if other == index else CAUSE_BODY,
+                         other)
+
+    def _advance(self, index):
+        head = self.snakes[index].get_head_position()
+        self.owners[head] = index
+        if head not in self.apples:
+            self.free_cells.remove(head)
+            return 0
+        # Клетка яблока уже исключена из свободных
+        self.apples.remove(head)
+        self.snakes[index].length += 1
+        self.scores[index] += APPLE_REWARD
+        return APPLE_REWARD
+
+    def _remove(self, index):
+        self.alive[index] = False
+        # Голова змейки, погибшей на этом ходу, не заносится в общую карту
+        # и может стоять на чужом теле
+        for position in self.snakes[index].positions:
+            if self.owners.get(position) == index:
+                del self.owners[position]
+                self.free_cells.add(position)
+
+    def _spawn_snake(self, index):
+        position = self.free_cells.sample(self.rng)
+        snake = Snake(SNAKE_COLORS[index % len(SNAKE_COLORS)], position,
+                      self.grid)
+        snake.reset(self.rng)
+        self.free_cells.remove(position)
+        self.owners[position] = index
+        return snake
+
+    def _fill_apples(self):
+        while len(self.apples) < self.apple_count and self.free_cells:
+            position = self.free_cells.sample(self.rng)
+            self.free_cells.remove(position)
+            self.apples.add(position)
+
+    @staticmethod
+    def _turn(snake, action):
+        if action is not None and action != opposite(snake.direction):
+            snake.next_direction = action
+
+
+def greedy_policy(arena, index):
+    """
+    Turn a bot towards the nearest apple, avoiding occupied cells.
+
+    Works like ``tournament.greedy_policy`` but looks at the shared
+    occupancy map, so the bot also avoids the other snakes.
+
+    Args:
+        arena (Arena): The arena.
+        index (int): Index of the bot's snake.
+    """
+    snake = arena.snakes[index]
+    width, height = arena.grid.width, arena.grid.height
+    head_x, head_y = snake.get_head_position()
+    best = None
+    for direction in DIRECTIONS:
+        if direction == opposite(snake.direction):
+            continue
+        cell = ((head_x + direction[0]) % width,
+                (head_y + direction[1]) % height)
+        if cell in arena.owners:
+            continue
+        distance = min((wrapped_distance(cell, apple, width, height)
+                        for apple in arena.apples), default=0)
+        if best is None or distance < best[0]:
+            best = distance, direction
+    if best is not None:
+        snake.next_direction = best[1]
@@ -0,0 +1,314 @@
+"""Autopilot that plays the snake game without a player.
+
+The autopilot is a policy like those of ``tournament``: it is called with
+the snake and the apple before every tick and sets
+``snake.next_direction``::
+
+    python autopilot.py                          # demo in the game window
+    python autopilot.py --grid 300x300 --cell-size 4
+    python autopilot.py --background             # decide on a worker thread
+    python tournament.py --policy autopilot:autopilot_policy
+"""
+import argparse
+import heapq
+import time
+
+from the_snake import (DIRECTIONS, GRID_HEIGHT, GRID_SIZE, GRID_WIDTH,
+                       BackgroundController, GameSession, GridConfig,
+                       init_display, opposite, parse_grid_size,
+                       wrapped_distance)
+
+# Ограничения работы за один ход, чтобы решение укладывалось в миллисекунду:
+SEARCH_BUDGET = 150  # Узлов A* за ход
+SPACE_BUDGET = 64  # Клеток при проверке свободного места
+
+
+def hamiltonian_next(position, width, height):
+    """
+    Get the next cell of a Hamiltonian cycle of the board.
+
+    The cycle snakes along the rows over columns ``1..width - 1`` and
+    returns up column 0. It needs an even number of rows; for an odd number
+    of rows and an even number of columns the board is transposed. It is
+    computed in O(1) for any cell, so large boards need no table.
+
+    Returns:
+        tuple: The next cell, None if the board has no such cycle.
+    """
+    if height % 2:
+        if width % 2:
+            return None
+        cell = hamiltonian_next(position[::-1], height, width)
+        return cell[::-1]
+    x, y = position
+    if x == 0:
+        return (0, y - 1) if y else (1, 0)
+    if y % 2 == 0:
+        return (x + 1, y) if x < width - 1 else (x, y + 1)
+    if x > 1:
+        return x - 1, y
+    return (1, y + 1) if y < height - 1 else (0, y)
+
+
+class Autopilot:
+    """
+    Steers a snake towards the apple and away from traps.
+
+    The path to the apple is found by A* with the wrapped Manhattan
+    distance as the heuristic. The search is limited to ``search_budget``
+    nodes per tick: when the apple is farther than that, the path leads to
+    the closest cell reached and the search continues from there when the
+    snake arrives. The path is kept between ticks and only checked, not
+    searched again, while it stays valid.
+
+    Instead of a grid of obstacles the autopilot keeps the move on which
+    every body cell was entered and updates it by one head and one tail
+    each tick. From it, the move on which a cell becomes free is known in
+    O(1), so a path may go through the tail end of the body.
+
+    Before every move a bounded flood fill checks that the snake will still
+    have room. When no safe step towards the apple exists, the autopilot
+    follows the Hamiltonian cycle of the board or, failing that, moves
+    towards the most free space.
+
+    Attributes:
+        decisions (int): Number of decisions made.
+        searches (int): Number of A* searches run.
+    """
+
+    def __init__(self, search_budget=SEARCH_BUDGET, space_budget=SPACE_BUDGET,
+                 time_func=time.perf_counter_ns):
+        """
+        Initialize the autopilot.
+
+        Args:
+            search_budget (int): A* nodes expanded per tick at most.
+            space_budget (int): Cells counted by the room check at most.
+            time_func (callable): Clock for the decision time statistics,
+                in nanoseconds.
+        """
+        self.search_budget = search_budget
+        self.space_budget = space_budget
+        self.time_func = time_func
+        self.decisions = 0
+        self.searches = 0
+        self._decision_ns = 0
+        self._max_decision_ns = 0
+        self._snake = None
+
+    def __call__(self, snake, apple):
+        """Set the next direction of the snake."""
+        start = self.time_func()
+        self._sync(snake)
+        direction = self._choose(apple.position)
+        if direction is not None:
+            snake.next_direction = direction
+        elapsed = self.time_func() - start
+        self.decisions += 1
+        self._decision_ns += elapsed
+        self._max_decision_ns = max(self._max_decision_ns, elapsed)
+
+    def stats(self):
+        """
+        Get the decision statistics.
+
+        Returns:
+            dict: Number of decisions and searches, mean and maximum
+            decision time in milliseconds.
+        """
+        return {
+            'decisions': self.decisions,
+            'searches': self.searches,
+            'decision_mean_ms': (self._decision_ns / self.decisions / 1e6
+                                 if self.decisions else 0.0),
+            'decision_max_ms': self._max_decision_ns / 1e6,
+        }
+
+    def _sync(self, snake):
+        head = snake.get_head_position()
+        if snake is self._snake and head == self._head:
+            return
+        previous = snake.positions[1] if len(snake.positions) > 1 \
+            else snake.last
+        if snake is not self._snake or previous != self._head:
+            self._reset(snake)
+            return
+        # Обычный ход: одна новая клетка головы и, возможно, одна хвоста
+        self._moves += 1
+        if snake.last is not None and snake.last not in snake.occupied:
+            del self._entered[snake.last]
+        self._entered[head] = self._moves
+        self._head = head
+
+    def _reset(self, snake):
+        self._snake = snake
+        self._grid = snake.grid
+        self._head = snake.get_head_position()
+        self._moves = 0
+        self._entered = {}
+        for age, cell in reversed(list(enumerate(snake.positions))):
+            self._entered[cell] = -age
+        self._path = []
+        self._goal = None
+        self._expected = None
+
+    def _free_at(self, cell, moves):
+        """Check whether the cell is free ``moves`` moves from now."""
+        entered = self._entered.get(cell)
+        return (entered is None
+                or entered + self._snake.length <= self._moves + moves)
+
+    def _neighbors(self, cell):
+        width, height = self._grid.width, self._grid.height
+        x, y = cell
+        for dx, dy in DIRECTIONS:
+            yield (x + dx) % width, (y + dy) % height
+
+    def _direction(self, cell):
+        width, height = self._grid.width, self._grid.height
+        dx = (cell[0] - self._head[0]) % width
+        dy = (cell[1] - self._head[1]) % height
+        return (dx if dx <= 1 else dx - width,
+                dy if dy <= 1 else dy - height)
+
+    def _choose(self, goal):
+        if goal != self._goal or not self._path \
+                or self._head != self._expected \
+                or not self._free_at(self._path[0], 1):
+            self._goal = goal
+            self._path = self._search(goal)
+        if self._path and self._has_room(self._path[0]):
+            self._expected = self._path.pop(0)
+            return self._direction(self._expected)
+        self._path = []
+        return self._fallback()
+
+    def _search(self, goal):
+        """A* from the head, limited to ``search_budget`` nodes."""
+        self.searches += 1
+        width, height = self._grid.width, self._grid.height
+        entered = self._entered.get
+        # Клетка тела свободна, если вошли в неё не позже base + cost
+        base = self._moves - self._snake.length
+        start = self._head
+        back_x, back_y = opposite(self._snake.direction)
+        behind = (start[0] + back_x) % width, (start[1] + back_y) % height
+        # Разворот на месте игра не выполнит, клетку сзади не рассматриваем
+        parents = {start: None, behind: None}
+        best = wrapped_distance(start, goal, width, height), start
+        heap = [(best[0], 0, start)]
+        expanded = 0
+        while heap and expanded < self.search_budget:
+            _, negative_cost, cell = heapq.heappop(heap)
+            if cell == goal:
+                best = 0, cell
+                break
+            expanded += 1
+            cost = 1 - negative_cost
+            x, y = cell
+            for dx, dy in DIRECTIONS:
+                neighbor = (x + dx) % width, (y + dy) % height
+                if neighbor in parents:
+                    continue
+                moved_in = entered(neighbor)
+                if moved_in is not None and moved_in > base + cost:
+                    continue
+                parents[neighbor] = cell
+                estimate = wrapped_distance(neighbor, goal, width, height)
+                if estimate < best[0]:
+                    best = estimate, neighbor
+                # При равной оценке раньше раскрываются более длинные пути
+                heapq.heappush(heap, (cost + estimate, -cost, neighbor))
+        path = []
+        cell = best[1]
+        while cell != start:
+            path.append(cell)
+            cell = parents[cell]
+        path.reverse()
+        return path
+
+    def _room(self, start, limit):
+        """Count cells reachable from ``start``, up to ``limit``."""
+        width, height = self._grid.width, self._grid.height
+        entered = self._entered.get
+        base = self._moves - self._snake.length + 1
+        seen = {start}
+        frontier = [start]
+        while frontier and len(seen) < limit:
+            base += 1
+            next_frontier = []
+            for x, y in frontier:
+                for dx, dy in DIRECTIONS:
+                    neighbor = (x + dx) % width, (y + dy) % height
+                    if neighbor in seen:
+                        continue
+                    moved_in = entered(neighbor)
+                    if moved_in is None or moved_in <= base:
+                        seen.add(neighbor)
+                        next_frontier.append(neighbor)
+            frontier = next_frontier
+        return len(seen)
+
+    def _has_room(self, cell):
+        needed = min(self._snake.length + 1, self.space_budget)
+        return self._room(cell, needed) >= needed
+
+    def _fallback(self):
+        width, height = self._grid.width, self._grid.height
+        cycle_next = hamiltonian_next(self._head, width, height)
+        backwards = opposite(self._snake.direction)
+        best = None
+        for cell in self._neighbors(self._head):
+            direction = self._direction(cell)
+            if direction == backwards or not self._free_at(cell, 1):
+                continue
+            key = self._room(cell, self.space_budget), cell == cycle_next
+            if best is None or key > best[0]:
+                best = key, direction
+        return best[1] if best is not None else None
+
+
+# Экземпляр для ``tournament --policy autopilot:autopilot_policy``; кэш
+# сбрасывается сам, когда начинается игра с новой змейкой.
+autopilot_policy = Autopilot()
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--grid', type=parse_grid_size, metavar='WxH',
+                        default=(GRID_WIDTH, GRID_HEIGHT),
+                        help='board size in cells')
+    parser.add_argument('--cell-size', type=int, default=GRID_SIZE,
+                        help='cell size in pixels')
+    parser.add_argument('--background', action='store_true',
+                        help='decide on a worker thread with a deadline')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Show the autopilot playing in the game window."""
+    args = parse_args(argv)
+    init_display()
+    autopilot = Autopilot()
+    controller = autopilot
+    if args.background:
+        controller = BackgroundController(autopilot)
+    session = GameSession(grid=GridConfig(*args.grid, args.cell_size),
+                          controller=controller)
+    try:
+        session.run()
+    finally:
+        if args.background:
+            controller.close()
+            print('В фоне: {decisions} решений вовремя, {missed_deadlines} '
+                  'опозданий, {errors} ошибок, p99 {decision_p99_ms:.3f} '
+                  'мс'.format(
+                      **controller.stats()))
+        print('Автопилот: {decisions} решений, {decision_mean_ms:.3f} мс в '
+              'среднем, {decision_max_ms:.3f} мс макс.'.format(
+                  **autopilot.stats()))
+
+
+if __name__ == '__main__':
+    main()
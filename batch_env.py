@@ -0,0 +1,221 @@
+"""Vectorized engine that steps many independent snake games at once.
+
+The rules mirror ``SnakeGame`` from ``the_snake``: for the same seed and
+actions every game here plays out exactly like its scalar counterpart.
+"""
+import random
+
+import numpy as np
+
+from the_snake import APPLE_REWARD, DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, RIGHT
+
+# Коды направлений — индексы в DIRECTIONS, -1 означает «без изменений»:
+NO_ACTION = -1
+DX = np.array([dx for dx, _ in DIRECTIONS], dtype=np.int64)
+DY = np.array([dy for _, dy in DIRECTIONS], dtype=np.int64)
+OPPOSITE = np.array(
+    [DIRECTIONS.index((-dx, -dy)) for dx, dy in DIRECTIONS], dtype=np.int8)
+
+# Причины окончания игры:
+CAUSE_NONE = 0
+CAUSE_COLLISION = 1
+CAUSE_WIN = 2
+
+
+class BatchSnakeGame:
+    """
+    N snake games kept in NumPy arrays and advanced in a single step.
+
+    Cells are numbered ``y * width + x``. Each game has a ring buffer with
+    its body, an occupancy grid and the same free-cell index as
+    ``FreeCells`` (a list with swap-remove plus a cell-to-index map).
+    Finished games are reset automatically at the end of ``step``.
+
+    Attributes:
+        heads (np.ndarray): Head cell of every game.
+        lengths (np.ndarray): Target length of every snake.
+        directions (np.ndarray): Direction code of every snake.
+        apples (np.ndarray): Apple cell of every game.
+        scores (np.ndarray): Score of every game.
+        final_scores (np.ndarray): Score at the end of the games finished
+            on the last step.
+        causes (np.ndarray): Why each game ended on the last step.
+    """
+
+    def __init__(self, n, seeds=None, width=GRID_WIDTH, height=GRID_HEIGHT):
+        """
+        Create ``n`` new games.
+
+        Args:
+            n (int): Number of games.
+            seeds (sequence, optional): Seed of every game, as for
+                ``SnakeGame(seed)``.
+            width (int): Board width in cells.
+            height (int): Board height in cells.
+        """
+        if seeds is None:
+            seeds = [None] * n
+        self.n = n
+        self.width = width
+        self.height = height
+        self.size = width * height
+        self.rngs = [random.Random(seed) for seed in seeds]
+
+        cells = self.size
+        self.body = np.zeros((n, cells), dtype=np.int32)
+        self.head_ptr = np.zeros(n, dtype=np.int64)
+        self.body_size = np.ones(n, dtype=np.int64)
+        self.lengths = np.ones(n, dtype=np.int64)
+        self.directions = np.full(n, DIRECTIONS.index(RIGHT), dtype=np.int8)
+        self.occupied = np.zeros((n, cells), dtype=np.uint8)
+        self.free = np.zeros((n, cells), dtype=np.int32)
+        self.free_index = np.zeros((n, cells), dtype=np.int32)
+        self.free_count = np.zeros(n, dtype=np.int64)
+        self.apples = np.zeros(n, dtype=np.int64)
+        self.scores = np.zeros(n, dtype=np.int64)
+        self.ticks = np.zeros(n, dtype=np.int64)
+        self.final_scores = np.zeros(n, dtype=np.int64)
+        self.causes = np.zeros(n, dtype=np.int8)
+        self.center = self.cell((width // 2, height // 2))
+        self._games = np.arange(n)
+
+        # Свободные клетки заполняются так же, как в FreeCells.for_board:
+        # всё поле по порядку, затем удаляется клетка головы.
+        center = self.center
+        self.free[:] = np.arange(cells, dtype=np.int32)
+        self.free_index[:] = np.arange(cells, dtype=np.int32)
+        self.free_count[:] = cells
+        self.body[:, 0] = center
+        self.occupied[:, center] = 1
+        self._free_remove(self._games, np.full(n, center))
+        for game in range(n):
+            self._place_apple(game)
+
+    @property
+    def heads(self):
+        """Get the head cell of every game."""
+        return self.body[self._games, self.head_ptr]
+
+    def cell(self, position):
+        """Convert an (x, y) position to a cell number."""
+        return position[1] * self.width + position[0]
+
+    def position(self, cell):
+        """Convert a cell number to an (x, y) position."""
+        return int(cell) % self.width, int(cell) // self.width
+
+    def positions(self, game):
+        """
+        Get the body of one game, head first, like ``Snake.positions``.
+
+        Args:
+            game (int): Index of the game.
+
+        Returns:
+            list: (x, y) positions of the segments.
+        """
+        ptr = self.head_ptr[game]
+        return [self.position(self.body[game, (ptr - i) % self.size])
+                for i in range(self.body_size[game])]
+
+    def step(self, actions=None):
+        """
+        Advance every game by one tick.
+
+        Args:
+            actions (array-like, optional): Direction code for every game,
+                ``NO_ACTION`` keeps the current direction. Reversals are
+                ignored.
+
+        Returns:
+            tuple: ``(rewards, dones)`` arrays. Finished games are already
+            reset, their scores are in ``final_scores``.
+        """
+        games = self._games
+        if actions is not None:
+            actions = np.asarray(actions)
+            turn = (actions >= 0) & (actions != OPPOSITE[self.directions])
+            self.directions[turn] = actions[turn]
+
+        heads = self.heads
+        directions = self.directions
+        new_heads = ((heads // self.width + DY[directions]) % self.height
+                     * self.width
+                     + (heads % self.width + DX[directions]) % self.width)
+
+        # Хвост освобождается до того, как голова займёт новую клетку
+        pop = np.flatnonzero(self.body_size >= self.lengths)
+        tails = self.body[pop, (self.head_ptr[pop] - self.body_size[pop] + 1)
+                          % self.size]
+        self.occupied[pop, tails] = 0
+        self.body_size[pop] -= 1
+        self._free_add(pop, tails)
+
+        collided = self.occupied[games, new_heads] == 1
+        self.head_ptr = (self.head_ptr + 1) % self.size
+        self.body[games, self.head_ptr] = new_heads
+        self.body_size += 1
+        self.occupied[games, new_heads] = 1
+        self.ticks += 1
+
+        alive = np.flatnonzero(~collided)
+        self._free_remove(alive, new_heads[alive])
+
+        rewards = np.zeros(self.n, dtype=np.int64)
+        self.causes[:] = CAUSE_NONE
+        self.causes[collided] = CAUSE_COLLISION
+        eaten = alive[new_heads[alive] == self.apples[alive]]
+        self.lengths[eaten] += 1
+        self.scores[eaten] += APPLE_REWARD
+        rewards[eaten] = APPLE_REWARD
+        for game in eaten:
+            if self.free_count[game]:
+                self._place_apple(game)
+            else:
+                self.causes[game] = CAUSE_WIN
+
+        dones = self.causes != CAUSE_NONE
+        self.final_scores[dones] = self.scores[dones]
+        for game in np.flatnonzero(dones):
+            self.reset(game)
+        return rewards, dones
+
+    def reset(self, game):
+        """Start a new game in slot ``game``, like ``SnakeGame.reset``."""
+        rng = self.rngs[game]
+        ptr = self.head_ptr[game]
+        for i in range(self.body_size[game]):
+            cell = self.body[game, (ptr - i) % self.size]
+            if self.free_index[game, cell] < 0:
+                self._free_add([game], [cell])
+        self.occupied[game] = 0
+
+        center = self.center
+        self.head_ptr[game] = 0
+        self.body[game, 0] = center
+        self.body_size[game] = 1
+        self.lengths[game] = 1
+        self.occupied[game, center] = 1
+        self.directions[game] = DIRECTIONS.index(rng.choice(DIRECTIONS))
+        self._free_remove([game], [center])
+        self._place_apple(game)
+        self.scores[game] = 0
+        self.ticks[game] = 0
+
+    def _place_apple(self, game):
+        index = self.rngs[game].randrange(self.free_count[game])
+        self.apples[game] = self.free[game, index]
+
+    def _free_add(self, games, cells):
+        count = self.free_count[games]
+        self.free[games, count] = cells
+        self.free_index[games, cells] = count
+        self.free_count[games] += 1
+
+    def _free_remove(self, games, cells):
+        index = self.free_index[games, cells]
+        self.free_count[games] -= 1
+        last = self.free[games, self.free_count[games]]
+        self.free[games, index] = last
+        self.free_index[games, last] = index
+        self.free_index[games, cells] = -1
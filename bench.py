@@ -0,0 +1,475 @@
+"""Benchmarks for the snake game.
+
+Times the hot paths of the game (snake movement, the self-collision
+check, apple placement at different board fill ratios, drawing, the
+full frame, state snapshots and the board tables against plain
+arithmetic) for several grid sizes, plus the startup cost::
+
+    python bench.py --output bench.json
+    python bench.py --baseline bench.json    # flag regressions
+
+All timings are nanoseconds per operation, the best of several repeats;
+the ``memory_*`` entries are bytes.
+"""
+import argparse
+import copy
+import json
+import os
+import platform
+import random
+import subprocess
+import sys
+import time
+import tracemalloc
+from pathlib import Path
+
+# Бенчмарки отрисовки работают без окна:
+os.environ.setdefault('SDL_VIDEODRIVER', 'dummy')
+os.environ.setdefault('PYGAME_HIDE_SUPPORT_PROMPT', '1')
+
+import pygame as pg  # noqa: E402
+
+import the_snake  # noqa: E402
+from autopilot import hamiltonian_next  # noqa: E402
+from topology import Topology  # noqa: E402
+
+BASE_DIR = Path(__file__).resolve().parent
+
+DEFAULT_SIZES = ((the_snake.GRID_WIDTH, the_snake.GRID_HEIGHT),
+                 (100, 100), (1000, 1000))
+FILL_RATIOS = (0.0, 0.5, 0.9, 0.99)
+SNAKE_FILL = 0.5  # Доля поля под змейкой в бенчмарках движения
+MAX_DRAWN_LENGTH = 5000  # Длина змейки в бенчмарках отрисовки
+REPEAT = 5
+POPULATION = 1000  # Змеек в бенчмарке памяти для множества змеек
+POPULATION_LENGTH = 10
+REGRESSION_THRESHOLD = 0.25
+
+STARTUP_SCRIPT = '''
+import json
+import time
+
+start = time.perf_counter()
+import the_snake
+imported = time.perf_counter()
+the_snake.init_display()
+initialized = time.perf_counter()
+the_snake.Renderer(the_snake.SnakeGame()).draw()
+first_frame = time.perf_counter()
+print(json.dumps({
+    'import': imported - start,
+    'init_display': initialized - imported,
+    'first_frame': first_frame - initialized,
+}))
+'''
+
+
+def measure_startup():
+    """
+    Measure the startup cost in a fresh interpreter.
+
+    Returns:
+        dict: Seconds spent on ``import the_snake``, on opening the window
+        and on drawing the first frame.
+    """
+    env = dict(os.environ)
+    env.setdefault('SDL_VIDEODRIVER', 'dummy')
+    env['PYGAME_HIDE_SUPPORT_PROMPT'] = '1'
+    output = subprocess.run(
+        [sys.executable, '-c', STARTUP_SCRIPT], cwd=BASE_DIR, env=env,
+        check=True, capture_output=True, text=True,
+    ).stdout
+    return json.loads(output.splitlines()[-1])
+
+
+def time_per_op(func, number, repeat=REPEAT):
+    """
+    Time a function.
+
+    Args:
+        func (callable): Function without arguments.
+        number (int): Calls per repeat.
+        repeat (int): Number of repeats.
+
+    Returns:
+        float: Best time of one call in nanoseconds.
+    """
+    best = float('inf')
+    for _ in range(repeat):
+        start = time.perf_counter_ns()
+        for _ in range(number):
+            func()
+        best = min(best, (time.perf_counter_ns() - start) / number)
+    return best
+
+
+def make_snake(grid, length):
+    """
+    Build a snake that covers the first ``length`` cells row by row.
+
+    The head is the last covered cell and moves right along its row.
+    """
+    cells = [(i % grid.width, i // grid.width) for i in range(length)]
+    snake = the_snake.Snake(position=cells[-1], grid=grid)
+    snake.positions = the_snake.deque(reversed(cells))
+    snake.occupied = set(cells)
+    snake.length = length
+    snake.direction = the_snake.RIGHT
+    return snake
+
+
+def make_cycle_snake(grid, length):
+    """
+    Build a snake lying along the Hamiltonian cycle of the board.
+
+    Following the cycle, the snake never runs into itself, so a game with
+    it stays alive while it is stepped. Returns None if the board has no
+    such cycle.
+    """
+    cell = (0, 0)
+    if hamiltonian_next(cell, grid.width, grid.height) is None:
+        return None
+    cells = [cell]
+    for _ in range(length - 1):
+        cells.append(hamiltonian_next(cells[-1], grid.width, grid.height))
+    snake = the_snake.Snake(position=cells[-1], grid=grid)
+    snake.positions = the_snake.deque(reversed(cells))
+    snake.occupied = set(cells)
+    snake.length = length
+    snake.direction = cycle_direction(grid, cells[-1])
+    return snake
+
+
+def cycle_direction(grid, position):
+    """Get the direction from a cell to the next one of the cycle."""
+    next_x, next_y = hamiltonian_next(position, grid.width, grid.height)
+    return next_x - position[0], next_y - position[1]
+
+
+def make_moving_snake(grid, length):
+    """Build a snake along the cycle, or row by row without a cycle."""
+    return make_cycle_snake(grid, length) or make_snake(grid, length)
+
+
+def make_packed_snake(grid, length):
+    """Build a PackedSnake with the same body as ``make_moving_snake``."""
+    return pack_snake(make_moving_snake(grid, length))
+
+
+def pack_snake(body):
+    """Build a PackedSnake with the body of a Snake."""
+    snake = the_snake.PackedSnake(position=(0, 0), grid=body.grid)
+    snake.cells = the_snake.array('I', [
+        snake.to_cell(position) for position in reversed(body.positions)])
+    snake.size = snake.length = len(body.positions)
+    snake.head = snake.size - 1
+    snake.update_index()
+    snake.direction = body.direction
+    return snake
+
+
+def cycle_mover(snake, grid, moves):
+    """
+    Get a function that moves the snake one cell along the cycle.
+
+    The directions of the next ``moves`` moves are computed up front, so
+    the timed function only sets ``next_direction`` and moves, and the
+    snake never runs into itself. Without a cycle the snake goes straight
+    on, as ``make_snake`` lays it out.
+    """
+    if hamiltonian_next((0, 0), grid.width, grid.height) is None:
+        return snake.move
+    position = snake.get_head_position()
+    directions = []
+    for _ in range(moves):
+        directions.append(cycle_direction(grid, position))
+        position = hamiltonian_next(position, grid.width, grid.height)
+    turns = iter(directions)
+
+    def move():
+        snake.next_direction = next(turns)
+        snake.move()
+
+    return move
+
+
+def time_moves(snake, grid, number=10_000):
+    """Time a move of the snake along the cycle."""
+    return time_per_op(cycle_mover(snake, grid, number * REPEAT), number)
+
+
+def allocated(build):
+    """
+    Measure the memory allocated by a function.
+
+    Returns:
+        int: Bytes still allocated after the call.
+    """
+    tracemalloc.start()
+    try:
+        before = tracemalloc.get_traced_memory()[0]
+        result = build()  # noqa: F841 Объект должен жить до замера
+        return tracemalloc.get_traced_memory()[0] - before
+    finally:
+        tracemalloc.stop()
+
+
+def bench_snake(grid):
+    """Time a move and the self-collision check of a long snake."""
+    length = max(1, int(grid.cells * SNAKE_FILL))
+    snake = make_moving_snake(grid, length)
+    head = snake.get_head_position()
+    packed = make_packed_snake(grid, length)
+    return {
+        'snake_move': time_moves(snake, grid),
+        'packed_snake_move': time_moves(packed, grid),
+        'self_collision': time_per_op(lambda: head in snake.occupied,
+                                      100_000),
+    }
+
+
+def bench_apple(grid):
+    """Time apple placement and free-cell updates at several fill ratios."""
+    rng = random.Random(0)
+    cells = [(x, y) for y in range(grid.height) for x in range(grid.width)]
+    results = {}
+    for ratio in FILL_RATIOS:
+        taken = int(len(cells) * ratio)
+        free = the_snake.FreeCells.for_board(cells[:taken], grid)
+        apple = the_snake.Apple(position=cells[-1], grid=grid)
+        results[f'apple_place_fill_{ratio:g}'] = time_per_op(
+            lambda: apple.randomize_position(free_cells=free, rng=rng),
+            10_000)
+
+        def update():
+            cell = free.sample(rng)
+            free.remove(cell)
+            free.add(cell)
+
+        results[f'free_cells_update_fill_{ratio:g}'] = time_per_op(
+            update, 10_000)
+    return results
+
+
+def bench_draw(grid):
+    """Time drawing of the snake, the panel and whole frames."""
+    length = min(MAX_DRAWN_LENGTH, max(1, int(grid.cells * SNAKE_FILL)))
+    snake = make_moving_snake(grid, length)
+    info = the_snake.GameInfo()
+    game = the_snake.SnakeGame(0, grid=grid)
+    game.snake = snake
+    game.free_cells = the_snake.FreeCells.for_board(snake.occupied, grid)
+    game.apple.randomize_position(free_cells=game.free_cells, rng=game.rng)
+    renderer = the_snake.Renderer(game)
+    on_cycle = hamiltonian_next((0, 0), grid.width, grid.height) is not None
+
+    def incremental_frame():
+        # Змейка идёт по циклу и не погибает; без цикла игра перезапускается
+        action = None
+        if on_cycle:
+            action = cycle_direction(grid, game.snake.get_head_position())
+        _, _, done = game.step(action)
+        if done:
+            game.reset()
+            renderer.invalidate()
+        renderer.track()
+        renderer.draw()
+
+    return {
+        'snake_draw': time_per_op(snake.draw, 20),
+        'info_draw': time_per_op(lambda: info.draw(length, 100), 1000),
+        'frame_full': time_per_op(renderer.draw_full, 20),
+        'frame_incremental': time_per_op(incremental_frame, 200),
+    }
+
+
+def bench_snapshot(grid):
+    """Time packing and restoring the state against a deep copy."""
+    length = min(MAX_DRAWN_LENGTH, max(1, int(grid.cells * SNAKE_FILL)))
+    game = the_snake.SnakeGame(0, grid=grid)
+    game.snake = make_snake(grid, length)
+    game.free_cells = the_snake.FreeCells.for_board(game.snake.occupied, grid)
+    snapshot = game.snapshot()
+    return {
+        'snapshot_capture': time_per_op(game.snapshot, 200),
+        'snapshot_copy': time_per_op(snapshot.copy, 2000),
+        'snapshot_restore': time_per_op(snapshot.restore, 200),
+        'state_deepcopy': time_per_op(
+            lambda: copy.deepcopy((game.snake, game.apple, game.info,
+                                   game.rng)), 20),
+    }
+
+
+def bench_topology(grid):
+    """
+    Compare the board tables with computing cells and rectangles directly.
+
+    The ``*_arithmetic`` entries are the code the tables replace: a move of
+    a cell number by modulo, the same in a whole PackedSnake move on a
+    board without tables, and a new pixel rectangle. The tables themselves
+    cost ``topology_build`` once per board size and ``memory_topology``
+    bytes.
+    """
+    if not grid.topology.has_tables:
+        return {}
+    width, height, size = grid.width, grid.height, grid.cell_size
+    cell_steps = grid.topology.cell_steps
+    head, direction = grid.cells // 2, the_snake.RIGHT
+    # Прямоугольники хранятся только для клеток экрана
+    position = grid.view_width // 2, grid.view_height // 2
+
+    def wrap_arithmetic():
+        dir_x, dir_y = direction
+        return ((head // width + dir_y) % height * width
+                + (head % width + dir_x) % width)
+
+    def build():
+        return Topology(width, height).cell_steps
+
+    # То же поле без таблиц: ход упакованной змейки считается по модулю
+    plain = copy.copy(grid)
+    plain.topology = Topology(width, height, max_cells=0)
+    length = min(MAX_DRAWN_LENGTH, grid.cells // 2)
+    return {
+        'wrap_arithmetic': time_per_op(wrap_arithmetic, 100_000),
+        'wrap_table': time_per_op(lambda: cell_steps[direction][head],
+                                  100_000),
+        'packed_move_arithmetic':
+            time_moves(make_packed_snake(plain, length), plain),
+        'packed_move_table': time_moves(make_packed_snake(grid, length), grid),
+        'rect_arithmetic': time_per_op(
+            lambda: pg.Rect(position[0] * size, position[1] * size, size,
+                            size), 100_000),
+        'rect_table': time_per_op(
+            lambda: the_snake.cell_rect(position, size), 100_000),
+        'topology_build': time_per_op(build, 1),
+        'memory_topology_bytes': allocated(build),
+    }
+
+
+def bench_memory(grid):
+    """Measure the memory and the move time of long and short snakes."""
+    length = min(MAX_DRAWN_LENGTH * 20, max(1, int(grid.cells * SNAKE_FILL)))
+    short = min(POPULATION_LENGTH, grid.cells)
+
+    # Тела для упакованных змеек строятся заранее: кортежи клеток, которые
+    # остаются в кэше интерпретатора, не попадают в замер
+    long_body = make_moving_snake(grid, length)
+    short_body = make_moving_snake(grid, short)
+
+    # Время хода рядом с памятью: за что платит упакованная змейка
+    return {
+        'long_snake_move': time_moves(make_moving_snake(grid, length), grid),
+        'long_packed_snake_move':
+            time_moves(make_packed_snake(grid, length), grid),
+        'short_snake_move': time_moves(make_moving_snake(grid, short), grid),
+        'short_packed_snake_move':
+            time_moves(make_packed_snake(grid, short), grid),
+        'memory_snake_bytes_per_cell':
+            allocated(lambda: make_moving_snake(grid, length)) / length,
+        'memory_packed_bytes_per_cell':
+            allocated(lambda: pack_snake(long_body)) / length,
+        'memory_snake_population_bytes_per_snake':
+            allocated(lambda: [make_moving_snake(grid, short)
+                               for _ in range(POPULATION)]) / POPULATION,
+        'memory_packed_population_bytes_per_snake':
+            allocated(lambda: [pack_snake(short_body)
+                               for _ in range(POPULATION)]) / POPULATION,
+    }
+
+
+BENCHMARKS = (bench_snake, bench_apple, bench_draw, bench_snapshot,
+              bench_topology, bench_memory)
+
+
+def run(sizes=DEFAULT_SIZES):
+    """
+    Run all benchmarks for every grid size.
+
+    Returns:
+        dict: Metadata, startup times and ``{size: {name: ns}}`` results.
+    """
+    the_snake.init_display()
+    results = {}
+    for width, height in sizes:
+        timings = results[f'{width}x{height}'] = {}
+        grid = the_snake.GridConfig(width, height)
+        for benchmark in BENCHMARKS:
+            timings.update(benchmark(grid))
+    return {
+        'meta': {
+            'python': platform.python_version(),
+            'pygame': pg.version.ver,
+            'machine': platform.machine(),
+        },
+        'startup': measure_startup(),
+        'results': results,
+    }
+
+
+def compare(current, baseline, threshold=REGRESSION_THRESHOLD):
+    """
+    Find benchmarks that became slower than the baseline.
+
+    Args:
+        current (dict): Fresh results of ``run``.
+        baseline (dict): Saved results of ``run``.
+        threshold (float): Allowed relative slowdown.
+
+    Returns:
+        list: ``(size, name, baseline ns, current ns)`` of regressions.
+    """
+    regressions = []
+    for size, timings in current['results'].items():
+        saved = baseline['results'].get(size, {})
+        for name, value in timings.items():
+            old = saved.get(name)
+            if old and value > old * (1 + threshold):
+                regressions.append((size, name, old, value))
+    return regressions
+
+
+def parse_size(text):
+    """Parse a grid size like ``22x24``."""
+    width, _, height = text.partition('x')
+    return int(width), int(height)
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--sizes', nargs='+', type=parse_size,
+                        default=DEFAULT_SIZES, metavar='WxH')
+    parser.add_argument('--output', help='save the results as JSON')
+    parser.add_argument('--baseline', help='compare with saved results')
+    parser.add_argument('--threshold', type=float,
+                        default=REGRESSION_THRESHOLD,
+                        help='allowed relative slowdown, 0.25 = 25%%')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """
+    Run the benchmarks from the command line.
+
+    Returns:
+        int: 1 if a regression against the baseline was found, else 0.
+    """
+    args = parse_args(argv)
+    results = run(args.sizes)
+    text = json.dumps(results, indent=2)
+    if args.output:
+        Path(args.output).write_text(text)
+    else:
+        print(text)
+    if not args.baseline:
+        return 0
+    baseline = json.loads(Path(args.baseline).read_text())
+    regressions = compare(results, baseline, args.threshold)
+    for size, name, old, new in regressions:
+        print(f'REGRESSION {size} {name}: {old:.0f} ns -> {new:.0f} ns')
+    return 1 if regressions else 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,229 @@
+"""Headless capture of game frames to raw RGB video or PNG files.
+
+Frames are drawn offscreen by the usual ``Renderer``, copied straight from
+the pixels of the surface into a preallocated ring buffer and written out
+by a worker thread, so no window is needed and replays are rendered as
+fast as the disk allows::
+
+    python capture.py game.rpl game.rgb                  # raw RGB24 frames
+    python capture.py game.rpl frames/ --format png      # numbered PNGs
+    ffmpeg -f rawvideo -pix_fmt rgb24 -s 640x480 -r 10 -i game.rgb game.mp4
+"""
+import argparse
+import queue
+import sys
+import threading
+import time
+from pathlib import Path
+
+import numpy as np
+import pygame as pg
+
+import the_snake
+from the_snake import Renderer, Replay
+
+FORMATS = ('raw', 'png')
+BUFFER_FRAMES = 32  # Кадров в кольцевом буфере
+
+
+class FrameCapture:
+    """
+    Copies frames of a surface into a ring buffer and writes them to disk.
+
+    The buffer holds ``capacity`` frames of ``(height, width, 3)`` bytes and
+    is allocated once, so memory use does not depend on the length of the
+    game. ``capture`` copies the frame once, from the pixels of the surface
+    (``pg.surfarray.pixels3d``, without an intermediate string) into a free
+    slot. The worker thread hands the slot to the file as a buffer, with no
+    further copy, and frees it. When no slot is free, ``capture`` waits for
+    the worker.
+
+    The raw format is one file of RGB24 frames one after another; the PNG
+    format is a directory of ``frame-NNNNNN.png`` files.
+
+    Attributes:
+        path (Path): The raw file or the PNG directory.
+        format (str): ``'raw'`` or ``'png'``.
+        surface (pg.Surface): The captured surface.
+        buffer (np.ndarray): The ring buffer of frames.
+        frames (int): Number of captured frames.
+        written (int): Number of frames written to disk.
+        waits (int): Times ``capture`` had to wait for a free slot.
+    """
+
+    def __init__(self, path, fmt='raw', capacity=BUFFER_FRAMES,
+                 surface=None):
+        """
+        Allocate the buffer and start the writer thread.
+
+        Args:
+            path (str): File for raw frames or directory for PNG files.
+            fmt (str): ``'raw'`` or ``'png'``.
+            capacity (int): Number of frames in the ring buffer.
+            surface (pg.Surface, optional): Surface to capture,
+                ``the_snake.screen`` by default.
+
+        Raises:
+            ValueError: If the format is unknown.
+        """
+        if fmt not in FORMATS:
+            raise ValueError(f'Неизвестный формат кадров: {fmt}')
+        self.path = Path(path)
+        self.format = fmt
+        self.surface = the_snake.screen if surface is None else surface
+        width, height = self.surface.get_size()
+        self.buffer = np.empty((capacity, height, width, 3), np.uint8)
+        self.frames = 0
+        self.written = 0
+        self.waits = 0
+        self._error = None
+        self._free = queue.Queue()
+        for slot in range(capacity):
+            self._free.put(slot)
+        self._ready = queue.Queue()
+        if fmt == 'raw':
+            self._file = open(self.path, 'wb')
+        else:
+            self.path.mkdir(parents=True, exist_ok=True)
+            self._file = None
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='capture')
+        self._thread.start()
+
+    def capture(self):
+        """
+        Copy the current frame of the surface and queue it for writing.
+
+        Raises:
+            OSError: If writing an earlier frame failed; pygame.error if
+                saving a PNG failed.
+        """
+        if self._error is not None:
+            raise self._error
+        try:
+            slot = self._free.get_nowait()
+        except queue.Empty:
+            self.waits += 1
+            slot = self._free.get()
+        # Вид на пиксели блокирует поверхность, пока он существует
+        pixels = pg.surfarray.pixels3d(self.surface)
+        try:
+            self.buffer[slot] = pixels.transpose(1, 0, 2)
+        finally:
+            del pixels
+        self._ready.put((slot, self.frames))
+        self.frames += 1
+
+    def close(self):
+        """
+        Write the queued frames and stop the writer thread.
+
+        Raises:
+            OSError: If writing a frame failed; pygame.error if saving a
+                PNG failed.
+        """
+        self._ready.put(None)
+        self._thread.join()
+        if self._file is not None:
+            self._file.close()
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """
+        Get the capture statistics.
+
+        Returns:
+            dict: Captured and written frames and waits for a free slot.
+        """
+        return {'frames': self.frames, 'written': self.written,
+                'waits': self.waits}
+
+    def _run(self):
+        while True:
+            item = self._ready.get()
+            if item is None:
+                break
+            slot, number = item
+            try:
+                if self._error is None:
+                    self._write(self.buffer[slot], number)
+                    self.written += 1
+            except Exception as error:
+                # pg.image.save сообщает об ошибке через pygame.error
+                self._error = error
+            finally:
+                # Слоты освобождаются и дальше, чтобы capture не завис
+                self._free.put(slot)
+
+    def _write(self, frame, number):
+        if self._file is not None:
+            self._file.write(frame.data)
+            return
+        height, width = frame.shape[:2]
+        image = pg.image.frombuffer(frame.data, (width, height), 'RGB')
+        pg.image.save(image, str(self.path / f'frame-{number:06d}.png'))
+
+
+def capture_replay(replay, path, fmt='raw', every=1,
+                   capacity=BUFFER_FRAMES):
+    """
+    Render a replay offscreen and save its frames.
+
+    Args:
+        replay (Replay): The replay.
+        path (str): File for raw frames or directory for PNG files.
+        fmt (str): ``'raw'`` or ``'png'``.
+        every (int): Capture every n-th tick; the first frame is always
+            captured.
+        capacity (int): Number of frames in the ring buffer.
+
+    Returns:
+        FrameCapture: The finished capture with its statistics.
+    """
+    game = replay.new_game()
+    renderer = Renderer(game, offscreen=True)
+    capture = FrameCapture(path, fmt, capacity)
+    try:
+        renderer.draw()
+        capture.capture()
+        for tick, direction in enumerate(replay.directions(), 1):
+            game.step(direction)
+            renderer.track()
+            if tick % every == 0:
+                renderer.draw()
+                capture.capture()
+    finally:
+        capture.close()
+    return capture
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('replay', help='replay file')
+    parser.add_argument('output', help='raw file or PNG directory')
+    parser.add_argument('--format', choices=FORMATS, default='raw')
+    parser.add_argument('--every', type=int, default=1,
+                        help='capture every n-th tick')
+    parser.add_argument('--buffer', type=int, default=BUFFER_FRAMES,
+                        help='frames in the ring buffer')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Capture a replay from the command line."""
+    args = parse_args(argv)
+    start = time.perf_counter()
+    capture = capture_replay(Replay.load(args.replay), args.output,
+                             args.format, args.every, args.buffer)
+    elapsed = max(time.perf_counter() - start, 1e-9)
+    width, height = capture.surface.get_size()
+    print(f'{capture.frames} кадров {width}x{height} за {elapsed:.2f} с '
+          f'({capture.frames / elapsed:.0f} кадров/с), ожиданий записи: '
+          f'{capture.waits}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,102 @@
+"""Playback of recorded games.
+
+Replays are written by ``python the_snake.py --record DIR``::
+
+    python replay.py verify DIR/*.rpl    # headless, as fast as possible
+    python replay.py play FILE [--speed 30]
+"""
+import argparse
+import sys
+import time
+
+import pygame as pg
+
+import the_snake
+from the_snake import Renderer, Replay, ReplayMismatchError
+
+
+def verify_files(paths):
+    """
+    Verify replays headless and report the result of each one.
+
+    Returns:
+        int: Number of replays that did not reproduce their score.
+    """
+    failures = 0
+    for path in paths:
+        replay = Replay.load(path)
+        start = time.perf_counter()
+        try:
+            replay.verify()
+        except ReplayMismatchError as error:
+            failures += 1
+            print(f'{path}: FAIL {error}')
+            continue
+        elapsed = time.perf_counter() - start
+        print(f'{path}: OK score={replay.score} ticks={replay.ticks} '
+              f'({replay.ticks / max(elapsed, 1e-9):.0f} ticks/s)')
+    return failures
+
+
+def play(replay, speed=the_snake.SPEED):
+    """
+    Show a replay in the game window.
+
+    The replay is played on the board it was recorded on, and when it is
+    shown to the end its score is checked like ``Replay.verify`` does.
+
+    Args:
+        replay (Replay): The replay.
+        speed (int): Ticks per second, 0 plays as fast as possible.
+
+    Returns:
+        SnakeGame: The game after the last shown tick.
+
+    Raises:
+        ReplayMismatchError: If the replay did not reproduce its score.
+    """
+    the_snake.init_display()
+    game = replay.new_game()
+    renderer = Renderer(game)
+    renderer.draw()
+    for direction in replay.directions():
+        if pg.event.peek(pg.QUIT):
+            pg.event.clear()
+            return game
+        game.step(direction)
+        renderer.track()
+        renderer.draw()
+        the_snake.clock.tick(speed)
+    pg.event.clear()
+    return replay.check(game)
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    commands = parser.add_subparsers(dest='command', required=True)
+    verify = commands.add_parser('verify', help='check replays headless')
+    verify.add_argument('paths', nargs='+')
+    show = commands.add_parser('play', help='show a replay')
+    show.add_argument('path')
+    show.add_argument('--speed', type=int, default=the_snake.SPEED,
+                      help='ticks per second, 0 for maximum speed')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the replay tool from the command line."""
+    args = parse_args(argv)
+    if args.command == 'verify':
+        return 1 if verify_files(args.paths) else 0
+    try:
+        game = play(Replay.load(args.path), args.speed)
+    except ReplayMismatchError as error:
+        print(f'{args.path}: FAIL {error}')
+        return 1
+    print(f'score={game.info.score} ticks={game.ticks}')
+    return 0
+
+
+if __name__ == '__main__':
+    sys.exit(main())
@@ -0,0 +1,193 @@
+"""Persistent high-score table with a top-K index.
+
+The game window keeps one with ``python the_snake.py --scores scores.log``
+and the tournament runner with ``python tournament.py --scores``.
+"""
+from collections import namedtuple
+from pathlib import Path
+import heapq
+import itertools
+import mmap
+import os
+import struct
+import time
+import zlib
+
+# Сколько лучших результатов хранит индекс таблицы рекордов:
+TOP_SCORES = 10
+
+
+ScoreEntry = namedtuple('ScoreEntry', 'score length ticks seed timestamp')
+
+
+def _by_score(entry):
+    return entry.score
+
+
+class ScoreStore:
+    """
+    Persistent high-score table: an append-only log and a top-K index.
+
+    Every finished game is appended to the log as a fixed-size record
+    (score, length, ticks, seed, timestamp and a CRC-32 of them) after a
+    small header. The best ``top_size`` entries are kept in a separate
+    index file, so the best score is known without reading the log. The
+    index is replaced atomically when the top changes and on ``close``;
+    it remembers how much of the log it covers, so after a crash only the
+    tail written since is scanned again.
+
+    On opening, a torn or corrupted record at the end of the log, left by
+    a crash in the middle of a write, is cut off. ``entries`` reads the
+    whole log through ``mmap`` for bulk analysis.
+
+    Entries with equal scores rank in the order they were added.
+
+    Attributes:
+        path (Path): The log file.
+        index_path (Path): The top-K index file next to the log.
+        top_size (int): Number of entries in the index.
+        recovered (int): Bytes cut off the end of the log when opening.
+    """
+
+    MAGIC = b'SNKL'
+    INDEX_MAGIC = b'SNKT'
+    VERSION = 1
+    HEADER = struct.Struct('<4sI')
+    FIELDS = struct.Struct('<IIIQd')
+    CRC = struct.Struct('<I')
+    RECORD_SIZE = FIELDS.size + CRC.size
+    INDEX_HEADER = struct.Struct('<4sIQI')
+
+    def __init__(self, path, top_size=TOP_SCORES, sync=False):
+        """
+        Open the table, creating its files if needed.
+
+        Args:
+            path (str): The log file; the index is ``path`` + ``.top``.
+            top_size (int): Number of best entries kept in the index.
+            sync (bool): Call ``fsync`` after every record, so that it
+                survives a power loss, not just a crash of the game.
+
+        Raises:
+            ValueError: If the file is not a high-score log.
+        """
+        self.path = Path(path)
+        self.index_path = self.path.with_name(self.path.name + '.top')
+        self.top_size = top_size
+        self.sync = sync
+        self.recovered = self._recover()
+        self.file = open(self.path, 'ab')
+        self._size = self.file.tell()
+        self._top = self._load_index()
+
+    def __len__(self):
+        """Get the number of entries in the log."""
+        return (self._size - self.HEADER.size) // self.RECORD_SIZE
+
+    def add(self, score, length, ticks, seed, timestamp=None):
+        """
+        Append the result of a game.
+
+        Returns:
+            ScoreEntry: The new entry.
+        """
+        entry = ScoreEntry(score, length, ticks, seed,
+                           time.time() if timestamp is None else timestamp)
+        body = self.FIELDS.pack(*entry)
+        self.file.write(body + self.CRC.pack(zlib.crc32(body)))
+        self.file.flush()
+        if self.sync:
+            os.fsync(self.file.fileno())
+        self._size += self.RECORD_SIZE
+        if len(self._top) < self.top_size or score > self._top[-1].score:
+            self._top = heapq.nlargest(self.top_size, self._top + [entry],
+                                       key=_by_score)
+            self._write_index()
+        return entry
+
+    def best(self):
+        """Get the best score, 0 while the table is empty."""
+        return self._top[0].score if self._top else 0
+
+    def top(self):
+        """Get the best entries, from the best one down."""
+        return list(self._top)
+
+    def entries(self, start=0):
+        """
+        Read the entries of the log through a memory map.
+
+        Args:
+            start (int): Number of entries to skip.
+
+        Yields:
+            ScoreEntry: The entries in the order they were added.
+        """
+        if len(self) <= start:
+            return
+        with open(self.path, 'rb') as file, mmap.mmap(
+                file.fileno(), self._size, access=mmap.ACCESS_READ) as data:
+            for offset in range(self.HEADER.size + start * self.RECORD_SIZE,
+                                self._size, self.RECORD_SIZE):
+                yield ScoreEntry._make(self.FIELDS.unpack_from(data, offset))
+
+    def close(self):
+        """Save the index for the whole log and close the files."""
+        self._write_index()
+        self.file.close()
+
+    def _recover(self):
+        """Create the log or cut a torn record off its end."""
+        if not self.path.exists() or not self.path.stat().st_size:
+            self.path.write_bytes(self.HEADER.pack(self.MAGIC, self.VERSION))
+            return 0
+        with open(self.path, 'r+b') as file:
+            if self.HEADER.unpack(file.read(self.HEADER.size)) != (
+                    self.MAGIC, self.VERSION):
+                raise ValueError('Неизвестный формат таблицы рекордов')
+            size = file.seek(0, os.SEEK_END)
+            end = size - (size - self.HEADER.size) % self.RECORD_SIZE
+            while end > self.HEADER.size:
+                file.seek(end - self.RECORD_SIZE)
+                record = file.read(self.RECORD_SIZE)
+                body = record[:self.FIELDS.size]
+                if self.CRC.unpack(record[self.FIELDS.size:])[0] == \
+                        zlib.crc32(body):
+                    break
+                end -= self.RECORD_SIZE
+            if end != size:
+                file.truncate(end)
+        return size - end
+
+    def _load_index(self):
+        top, covered = [], 0
+        try:
+            data = self.index_path.read_bytes()
+            magic, version, size, count = self.INDEX_HEADER.unpack_from(data)
+            if (magic, version) == (self.INDEX_MAGIC, self.VERSION) and \
+                    size <= self._size and len(data) == \
+                    self.INDEX_HEADER.size + count * self.FIELDS.size:
+                top = [ScoreEntry._make(fields) for fields in
+                       self.FIELDS.iter_unpack(data[self.INDEX_HEADER.size:])]
+                covered = (size - self.HEADER.size) // self.RECORD_SIZE
+        except (OSError, struct.error):
+            pass  # Индекса нет или он испорчен: строим заново по журналу
+        if len(top) < min(self.top_size, covered):
+            # Индекс писался для меньшего top_size
+            top, covered = [], 0
+        if covered == len(self):
+            return top[:self.top_size]
+        self._top = heapq.nlargest(
+            self.top_size, itertools.chain(top, self.entries(covered)),
+            key=_by_score)
+        self._write_index()
+        return self._top
+
+    def _write_index(self):
+        data = bytearray(self.INDEX_HEADER.pack(
+            self.INDEX_MAGIC, self.VERSION, self._size, len(self._top)))
+        for entry in self._top:
+            data += self.FIELDS.pack(*entry)
+        temporary = self.index_path.with_name(self.index_path.name + '.tmp')
+        temporary.write_bytes(data)
+        os.replace(temporary, self.index_path)
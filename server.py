@@ -0,0 +1,412 @@
+"""Networked arena matches over asyncio streams.
+
+The server runs the authoritative tick loop of an ``Arena``. Players send
+single direction bytes; after every tick the server sends everybody the
+same delta frame with the heads, dropped tails, deaths and apple changes
+of that tick instead of whole bodies::
+
+    python server.py serve --port 8765 --grid 100x100
+    python server.py loadtest --port 8765 --players 300 --ticks 500
+
+Protocol, all little-endian:
+
+* client -> server: one byte per turn, the index of the direction in
+  ``DIRECTIONS``;
+* server -> client on connect: ``HELLO`` (magic, player index, board
+  width and height) followed by a frame that builds the whole board; when
+  the board has no free cell for a new snake the connection is closed
+  without a ``HELLO``;
+* server -> client every tick: a frame, ``FRAME`` (tick, number of
+  events) followed by ``EVENT`` records (kind, snake, cell number).
+"""
+import argparse
+import asyncio
+import random
+import struct
+import time
+from collections import deque
+
+from arena import Arena
+from the_snake import (DIRECTIONS, GRID_HEIGHT, GRID_WIDTH, SPEED,
+                       BoardFullError, GridConfig, parse_grid_size)
+
+HELLO = struct.Struct('<4sHII')
+FRAME = struct.Struct('<II')
+EVENT = struct.Struct('<BHI')
+MAGIC = b'SNKA'
+
+# Виды событий кадра:
+EVENT_HEAD = 0  # Новая голова, змейка растёт
+EVENT_MOVE = 1  # Новая голова, последняя клетка хвоста освобождена
+EVENT_DEATH = 2  # Змейка убрана с поля целиком
+EVENT_APPLE = 3  # Яблоко появилось
+EVENT_EATEN = 4  # Яблоко исчезло
+EVENT_SPAWN = 5  # Новая змейка из одной клетки
+
+DEFAULT_PORT = 8765
+LISTEN_BACKLOG = 1024  # Сотни игроков подключаются одновременно
+DEFAULT_APPLES = 20
+# Клиент, не успевающий читать, отключается, а не тормозит ход игры:
+MAX_CLIENT_BUFFER = 1 << 20
+
+
+def encode_frame(tick, events):
+    """
+    Encode a frame.
+
+    Args:
+        tick (int): Number of the tick.
+        events (list): ``(kind, snake, cell)`` triples.
+
+    Returns:
+        bytes: The frame.
+    """
+    return FRAME.pack(tick, len(events)) + b''.join(
+        EVENT.pack(*event) for event in events)
+
+
+class BoardMirror:
+    """
+    Client-side copy of the board rebuilt from the frames.
+
+    Attributes:
+        snakes (dict): Body of every living snake, head first.
+        apples (set): Apple cell numbers.
+        tick (int): Number of the last applied tick.
+    """
+
+    def __init__(self):
+        """Start with an empty board."""
+        self.snakes = {}
+        self.apples = set()
+        self.tick = 0
+
+    def apply(self, tick, events):
+        """Apply the events of one frame."""
+        for kind, snake, cell in events:
+            if kind == EVENT_HEAD:
+                self.snakes[snake].appendleft(cell)
+            elif kind == EVENT_MOVE:
+                body = self.snakes[snake]
+                body.pop()
+                body.appendleft(cell)
+            elif kind == EVENT_DEATH:
+                self.snakes.pop(snake, None)
+            elif kind == EVENT_APPLE:
+                self.apples.add(cell)
+            elif kind == EVENT_EATEN:
+                self.apples.discard(cell)
+            elif kind == EVENT_SPAWN:
+                self.snakes[snake] = deque([cell])
+        self.tick = tick
+
+
+class GameServer:
+    """
+    Authoritative arena server.
+
+    Reading the players' turns happens in the connection tasks and only
+    stores the last direction, so the tick loop never waits for a client.
+    Every frame is encoded once and the same bytes are written to every
+    connection without waiting for them to be sent.
+
+    Attributes:
+        arena (Arena): The game.
+        clients (dict): Writer of every connected player by snake index.
+        ticks (int): Number of ticks run.
+        bytes_sent (int): Bytes written to all connections.
+    """
+
+    def __init__(self, grid=None, apples=DEFAULT_APPLES, tick_rate=SPEED,
+                 seed=None):
+        """
+        Create a server with an empty arena.
+
+        Args:
+            grid (GridConfig, optional): The board.
+            apples (int): Number of apples kept on the board.
+            tick_rate (float): Ticks per second, 0 runs as fast as possible.
+            seed (int, optional): Seed of the arena.
+        """
+        self.arena = Arena(0, apples, seed, grid)
+        self.tick_rate = tick_rate
+        self.clients = {}
+        self.ticks = 0
+        self.bytes_sent = 0
+        self._directions = {}
+        self._events = [(EVENT_APPLE, 0, self._cell(apple))
+                        for apple in self.arena.apples]
+        self._tick_ns = 0
+        self._max_tick_ns = 0
+        self._started = None
+
+    async def handle(self, reader, writer):
+        """Serve one player connection until it is closed."""
+        try:
+            index = self.arena.add_snake()
+        except BoardFullError:
+            # Места для новой змейки нет: игрок не принимается
+            writer.close()
+            return
+        self._events.append((EVENT_SPAWN, index,
+                             self._cell(self._head(index))))
+        grid = self.arena.grid
+        writer.write(HELLO.pack(MAGIC, index, grid.width, grid.height)
+                     + self._snapshot())
+        self.clients[index] = writer
+        try:
+            while True:
+                data = await reader.read(64)
+                if not data:
+                    break
+                code = data[-1]  # Из нескольких нажатий за ход важно последнее
+                if code < len(DIRECTIONS):
+                    self._directions[index] = DIRECTIONS[code]
+        except ConnectionError:
+            pass
+        finally:
+            self._disconnect(index)
+
+    async def run(self, ticks=None):
+        """
+        Run the tick loop.
+
+        Args:
+            ticks (int, optional): Stop after this many ticks, run forever
+                by default.
+        """
+        period = 1 / self.tick_rate if self.tick_rate else 0
+        self._started = next_tick = time.perf_counter()
+        while True:
+            self.tick()
+            if ticks is not None and self.ticks >= ticks:
+                break
+            next_tick += period
+            await asyncio.sleep(max(0, next_tick - time.perf_counter()))
+
+    def tick(self):
+        """Advance the arena and broadcast the delta of the tick."""
+        start = time.perf_counter_ns()
+        arena = self.arena
+        events = self._events
+        for index in self.clients:
+            if not arena.alive[index]:
+                try:
+                    arena.respawn(index)
+                except BoardFullError:
+                    continue  # Поле заполнено: попробуем на следующем ходу
+                events.append((EVENT_SPAWN, index,
+                               self._cell(self._head(index))))
+        living = [index for index, alive in enumerate(arena.alive) if alive]
+        actions = [self._directions.get(index)
+                   for index in range(len(arena.snakes))]
+        self._directions.clear()
+        apples = set(arena.apples)
+        _, collisions = arena.step(actions)
+        dead = {collision.snake for collision in collisions}
+        for index in living:
+            snake = arena.snakes[index]
+            if index in dead:
+                events.append((EVENT_DEATH, index, 0))
+                continue
+            kind = EVENT_HEAD if snake.last is None else EVENT_MOVE
+            events.append((kind, index, self._cell(self._head(index))))
+        events.extend((EVENT_EATEN, 0, self._cell(apple))
+                      for apple in apples - arena.apples)
+        events.extend((EVENT_APPLE, 0, self._cell(apple))
+                      for apple in arena.apples - apples)
+        self.ticks += 1
+        self._broadcast(encode_frame(self.ticks, events))
+        self._events = []
+        elapsed = time.perf_counter_ns() - start
+        self._tick_ns += elapsed
+        self._max_tick_ns = max(self._max_tick_ns, elapsed)
+
+    def stats(self):
+        """
+        Get the server statistics.
+
+        Returns:
+            dict: Ticks, ticks per second, bytes sent per tick and tick
+            processing time.
+        """
+        ticks = max(self.ticks, 1)
+        elapsed = (time.perf_counter() - self._started if self._started
+                   else 0)
+        return {
+            'players': len(self.clients),
+            'ticks': self.ticks,
+            'ticks_per_second': self.ticks / max(elapsed, 1e-9),
+            'bytes_per_tick': self.bytes_sent / ticks,
+            'tick_mean_ms': self._tick_ns / ticks / 1e6,
+            'tick_max_ms': self._max_tick_ns / 1e6,
+        }
+
+    def _broadcast(self, frame):
+        for index, writer in list(self.clients.items()):
+            if writer.transport.get_write_buffer_size() > MAX_CLIENT_BUFFER:
+                writer.close()
+                self._disconnect(index)
+                continue
+            writer.write(frame)
+            self.bytes_sent += len(frame)
+
+    def _disconnect(self, index):
+        if self.clients.pop(index, None) is None:
+            return
+        self._directions.pop(index, None)
+        if self.arena.alive[index]:
+            self._events.append((EVENT_DEATH, index, 0))
+        # Индекс достанется следующему игроку
+        self.arena.remove_snake(index)
+
+    def _snapshot(self):
+        """Encode a frame that builds the current board from scratch."""
+        events = [(EVENT_APPLE, 0, self._cell(apple))
+                  for apple in self.arena.apples]
+        for index, snake in enumerate(self.arena.snakes):
+            if not self.arena.alive[index]:
+                continue
+            body = list(reversed(snake.positions))
+            events.append((EVENT_SPAWN, index, self._cell(body[0])))
+            events.extend((EVENT_HEAD, index, self._cell(cell))
+                          for cell in body[1:])
+        return encode_frame(self.ticks, events)
+
+    def _head(self, index):
+        return self.arena.snakes[index].get_head_position()
+
+    def _cell(self, position):
+        return position[1] * self.arena.grid.width + position[0]
+
+
+async def read_frame(reader):
+    """
+    Read one frame.
+
+    Returns:
+        tuple: ``(tick, events, size in bytes)``.
+    """
+    tick, count = FRAME.unpack(await reader.readexactly(FRAME.size))
+    data = await reader.readexactly(count * EVENT.size)
+    events = list(EVENT.iter_unpack(data))
+    return tick, events, FRAME.size + len(data)
+
+
+async def play_client(host, port, ticks, turn_chance=0.2, seed=None):
+    """
+    Reference client: mirror the board and make random turns.
+
+    Args:
+        host (str): Server address.
+        port (int): Server port.
+        ticks (int): Number of frames to receive after the snapshot.
+        turn_chance (float): Chance to send a turn on every frame.
+        seed (int, optional): Seed of the random turns.
+
+    Returns:
+        tuple: ``(player index, BoardMirror, bytes received)``.
+
+    Raises:
+        ConnectionRefusedError: If the server did not accept the player.
+    """
+    rng = random.Random(seed)
+    reader, writer = await asyncio.open_connection(host, port)
+    try:
+        hello = await reader.readexactly(HELLO.size)
+    except asyncio.IncompleteReadError:
+        writer.close()
+        raise ConnectionRefusedError('Сервер не принял игрока: нет места')
+    _, index, _, _ = HELLO.unpack(hello)
+    mirror = BoardMirror()
+    received = HELLO.size
+    try:
+        for _ in range(ticks + 1):
+            tick, events, size = await read_frame(reader)
+            mirror.apply(tick, events)
+            received += size
+            if rng.random() < turn_chance:
+                writer.write(bytes([rng.randrange(len(DIRECTIONS))]))
+    finally:
+        writer.close()
+    return index, mirror, received
+
+
+async def load_test(host, port, players, ticks, turn_chance=0.2):
+    """
+    Connect many simulated players and measure what they receive.
+
+    Returns:
+        dict: Players, players refused for lack of room, ticks, elapsed
+        time, ticks per second seen by the clients and bytes received per
+        player per tick.
+    """
+    start = time.perf_counter()
+    outcomes = await asyncio.gather(*(
+        play_client(host, port, ticks, turn_chance, seed)
+        for seed in range(players)), return_exceptions=True)
+    elapsed = time.perf_counter() - start
+    results = []
+    for outcome in outcomes:
+        if isinstance(outcome, ConnectionRefusedError):
+            continue
+        if isinstance(outcome, BaseException):
+            raise outcome
+        results.append(outcome)
+    received = sum(result[2] for result in results)
+    return {
+        'players': len(results),
+        'refused': players - len(results),
+        'ticks': ticks,
+        'elapsed': elapsed,
+        'ticks_per_second': ticks / elapsed,
+        'bytes_per_player_tick': (received / len(results) / max(ticks, 1)
+                                  if results else 0.0),
+    }
+
+
+async def serve(host, port, server, ticks=None):
+    """Accept connections and run the tick loop."""
+    listener = await asyncio.start_server(server.handle, host, port,
+                                          backlog=LISTEN_BACKLOG)
+    async with listener:
+        await server.run(ticks)
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--host', default='127.0.0.1')
+    parser.add_argument('--port', type=int, default=DEFAULT_PORT)
+    commands = parser.add_subparsers(dest='command', required=True)
+    serve_parser = commands.add_parser('serve', help='run a server')
+    serve_parser.add_argument('--grid', type=parse_grid_size, metavar='WxH',
+                              default=(GRID_WIDTH, GRID_HEIGHT))
+    serve_parser.add_argument('--apples', type=int, default=DEFAULT_APPLES)
+    serve_parser.add_argument('--tick-rate', type=float, default=SPEED,
+                              help='ticks per second, 0 = unlimited')
+    load_parser = commands.add_parser('loadtest',
+                                      help='simulate many players')
+    load_parser.add_argument('--players', type=int, default=100)
+    load_parser.add_argument('--ticks', type=int, default=200)
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run the server or the load test from the command line."""
+    args = parse_args(argv)
+    if args.command == 'loadtest':
+        print(asyncio.run(load_test(args.host, args.port, args.players,
+                                    args.ticks)))
+        return
+    server = GameServer(GridConfig(*args.grid), args.apples, args.tick_rate)
+    try:
+        asyncio.run(serve(args.host, args.port, server))
+    except KeyboardInterrupt:
+        pass
+    finally:
+        print(server.stats())
+
+
+if __name__ == '__main__':
+    main()
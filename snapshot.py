@@ -0,0 +1,187 @@
+"""Packed snapshots of a game for saving, restoring and lookahead.
+
+``SnakeGame.snapshot()``, ``restore()`` and ``clone()`` go through
+``GameSnapshot``; a snapshot saved to a file is read back through ``mmap``::
+
+    snapshot = game.snapshot()
+    snapshot.save('game.snap')
+    game = GameSnapshot.load('game.snap').restore()
+"""
+from array import array
+from collections import deque
+from pathlib import Path
+import math
+import mmap
+import random
+import struct
+
+from the_snake import (CAUSE_COLLISION, CAUSE_WIN, DEFAULT_GRID,
+                       DIRECTION_CODES, DIRECTIONS, Apple, FreeCells,
+                       GameInfo, GridConfig, Snake, SnakeGame)
+
+
+class GameSnapshot:
+    """
+    Packed state of a SnakeGame for saving, restoring and lookahead.
+
+    The whole state is one little-endian buffer: a header with the board
+    size, seed, ticks, score, length, directions, apple, counts, the cell
+    the tail left on the last move and whether it was a collision, the
+    state words of the random generator, the body as cell numbers from
+    the head (``array('H')`` on boards of up to 65536 cells, ``'I'``
+    above) and the overwritten slots of the free-cell index. Copying a
+    snapshot is a copy of bytes, and a file written by ``save`` can be
+    read back by ``load`` through ``mmap`` without parsing it.
+
+    A restored game is not recorded: its replay would have to start from
+    the seed, not from the middle of the game.
+
+    Attributes:
+        data (bytes): The packed state, or a read-only memory map of it.
+        header (tuple): Unpacked header fields.
+    """
+
+    MAGIC = b'SNKS'
+    VERSION = 2
+    HEADER = struct.Struct('<4sBIIQIIIBBBIIcIIdI?')
+    RNG_WORDS = 625
+    NO_DIRECTION = 0xFF
+    NO_CELL = 0xFFFFFFFF
+    CAUSES = (None, CAUSE_COLLISION, CAUSE_WIN)
+
+    def __init__(self, data):
+        """
+        Wrap a packed state.
+
+        Raises:
+            ValueError: If the data is not a snapshot.
+        """
+        self.data = data
+        self.header = self.HEADER.unpack_from(data)
+        if self.header[:2] != (self.MAGIC, self.VERSION):
+            raise ValueError('Неизвестный формат снимка игры')
+
+    @classmethod
+    def capture(cls, game):
+        """
+        Pack the state of a game.
+
+        Args:
+            game (SnakeGame): The game.
+
+        Returns:
+            GameSnapshot: The snapshot.
+        """
+        grid = game.grid
+        width = grid.width
+        typecode = 'H' if grid.cells <= 0x10000 else 'I'
+        snake = game.snake
+        body = array(typecode, [y * width + x for x, y in snake.positions])
+        count, overrides = game.free_cells.overrides()
+        slots = array('I', overrides.keys())
+        cells = array(typecode,
+                      [y * width + x for x, y in overrides.values()])
+        _, words, gauss = game.rng.getstate()
+        next_direction = (DIRECTION_CODES[snake.next_direction]
+                          if snake.next_direction else cls.NO_DIRECTION)
+        apple_x, apple_y = game.apple.position
+        last = (cls.NO_CELL if snake.last is None
+                else snake.last[1] * width + snake.last[0])
+        header = cls.HEADER.pack(
+            cls.MAGIC, cls.VERSION, width, grid.height, game.seed,
+            game.ticks, game.info.score, snake.length,
+            DIRECTION_CODES[snake.direction], next_direction,
+            cls.CAUSES.index(game.cause), apple_y * width + apple_x,
+            len(body), typecode.encode(), count, len(slots),
+            math.nan if gauss is None else gauss, last, snake.collided)
+        return cls(b''.join((header, array('I', words).tobytes(),
+                             body.tobytes(), slots.tobytes(),
+                             cells.tobytes())))
+
+    def arrays(self):
+        """
+        Get views of the packed arrays without copying them.
+
+        Returns:
+            tuple: ``(rng words, body, override slots, override cells)``
+            memoryviews.
+        """
+        typecode = self.header[13].decode()
+        body_count, override_count = self.header[12], self.header[15]
+        view = memoryview(self.data)
+        offset = self.HEADER.size
+        result = []
+        for code, count in (('I', self.RNG_WORDS), (typecode, body_count),
+                            ('I', override_count),
+                            (typecode, override_count)):
+            size = array(code).itemsize * count
+            result.append(view[offset:offset + size].cast(code))
+            offset += size
+        return tuple(result)
+
+    def restore(self, game=None):
+        """
+        Unpack the snapshot into a game.
+
+        Args:
+            game (SnakeGame, optional): Game to overwrite, a new one by
+                default.
+
+        Returns:
+            SnakeGame: The game in the saved state.
+        """
+        (_, _, width, height, seed, ticks, score, length, direction,
+         next_direction, cause, apple, _, _, count, _, gauss, last,
+         collided) = self.header
+        words, body, slots, cells = self.arrays()
+        grid = DEFAULT_GRID
+        if (width, height) != (grid.width, grid.height):
+            grid = GridConfig(width, height)
+        if game is None:
+            game = SnakeGame.__new__(SnakeGame)
+            game.profiler = None
+            game.telemetry = None
+            game.info = GameInfo()
+        game.grid = grid
+        game.seed = seed
+        game.rng = random.Random()
+        game.rng.setstate((random.Random.VERSION, tuple(words),
+                           None if math.isnan(gauss) else gauss))
+
+        snake = game.snake = Snake(grid=grid)
+        snake.positions = deque((cell % width, cell // width)
+                                for cell in body)
+        snake.occupied = set(snake.positions)
+        snake.length = length
+        snake.direction = DIRECTIONS[direction]
+        if next_direction != self.NO_DIRECTION:
+            snake.next_direction = DIRECTIONS[next_direction]
+        if last != self.NO_CELL:
+            snake.last = last % width, last // width
+        snake.collided = collided
+        game.apple = Apple(position=(apple % width, apple // width),
+                           grid=grid)
+        game.free_cells = FreeCells.from_overrides(
+            count, zip(slots, ((cell % width, cell // width)
+                               for cell in cells)), grid)
+        game.info.score = score
+        game.ticks = ticks
+        game.cause = self.CAUSES[cause]
+        game.record = False
+        game.recorder = None
+        return game
+
+    def copy(self):
+        """Get an independent in-memory copy of the snapshot."""
+        return GameSnapshot(bytes(self.data))
+
+    def save(self, path):
+        """Write the snapshot to a file."""
+        Path(path).write_bytes(self.data)
+
+    @classmethod
+    def load(cls, path):
+        """Map a snapshot file into memory, read-only."""
+        with open(path, 'rb') as file:
+            data = mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ)
+        return cls(data)
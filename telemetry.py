@@ -0,0 +1,153 @@
+"""Background writer of game events to a JSON Lines file.
+
+``SnakeGame`` emits ``game_start``, ``tick``, ``apple`` and ``game_over``
+events to a writer passed as ``telemetry``; the game window streams them
+with ``python the_snake.py --telemetry events.jsonl``.
+"""
+import json
+import queue
+import threading
+import time
+
+# Размер очереди событий, размер пачки записи и наибольшая задержка
+# записи на диск в секундах:
+QUEUE_SIZE = 10_000
+BATCH_SIZE = 256
+FLUSH_INTERVAL = 0.5
+
+
+class TelemetryWriter:
+    """
+    Writes game events to a JSON Lines file from a background thread.
+
+    ``emit`` only puts the event into a bounded queue, so the game loop
+    never waits for the disk. The writer thread encodes the events and
+    writes them in batches, flushing the file at least every
+    ``flush_interval`` seconds. When the queue is full, events are dropped
+    and counted, or with ``block=True`` the caller waits for room.
+
+    If writing fails, e.g. on a full disk, the thread keeps taking events
+    off the queue so that neither ``emit`` nor ``close`` ever hangs; the
+    events are counted as failed and ``close`` raises the error.
+
+    Every line is an object with the ``event`` name, the ``time`` it was
+    emitted and its fields.
+    """
+
+    def __init__(self, path, maxsize=QUEUE_SIZE,
+                 batch_size=BATCH_SIZE,
+                 flush_interval=FLUSH_INTERVAL, block=False):
+        """
+        Open the file and start the writer thread.
+
+        Args:
+            path (str): File to append the events to.
+            maxsize (int): Capacity of the event queue.
+            batch_size (int): Events written with one call at most.
+            flush_interval (float): Longest time between flushes.
+            block (bool): Wait for room instead of dropping events.
+        """
+        self.file = open(path, 'a', encoding='utf-8')
+        self.batch_size = batch_size
+        self.flush_interval = flush_interval
+        self.block = block
+        self.emitted = 0
+        self.written = 0
+        self.dropped = 0
+        self.failed = 0
+        self.batches = 0
+        self._error = None
+        self._queue = queue.Queue(maxsize)
+        self._thread = threading.Thread(target=self._run, daemon=True,
+                                        name='telemetry')
+        self._thread.start()
+
+    def emit(self, event, **fields):
+        """
+        Queue an event.
+
+        Returns:
+            bool: False if the event was dropped or the writer failed.
+        """
+        self.emitted += 1
+        if self._error is not None:
+            self.failed += 1
+            return False
+        try:
+            self._queue.put((event, time.time(), fields), block=self.block)
+        except queue.Full:
+            self.dropped += 1
+            return False
+        return True
+
+    def close(self):
+        """
+        Write the queued events, stop the thread and close the file.
+
+        Raises:
+            OSError: If writing the events failed.
+        """
+        if self._thread.is_alive():
+            self._queue.put(None)
+            self._thread.join()
+        try:
+            self.file.close()
+        except OSError as error:
+            self._error = self._error or error
+        if self._error is not None:
+            raise self._error
+
+    def stats(self):
+        """
+        Get the writer statistics.
+
+        Returns:
+            dict: Emitted, written, dropped and failed events and write
+            batches.
+        """
+        return {'emitted': self.emitted, 'written': self.written,
+                'dropped': self.dropped, 'failed': self.failed,
+                'batches': self.batches}
+
+    def _run(self):
+        last_flush = time.monotonic()
+        running = True
+        while running:
+            batch = self._take_batch()
+            if None in batch:
+                running = False
+                batch.remove(None)
+            if self._error is not None:
+                # Запись сломалась: очередь разбирается, чтобы никто не ждал
+                self.failed += len(batch)
+                continue
+            try:
+                if batch:
+                    self._write(batch)
+                    batch = []  # Записано: при ошибке сброса не теряется
+                if (not running or time.monotonic() - last_flush
+                        >= self.flush_interval):
+                    self.file.flush()
+                    last_flush = time.monotonic()
+            except Exception as error:
+                self._error = error
+                self.failed += len(batch)
+
+    def _take_batch(self):
+        try:
+            batch = [self._queue.get(timeout=self.flush_interval)]
+        except queue.Empty:
+            return []
+        while len(batch) < self.batch_size:
+            try:
+                batch.append(self._queue.get_nowait())
+            except queue.Empty:
+                break
+        return batch
+
+    def _write(self, batch):
+        self.file.write(''.join(
+            json.dumps({'event': event, 'time': moment, **fields}) + '\n'
+            for event, moment, fields in batch))
+        self.written += len(batch)
+        self.batches += 1
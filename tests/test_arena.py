@@ -0,0 +1,90 @@
+import pytest
+
+
+@pytest.fixture
+def arena_module(_the_snake):
+    import arena
+
+    return arena
+
+
+def _arena(arena_module, bodies):
+    """Build an arena with the given bodies, head first, and no apples."""
+    from the_snake import FreeCells, GridConfig
+
+    grid = GridConfig(10, 10)
+    arena = arena_module.Arena(len(bodies), apples=0, seed=0, grid=grid)
+    arena.owners = {}
+    for index, (cells, direction) in enumerate(bodies):
+        snake = arena.snakes[index]
+        snake.positions.clear()
+        snake.positions.extend(cells)
+        snake.occupied = set(cells)
+        snake.length = len(cells)
+        snake.direction = direction
+        arena.owners.update(dict.fromkeys(cells, index))
+    arena.free_cells = FreeCells.for_board(arena.owners, grid)
+    return arena
+
+
+def test_head_to_head_kills_both(arena_module, _the_snake):
+    arena = _arena(arena_module, [([(2, 5)], _the_snake.RIGHT),
+                                  ([(4, 5)], _the_snake.LEFT)])
+    _, collisions = arena.step()
+    assert sorted(collisions) == [
+        arena_module.Collision(0, arena_module.CAUSE_HEAD, 1),
+        arena_module.Collision(1, arena_module.CAUSE_HEAD, 0)]
+    assert arena.alive == [False, False]
+    assert not arena.owners
+    assert len(arena.free_cells) == 100
+
+
+def test_head_into_body_kills_attacker(arena_module, _the_snake):
+    arena = _arena(arena_module, [
+        ([(2, 5)], _the_snake.RIGHT),
+        ([(3, 4), (3, 5), (3, 6)], _the_snake.UP)])
+    _, collisions = arena.step()
+    assert collisions == [
+        arena_module.Collision(0, arena_module.CAUSE_BODY, 1)]
+    assert arena.alive == [False, True]
+    assert set(arena.owners) == {(3, 3), (3, 4), (3, 5)}
+
+
+def test_entering_vacated_tail_is_safe(arena_module, _the_snake):
+    arena = _arena(arena_module, [
+        ([(2, 6)], _the_snake.RIGHT),
+        ([(3, 4), (3, 5), (3, 6)], _the_snake.UP)])
+    _, collisions = arena.step()
+    assert collisions == []
+    assert arena.owners[(3, 6)] == 0
+
+
+def test_self_collision(arena_module, _the_snake):
+    body = [(2, 2), (3, 2), (3, 3), (2, 3), (1, 3)]
+    arena = _arena(arena_module, [(body, _the_snake.DOWN)])
+    _, collisions = arena.step()
+    assert collisions == [
+        arena_module.Collision(0, arena_module.CAUSE_SELF, 0)]
+
+
+def test_shared_occupancy_stays_consistent(arena_module, _the_snake):
+    grid = _the_snake.GridConfig(40, 40)
+    arena = arena_module.Arena(30, apples=8, seed=3, grid=grid)
+    eaten = 0
+    for _ in range(300):
+        for index, alive in enumerate(arena.alive):
+            if alive:
+                arena_module.greedy_policy(arena, index)
+        rewards, _ = arena.step()
+        eaten += sum(rewards)
+        bodies = {}
+        for index, snake in enumerate(arena.snakes):
+            if arena.alive[index]:
+                bodies.update(dict.fromkeys(snake.positions, index))
+        assert arena.owners == bodies
+        assert not arena.apples & arena.owners.keys()
+        assert len(arena.apples) == 8
+        assert len(arena.free_cells) == (
+            grid.cells - len(arena.owners) - len(arena.apples))
+    assert eaten > 0
+    assert eaten == sum(arena.scores)
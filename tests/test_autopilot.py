@@ -0,0 +1,58 @@
+import pytest
+
+
+@pytest.mark.parametrize('width, height', [(6, 4), (5, 4), (4, 5), (2, 2)])
+def test_hamiltonian_cycle_visits_every_cell(width, height):
+    from autopilot import hamiltonian_next
+
+    cell, seen = (0, 0), set()
+    for _ in range(width * height):
+        seen.add(cell)
+        following = hamiltonian_next(cell, width, height)
+        assert abs(following[0] - cell[0]) + abs(following[1] - cell[1]) == 1
+        cell = following
+    assert cell == (0, 0)
+    assert len(seen) == width * height
+
+
+def test_no_hamiltonian_cycle_on_odd_board():
+    from autopilot import hamiltonian_next
+
+    assert hamiltonian_next((1, 1), 5, 5) is None
+
+
+def test_autopilot_plays_and_tracks_body(_the_snake):
+    from autopilot import Autopilot
+
+    autopilot = Autopilot()
+    game = _the_snake.SnakeGame(0)
+    for _ in range(2000):
+        autopilot(game.snake, game.apple)
+        assert autopilot._entered.keys() == game.snake.occupied
+        direction = game.snake.next_direction
+        assert direction is None or direction != _the_snake.opposite(
+            game.snake.direction)
+        _, _, done = game.step()
+        if done:
+            break
+    assert game.info.score >= 200
+    assert autopilot.searches < game.ticks
+
+
+def test_autopilot_is_fast_on_large_board(_the_snake):
+    from autopilot import Autopilot
+
+    autopilot = Autopilot()
+    game = _the_snake.SnakeGame(1, grid=_the_snake.GridConfig(1000, 1000))
+    for _ in range(3000):
+        autopilot(game.snake, game.apple)
+        game.step()
+    assert game.info.score > 0
+    assert autopilot.stats()['decision_mean_ms'] < 1
+
+
+def test_autopilot_as_tournament_policy(_the_snake):
+    import tournament
+
+    result = tournament.run_episode('autopilot:autopilot_policy', 3, 1000)
+    assert result.score > 0
@@ -0,0 +1,50 @@
+import random
+
+import pytest
+
+np = pytest.importorskip('numpy')
+
+
+def test_batch_matches_scalar_games(_the_snake):
+    import batch_env
+
+    seeds = list(range(16))
+    batch = batch_env.BatchSnakeGame(len(seeds), seeds)
+    games = [_the_snake.SnakeGame(seed) for seed in seeds]
+    # Длинные змейки, чтобы игры заканчивались столкновением
+    batch.lengths[:] = 8
+    for game in games:
+        game.snake.length = 8
+    actions_rng = random.Random(42)
+    deaths = 0
+    for _ in range(600):
+        actions = [actions_rng.randrange(-1, 4) for _ in seeds]
+        rewards, dones = batch.step(actions)
+        for i, game in enumerate(games):
+            action = None if actions[i] < 0 else _the_snake.DIRECTIONS[
+                actions[i]]
+            _, reward, done = game.step(action)
+            assert reward == rewards[i]
+            assert done == dones[i]
+            if done:
+                deaths += 1
+                assert game.info.score == batch.final_scores[i]
+                game.reset()
+            assert batch.positions(i) == list(game.snake.positions)
+            assert batch.position(batch.apples[i]) == game.apple.position
+            assert batch.scores[i] == game.info.score
+    assert deaths > 0
+
+
+def test_collision_resets_game():
+    import batch_env
+
+    batch = batch_env.BatchSnakeGame(1, [0])
+    batch.lengths[:] = 5
+    for code in (3, 1, 2):
+        batch.step([code])
+    _, dones = batch.step([0])
+    assert dones[0]
+    assert batch.causes[0] == batch_env.CAUSE_COLLISION
+    assert batch.body_size[0] == 1 and batch.occupied[0].sum() == 1
+    assert batch.free_count[0] == batch.size - 1
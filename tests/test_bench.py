@@ -0,0 +1,18 @@
+def test_compare_flags_regressions():
+    import bench
+
+    baseline = {'results': {'22x24': {'snake_move': 100.0, 'draw': 10.0}}}
+    current = {'results': {'22x24': {'snake_move': 130.0, 'draw': 11.0,
+                                     'new': 5.0}}}
+    assert bench.compare(current, baseline, 0.25) == [
+        ('22x24', 'snake_move', 100.0, 130.0)]
+
+
+def test_benchmarks_run_on_small_grid(_the_snake):
+    import bench
+
+    grid = _the_snake.GridConfig(8, 6)
+    timings = bench.bench_snake(grid)
+    timings.update(bench.bench_apple(grid))
+    assert all(value > 0 for value in timings.values())
+    assert 'apple_place_fill_0.99' in timings
@@ -0,0 +1,83 @@
+import pytest
+
+
+def _replay(_the_snake, seed=3, ticks=120):
+    import tournament
+
+    game = _the_snake.SnakeGame(seed, record=True)
+    for _ in range(ticks):
+        tournament.greedy_policy(game.snake, game.apple)
+        _, _, done = game.step()
+        if done:
+            break
+    return game.replay()
+
+
+def test_raw_frames_match_the_screen(_the_snake, tmp_path):
+    import capture
+    import numpy as np
+    import pygame as pg
+
+    replay = _replay(_the_snake)
+    path = tmp_path / 'game.rgb'
+    result = capture.capture_replay(replay, path, capacity=4)
+    width, height = _the_snake.screen.get_size()
+
+    assert result.frames == result.written == replay.ticks + 1
+    assert result.buffer.shape == (4, height, width, 3)
+    frames = np.fromfile(path, np.uint8).reshape(-1, height, width, 3)
+    assert len(frames) == result.frames
+    # Последний кадр — то, что осталось на экране
+    screen = pg.surfarray.array3d(_the_snake.screen).transpose(1, 0, 2)
+    assert (frames[-1] == screen).all()
+    assert (frames[0] != frames[-1]).any()
+
+
+def test_png_frames(_the_snake, tmp_path):
+    import capture
+    import numpy as np
+    import pygame as pg
+
+    replay = _replay(_the_snake, ticks=20)
+    raw = capture.capture_replay(replay, tmp_path / 'game.rgb', every=5)
+    png = capture.capture_replay(replay, tmp_path / 'frames', 'png', every=5)
+    assert png.frames == raw.frames == 5
+    files = sorted((tmp_path / 'frames').iterdir())
+    assert [file.name for file in files] == [
+        f'frame-{number:06d}.png' for number in range(5)]
+    width, height = _the_snake.screen.get_size()
+    frames = np.fromfile(tmp_path / 'game.rgb', np.uint8).reshape(
+        -1, height, width, 3)
+    image = pg.surfarray.array3d(pg.image.load(str(files[2])))
+    assert (image.transpose(1, 0, 2) == frames[2]).all()
+
+
+def test_small_buffer_waits_for_the_writer(_the_snake, tmp_path):
+    import capture
+
+    result = capture.capture_replay(_replay(_the_snake), tmp_path / 'a.rgb',
+                                    capacity=1)
+    assert result.written == result.frames
+    assert result.buffer.shape[0] == 1
+
+
+def test_unknown_format(_the_snake, tmp_path):
+    import capture
+
+    with pytest.raises(ValueError):
+        capture.FrameCapture(tmp_path / 'frames', 'gif')
+
+
+def test_failed_png_write_is_raised(_the_snake, tmp_path, monkeypatch):
+    import capture
+    import pygame as pg
+
+    def save(image, path):
+        raise pg.error('disk full')
+
+    monkeypatch.setattr(pg.image, 'save', save)
+    replay = _replay(_the_snake, ticks=20)
+    # Буфер меньше числа кадров: без освобождения слотов capture завис бы
+    with pytest.raises(pg.error):
+        capture.capture_replay(replay, tmp_path / 'frames', 'png',
+                               capacity=2)
@@ -0,0 +1,147 @@
+import threading
+from concurrent.futures import ProcessPoolExecutor, wait
+
+
+def _play(game, controller, ticks, submit=True):
+    if submit:
+        controller.submit(game.snake, game.apple)
+    for _ in range(ticks):
+        if submit:
+            # Между ходами проходит кадр: решение успевает посчитаться
+            wait([controller._future])
+        controller(game.snake, game.apple)
+        _, _, done = game.step()
+        if done:
+            break
+        if submit:
+            controller.submit(game.snake, game.apple)
+
+
+def test_background_decisions_match_inline_policy(_the_snake):
+    import tournament
+
+    inline = _the_snake.SnakeGame(5)
+    _play(inline, tournament.greedy_policy, 300, submit=False)
+    game = _the_snake.SnakeGame(5)
+    controller = _the_snake.BackgroundController(tournament.greedy_policy,
+                                                 deadline=5)
+    _play(game, controller, 300)
+    controller.close()
+
+    assert list(game.snake.positions) == list(inline.snake.positions)
+    assert game.info.score == inline.info.score > 0
+    stats = controller.stats()
+    assert stats['decisions'] == game.ticks and stats['missed_deadlines'] == 0
+    assert 0 < stats['decision_p50_ms'] <= stats['decision_max_ms']
+
+
+def test_late_decision_keeps_direction(_the_snake):
+    release = threading.Event()
+    now = [0.0]
+
+    def slow_policy(snake, apple):
+        release.wait()
+        snake.next_direction = _the_snake.UP
+
+    game = _the_snake.SnakeGame(1)
+    game.snake.direction = _the_snake.RIGHT
+    controller = _the_snake.BackgroundController(
+        slow_policy, deadline=0.01, time_func=lambda: now[0])
+    # Граница хода не ждёт занятого исполнителя
+    controller(game.snake, game.apple)
+    assert controller.missed == 1 and controller.decisions == 0
+    assert game.snake.next_direction is None
+
+    # Готово до следующего хода, но позже срока: тоже промах
+    now[0] = 0.5
+    release.set()
+    wait([controller._future])
+    controller(game.snake, game.apple)
+    assert controller.missed == 2 and controller.decisions == 0
+    assert game.snake.next_direction is None
+    controller.close()
+    # Опоздавшее решение тоже попадает в распределение задержек
+    assert list(controller.latencies) == [0.5]
+
+
+def test_policy_error_keeps_direction(_the_snake):
+    def broken_policy(snake, apple):
+        raise ValueError('broken')
+
+    game = _the_snake.SnakeGame(1)
+    game.snake.direction = _the_snake.RIGHT
+    controller = _the_snake.BackgroundController(broken_policy, deadline=5)
+    for _ in range(3):
+        controller.submit(game.snake, game.apple)
+        wait([controller._future])
+        controller(game.snake, game.apple)
+        game.step()
+    controller.close()
+    assert controller.errors == 3 and controller.decisions == 0
+    assert controller.stats()['errors'] == 3
+    assert game.snake.direction == _the_snake.RIGHT
+
+
+def test_new_game_drops_pending_decision(_the_snake):
+    seen = []
+
+    def policy(snake, apple):
+        seen.append(snake.get_head_position())
+
+    game = _the_snake.SnakeGame(2)
+    controller = _the_snake.BackgroundController(policy, deadline=5)
+    controller.submit(game.snake, game.apple)
+    game.new_game(3)
+    game.snake.positions[0] = (1, 1)
+    controller(game.snake, game.apple)
+    wait([controller._future])
+    controller.close()
+    assert seen[-1] == (1, 1)
+
+
+def test_process_worker(_the_snake):
+    import tournament
+
+    with ProcessPoolExecutor(1) as executor:
+        controller = _the_snake.BackgroundController(
+            tournament.greedy_policy, deadline=30, executor=executor)
+        game = _the_snake.SnakeGame(4)
+        _play(game, controller, 20)
+        controller.close()
+    assert controller.decisions == 20
+
+
+def test_session_submits_after_every_step(_the_snake):
+    import tournament
+
+    _the_snake.init_display()
+    controller = _the_snake.BackgroundController(tournament.greedy_policy,
+                                                 deadline=5)
+    session = _the_snake.GameSession(controller=controller)
+    session.scheduler.ticks_due = lambda: 1
+    for _ in range(3):
+        wait([controller._future])
+        session.run_ticks()
+    # Решение для следующего хода уже готовится в фоне
+    assert controller._snake is session.game.snake
+    assert controller._future is not None
+    controller.close()
+    assert session.game.ticks == 3
+    assert controller.decisions == 3
+
+
+def test_catch_up_ticks_do_not_wait(_the_snake):
+    release = threading.Event()
+
+    def slow_policy(snake, apple):
+        release.wait()
+
+    _the_snake.init_display()
+    controller = _the_snake.BackgroundController(slow_policy, deadline=5)
+    session = _the_snake.GameSession(controller=controller)
+    session.scheduler.ticks_due = lambda: 4
+    session.run_ticks()
+    release.set()
+    controller.close()
+    assert session.game.ticks == 4
+    assert controller.missed == 4 and controller.decisions == 0
@@ -0,0 +1,81 @@
+def test_step_returns_state_reward_done(_the_snake):
+    game = _the_snake.SnakeGame()
+    state, reward, done = game.step()
+    assert state.head == game.snake.get_head_position()
+    assert (reward, done) == (0, False)
+    assert game.ticks == 1
+
+
+def test_eating_apple_gives_reward(_the_snake):
+    game = _the_snake.SnakeGame()
+    head_x, head_y = game.snake.get_head_position()
+    game.apple.position = ((head_x + 1) % _the_snake.GRID_WIDTH, head_y)
+    state, reward, done = game.step(_the_snake.RIGHT)
+    assert reward == _the_snake.APPLE_REWARD
+    assert state.length == 2
+    assert state.score == _the_snake.APPLE_REWARD
+    assert not done
+
+
+def test_reversal_is_ignored(_the_snake):
+    game = _the_snake.SnakeGame()
+    game.step(_the_snake.LEFT)
+    assert game.snake.direction == _the_snake.RIGHT
+
+
+def test_self_collision_ends_game(_the_snake):
+    game = _the_snake.SnakeGame()
+    game.apple.position = (0, 0)
+    game.snake.length = 5
+    done = False
+    for action in (_the_snake.RIGHT, _the_snake.RIGHT, _the_snake.DOWN,
+                   _the_snake.LEFT, _the_snake.UP):
+        _, _, done = game.step(action)
+    assert done
+    assert game.cause == _the_snake.CAUSE_COLLISION
+    game.reset()
+    assert game.cause is None
+    assert game.info.score == 0
+
+
+def test_free_cells_swap_remove(_the_snake):
+    free = _the_snake.FreeCells([(0, 0), (1, 0), (2, 0)])
+    free.remove((0, 0))
+    assert len(free) == 2 and (0, 0) not in free
+    assert sorted(free) == [(1, 0), (2, 0)]
+    free.add((0, 0))
+    free.add((0, 0))
+    assert len(free) == 3
+    assert free.sample() in free
+
+
+def test_free_cells_match_board(_the_snake):
+    game = _the_snake.SnakeGame()
+    game.snake.length = 6
+    for _ in range(40):
+        _, _, done = game.step()
+        if done:
+            game.reset()
+    board = {(x, y) for x in range(_the_snake.GRID_WIDTH)
+             for y in range(_the_snake.GRID_HEIGHT)}
+    assert set(game.free_cells) == board - game.snake.occupied
+    assert game.apple.position in game.free_cells
+
+
+def test_full_board_is_a_win(_the_snake):
+    game = _the_snake.SnakeGame()
+    head_x, head_y = game.snake.get_head_position()
+    next_cell = ((head_x + 1) % _the_snake.GRID_WIDTH, head_y)
+    game.snake.length = 2  # Хвост остаётся на месте
+    game.free_cells = _the_snake.FreeCells([next_cell])
+    game.apple.position = next_cell
+    _, reward, done = game.step(_the_snake.RIGHT)
+    assert done and reward == _the_snake.APPLE_REWARD
+    assert game.cause == _the_snake.CAUSE_WIN
+
+
+def test_apple_on_full_board_raises(_the_snake):
+    import pytest
+
+    with pytest.raises(_the_snake.BoardFullError):
+        _the_snake.Apple(free_cells=_the_snake.FreeCells())
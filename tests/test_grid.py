@@ -0,0 +1,118 @@
+import pygame as pg
+
+
+def test_grid_view_is_limited_by_window(_the_snake):
+    grid = _the_snake.GridConfig(1000, 1000, 10)
+    assert grid.cells == 1_000_000
+    assert grid.center == (500, 500)
+    assert grid.view_width == _the_snake.GAME_WIDTH // 10
+    assert grid.view_height == _the_snake.SCREEN_HEIGHT // 10
+    default = _the_snake.DEFAULT_GRID
+    assert (default.view_width, default.view_height) == (
+        _the_snake.GRID_WIDTH, _the_snake.GRID_HEIGHT)
+
+
+def test_large_board_game_wraps_and_stays_sparse(_the_snake):
+    grid = _the_snake.GridConfig(1000, 1000)
+    game = _the_snake.SnakeGame(1, grid=grid)
+    assert game.snake.get_head_position() == (500, 500)
+    assert len(game.free_cells) == grid.cells - 1
+    for _ in range(1200):
+        game.step(_the_snake.RIGHT)
+    assert game.snake.get_head_position() == (700, 500)
+    assert game.apple.position in game.free_cells
+    # Хранятся только затронутые игрой ячейки, а не всё поле
+    assert len(game.free_cells._slots) <= game.ticks + 1
+
+
+def test_camera_follows_head(_the_snake):
+    grid = _the_snake.GridConfig(100, 50)
+    camera = _the_snake.Camera(grid)
+    assert camera.to_screen(grid.center) == (camera.width // 2,
+                                             camera.height // 2)
+    assert not camera.follow((grid.center[0] + 1, grid.center[1]))
+    edge = (camera.x + camera.width - 1, camera.y)
+    assert camera.follow(edge)
+    assert camera.to_screen(edge) == (camera.width // 2,
+                                      camera.height // 2)
+    assert camera.to_screen(((camera.x - 1) % 100, camera.y)) is None
+    assert len(list(camera.visible())) == camera.width * camera.height
+
+
+def test_camera_is_fixed_on_default_board(_the_snake):
+    camera = _the_snake.Camera()
+    for position in ((0, 0), (_the_snake.GRID_WIDTH - 1, 5)):
+        assert not camera.follow(position)
+        assert camera.to_screen(position) == position
+
+
+def test_large_board_incremental_frames_match_full_redraw(_the_snake):
+    _the_snake.init_display()
+    grid = _the_snake.GridConfig(200, 150, 10)
+    game = _the_snake.SnakeGame(4, grid=grid)
+    game.snake.length = 30
+    renderer = _the_snake.Renderer(game)
+    renderer.draw()
+    for action in (_the_snake.UP, _the_snake.RIGHT) * 5:
+        for _ in range(35):
+            game.step(action)
+            renderer.track()
+            renderer.draw()
+            incremental = pg.image.tostring(_the_snake.screen, 'RGB')
+            renderer.draw_full()
+            assert pg.image.tostring(_the_snake.screen, 'RGB') == incremental
+
+
+def test_replay_keeps_board_size(_the_snake):
+    grid = _the_snake.GridConfig(60, 40)
+    game = _the_snake.SnakeGame(7, record=True, grid=grid)
+    for _ in range(100):
+        game.step(_the_snake.DOWN)
+    replay = _the_snake.Replay.from_bytes(game.replay().to_bytes())
+    assert (replay.width, replay.height) == (60, 40)
+    assert replay.verify().state == game.state
+
+
+def test_topology_tables_wrap_and_share_cells(_the_snake):
+    import copy
+    import pickle
+
+    grid = _the_snake.GridConfig(5, 4)
+    topology = grid.topology
+    assert topology is _the_snake.GridConfig(5, 4, 10).topology
+    assert topology.positions[7] == (2, 1)
+    cell_steps = topology.cell_steps
+    assert cell_steps[_the_snake.LEFT][15] == 19
+    assert cell_steps[_the_snake.DOWN][15] == 0
+    assert cell_steps[_the_snake.UP][2] == 17
+    for (dx, dy), cells in cell_steps.items():
+        for cell, (x, y) in enumerate(topology.positions):
+            assert topology.positions[cells[cell]] == ((x + dx) % 5,
+                                                       (y + dy) % 4)
+    # Копии поля не копируют таблицы
+    assert copy.deepcopy(grid).topology is topology
+    assert pickle.loads(pickle.dumps(grid)).topology is topology
+
+    snake = _the_snake.PackedSnake(position=(2, 2), grid=grid)
+    snake.move()
+    assert snake.get_head_position() == (3, 2)
+    assert snake.get_head_position() is topology.positions[13]
+
+
+def test_topology_tables_are_built_on_first_use(_the_snake):
+    from topology import Topology
+
+    topology = Topology(256, 256)
+    assert topology._cell_steps is None and topology._positions is None
+    assert len(topology.cell_steps[_the_snake.RIGHT]) == 256 * 256
+    assert topology._positions is None
+
+
+def test_large_board_has_no_tables(_the_snake):
+    grid = _the_snake.GridConfig(1000, 1000)
+    assert not grid.topology.has_tables
+    assert grid.topology.cell_steps is None
+    assert grid.topology.positions is None
+    snake = _the_snake.PackedSnake(position=(999, 0), grid=grid)
+    snake.move()
+    assert snake.get_head_position() == (0, 0)
@@ -0,0 +1,46 @@
+import pygame as pg
+
+
+def test_quick_presses_are_applied_one_per_tick(_the_snake):
+    snake = _the_snake.Snake()
+    queue = _the_snake.InputQueue()
+    assert queue.push(_the_snake.UP, snake.direction)
+    assert queue.push(_the_snake.LEFT, snake.direction)
+    queue.apply(snake)
+    snake.move()
+    assert snake.direction == _the_snake.UP
+    queue.apply(snake)
+    snake.move()
+    assert snake.direction == _the_snake.LEFT
+    assert len(queue.latencies) == 2
+
+
+def test_queued_reversal_is_rejected(_the_snake):
+    queue = _the_snake.InputQueue()
+    assert queue.push(_the_snake.UP, _the_snake.RIGHT)
+    assert not queue.push(_the_snake.DOWN, _the_snake.RIGHT)
+    assert not queue.push(_the_snake.UP, _the_snake.RIGHT)
+    assert queue.push(_the_snake.LEFT, _the_snake.RIGHT)
+    assert not queue.push(_the_snake.RIGHT, _the_snake.RIGHT)
+    assert len(queue) == 2
+
+
+def test_queue_is_bounded(_the_snake):
+    queue = _the_snake.InputQueue(maxlen=2)
+    queue.push(_the_snake.UP, _the_snake.RIGHT)
+    queue.push(_the_snake.LEFT, _the_snake.RIGHT)
+    assert not queue.push(_the_snake.DOWN, _the_snake.RIGHT)
+    assert queue.stats()['dropped_presses'] == 1
+
+
+def test_handle_keys_fills_queue(_the_snake):
+    _the_snake.init_display()
+    snake = _the_snake.Snake()
+    queue = _the_snake.InputQueue()
+    pg.event.clear()
+    for key in (pg.K_UP, pg.K_LEFT):
+        pg.event.post(pg.event.Event(pg.KEYDOWN, key=key))
+    _the_snake.handle_keys(snake, queue)
+    assert [turn for turn, _ in queue.turns] == [_the_snake.UP,
+                                                 _the_snake.LEFT]
+    assert snake.next_direction is None
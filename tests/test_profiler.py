@@ -0,0 +1,59 @@
+import json
+
+
+class FakeClock:
+    def __init__(self):
+        self.now = 0
+
+    def __call__(self):
+        return self.now
+
+
+def test_phases_and_percentiles(_the_snake):
+    clock = FakeClock()
+    profiler = _the_snake.FrameProfiler(10, clock_ns=clock)
+    for frame in range(_the_snake.PROFILE_REFRESH_FRAMES):
+        profiler.begin_frame()
+        clock.now += 1_000_000
+        profiler.mark('input')
+        clock.now += 2_000_000 if frame else 50_000_000
+        profiler.mark('display')
+        profiler.count_tick()
+        profiler.end_frame()
+    assert profiler.frames == _the_snake.PROFILE_REFRESH_FRAMES
+    assert profiler.percentile(50) == 3.0
+    assert profiler.percentile(99) == 51.0
+    assert profiler.totals['input'] == 1_000_000 * profiler.frames
+    assert profiler.lines and profiler.lines[0] == 'p50: 3.0 мс'
+    assert profiler.tick_rate() > 0
+
+
+def test_export(_the_snake, tmp_path):
+    profiler = _the_snake.FrameProfiler()
+    profiler.begin_frame()
+    profiler.mark('move')
+    profiler.end_frame()
+    path = tmp_path / 'profile.json'
+    profiler.export(path)
+    summary = json.loads(path.read_text())
+    assert summary['frames'] == 1
+    assert set(summary['phase_total_ms']) == set(_the_snake.PROFILE_PHASES)
+
+
+def test_engine_and_renderer_report_phases(_the_snake):
+    _the_snake.init_display()
+    profiler = _the_snake.FrameProfiler()
+    game = _the_snake.SnakeGame(1)
+    game.profiler = profiler
+    renderer = _the_snake.Renderer(game, profiler=profiler)
+    for _ in range(_the_snake.PROFILE_REFRESH_FRAMES):
+        profiler.begin_frame()
+        game.step()
+        renderer.track()
+        renderer.draw()
+        profiler.end_frame()
+    assert profiler.ticks == _the_snake.PROFILE_REFRESH_FRAMES
+    assert all(profiler.totals[phase] > 0
+               for phase in ('move', 'apple', 'render', 'display'))
+    renderer.draw()
+    assert renderer._panel_values[2] == profiler.lines
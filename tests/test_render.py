@@ -0,0 +1,58 @@
+import pygame as pg
+
+
+def _pixels(_the_snake):
+    return pg.image.tostring(_the_snake.screen, 'RGB')
+
+
+def test_incremental_frames_match_full_redraw(_the_snake):
+    _the_snake.init_display()
+    game = _the_snake.SnakeGame()
+    game.snake.length = 5
+    renderer = _the_snake.Renderer(game)
+    assert renderer.draw() is None
+    turns = (_the_snake.UP, None, _the_snake.LEFT, None, None,
+             _the_snake.DOWN, None, _the_snake.LEFT, _the_snake.UP)
+    for action in turns * 4:
+        _, _, done = game.step(action)
+        renderer.track()
+        if done:
+            game.reset()
+            renderer.invalidate()
+        rects = renderer.draw()
+        incremental = _pixels(_the_snake)
+        renderer.draw_full()
+        assert _pixels(_the_snake) == incremental
+        if rects is not None:
+            assert len(rects) <= 4
+
+
+def test_cell_rect(_the_snake):
+    rect = _the_snake.cell_rect((2, 3))
+    size = _the_snake.GRID_SIZE
+    assert rect == pg.Rect(2 * size, 3 * size, size, size)
+    # Прямоугольники берутся из таблицы, а не создаются заново
+    assert _the_snake.cell_rect((2, 3)) is rect
+    assert _the_snake.cell_rect((2, 3), 10) == pg.Rect(20, 30, 10, 10)
+    # Таблица ограничена экраном: клетки за его краем не запоминаются
+    far = _the_snake.cell_rect((1000, 3))
+    assert far == pg.Rect(1000 * size, 3 * size, size, size)
+    assert _the_snake.cell_rect((1000, 3)) is not far
+    _the_snake.render_cache.clear()
+    assert not _the_snake.render_cache.rects
+    assert _the_snake.cell_rect((2, 3)) is not rect
+
+
+def test_render_cache_is_bounded(_the_snake):
+    cache = _the_snake.RenderCache(maxsize=2)
+    first = cache.text('a')
+    cache.text('b')
+    assert cache.text('a') is first
+    cache.text('c')
+    assert ('b', _the_snake.FONT_COLOR, _the_snake.INFO_FONT_SIZE) \
+        not in cache.texts
+    assert len(cache.texts) == 2
+    sprite = cache.cell(_the_snake.SNAKE_COLOR)
+    assert cache.cell(_the_snake.SNAKE_COLOR) is sprite
+    assert sprite.get_size() == (_the_snake.GRID_SIZE,) * 2
+    assert cache.background() is cache.background()
@@ -0,0 +1,88 @@
+import pytest
+
+
+def _record_game(_the_snake, seed):
+    import tournament
+
+    game = _the_snake.SnakeGame(seed, record=True)
+    done = False
+    while not done and game.ticks < 3000:
+        tournament.greedy_policy(game.snake, game.apple)
+        _, _, done = game.step()
+    return game
+
+
+def test_replay_reproduces_game(_the_snake, tmp_path):
+    game = _record_game(_the_snake, 3)
+    replay = game.replay()
+    assert replay.ticks == game.ticks
+    assert len(replay.runs) < game.ticks
+
+    path = tmp_path / 'game.rpl'
+    replay.save(path)
+    loaded = _the_snake.Replay.load(path)
+    assert (loaded.seed, loaded.runs, loaded.score) == (
+        replay.seed, replay.runs, game.info.score)
+    played = loaded.verify()
+    assert list(played.snake.positions) == list(game.snake.positions)
+
+
+def test_reset_starts_new_recording(_the_snake):
+    import tournament
+
+    game = _record_game(_the_snake, 3)
+    first_seed = game.seed
+    game.reset()
+    assert game.seed != first_seed and game.replay().ticks == 0
+    for _ in range(10):
+        tournament.greedy_policy(game.snake, game.apple)
+        game.step()
+    replay = game.replay()
+    assert replay.seed == game.seed and replay.ticks == game.ticks == 10
+    assert replay.verify().state == game.state
+
+
+def test_tampered_replay_fails(_the_snake):
+    replay = _record_game(_the_snake, 5).replay()
+    replay.score += 10
+    with pytest.raises(_the_snake.ReplayMismatchError):
+        replay.verify()
+
+
+def test_long_runs_roundtrip(_the_snake):
+    replay = _the_snake.Replay(2 ** 62, [(3, 1), (0, 300), (2, 70000)],
+                               70301, 0)
+    decoded = _the_snake.Replay.from_bytes(replay.to_bytes())
+    assert decoded.runs == replay.runs
+    assert decoded.seed == replay.seed
+
+
+def test_new_game_matches_fresh_game(_the_snake):
+    game = _the_snake.SnakeGame(11)
+    for _ in range(30):
+        game.step(_the_snake.UP)
+    game.new_game(12)
+    fresh = _the_snake.SnakeGame(12)
+    assert game.state == fresh.state
+    assert list(game.free_cells) == list(fresh.free_cells)
+
+
+def test_window_playback_uses_board_and_checks_score(_the_snake, tmp_path):
+    import replay as replay_tool
+    import tournament
+
+    game = _the_snake.SnakeGame(6, record=True,
+                                grid=_the_snake.GridConfig(40, 40))
+    for _ in range(400):
+        tournament.greedy_policy(game.snake, game.apple)
+        if game.step()[2]:
+            break
+    recorded = game.replay()
+    played = replay_tool.play(recorded, speed=0)
+    assert (played.grid.width, played.grid.height) == (40, 40)
+    assert played.info.score == recorded.score > 0
+
+    path = tmp_path / 'bad.rpl'
+    recorded.score += 10
+    recorded.save(path)
+    assert replay_tool.main(['play', str(path), '--speed', '0']) == 1
@@ -0,0 +1,37 @@
+class FakeTime:
+    def __init__(self):
+        self.now = 0.0
+
+    def __call__(self):
+        return self.now
+
+
+def test_ticks_follow_logical_rate(_the_snake):
+    fake_time = FakeTime()
+    scheduler = _the_snake.TickScheduler(10, time_func=fake_time)
+    ticks = 0
+    for _ in range(60):  # Одна секунда при 60 кадрах
+        fake_time.now += 1 / 60
+        ticks += scheduler.ticks_due()
+    assert ticks in (9, 10)
+    assert scheduler.late_ticks == 0
+
+
+def test_slow_frames_are_caught_up_and_dropped(_the_snake):
+    fake_time = FakeTime()
+    scheduler = _the_snake.TickScheduler(10, max_catch_up=3,
+                                         time_func=fake_time)
+    fake_time.now += 0.25
+    assert scheduler.ticks_due() == 2
+    assert scheduler.late_ticks == 1
+    fake_time.now += 1.0
+    assert scheduler.ticks_due() == 3
+    assert scheduler.dropped_ticks == 7
+
+
+def test_reset_skips_paused_time(_the_snake):
+    fake_time = FakeTime()
+    scheduler = _the_snake.TickScheduler(10, time_func=fake_time)
+    fake_time.now += 5
+    scheduler.reset()
+    assert scheduler.ticks_due() == 0
@@ -0,0 +1,103 @@
+import zlib
+
+import pytest
+
+
+def _fill(store, scores):
+    for seed, score in enumerate(scores):
+        store.add(score, score // 10 + 1, score * 3, seed, timestamp=seed)
+
+
+def test_top_index_and_log(tmp_path):
+    from scores import ScoreStore
+
+    path = tmp_path / 'scores.log'
+    store = ScoreStore(path, top_size=3)
+    assert store.best() == 0 and store.top() == []
+    _fill(store, [30, 10, 50, 50, 20, 40])
+
+    assert len(store) == 6
+    assert store.best() == 50
+    # При равных очках выше тот, кто был раньше
+    assert [(entry.score, entry.seed) for entry in store.top()] == [
+        (50, 2), (50, 3), (40, 5)]
+    assert [entry.score for entry in store.entries()] == [
+        30, 10, 50, 50, 20, 40]
+    assert [entry.seed for entry in store.entries(4)] == [4, 5]
+    store.close()
+
+    reopened = ScoreStore(path, top_size=3)
+    assert reopened.top() == store.top()
+    assert reopened.recovered == 0
+    reopened.close()
+
+
+def test_torn_record_is_cut_off(tmp_path):
+    from scores import ScoreStore
+
+    path = tmp_path / 'scores.log'
+    store = ScoreStore(path)
+    _fill(store, [10, 20, 30])
+    store.file.close()  # Падение без close: индекс не обновлён в конце
+    size = path.stat().st_size
+    with open(path, 'ab') as file:
+        file.write(b'\x07' * (store.RECORD_SIZE + 5))
+
+    recovered = ScoreStore(path)
+    assert recovered.recovered == store.RECORD_SIZE + 5
+    assert path.stat().st_size == size
+    assert [entry.score for entry in recovered.entries()] == [10, 20, 30]
+    recovered.add(5, 1, 1, 9)
+    assert len(recovered) == 4
+    recovered.close()
+
+
+def test_index_covers_entries_added_after_it(tmp_path):
+    from scores import ScoreStore
+
+    path = tmp_path / 'scores.log'
+    store = ScoreStore(path, top_size=2)
+    _fill(store, [100, 90])
+    _fill(store, [1, 2, 3])  # Не меняют топ, индекс не переписывается
+    store.file.close()
+    with open(path, 'ab') as file:
+        body = store.FIELDS.pack(95, 1, 1, 42, 0.0)
+        file.write(body + store.CRC.pack(zlib.crc32(body)))
+
+    reopened = ScoreStore(path, top_size=2)
+    assert [entry.score for entry in reopened.top()] == [100, 95]
+    reopened.close()
+
+    # Испорченный индекс строится заново по журналу
+    reopened.index_path.write_bytes(b'garbage')
+    rebuilt = ScoreStore(path, top_size=3)
+    assert [entry.score for entry in rebuilt.top()] == [100, 95, 90]
+    rebuilt.close()
+
+
+def test_not_a_score_log(tmp_path):
+    from scores import ScoreStore
+
+    path = tmp_path / 'scores.log'
+    path.write_bytes(b'not a score table')
+    with pytest.raises(ValueError):
+        ScoreStore(path)
+
+
+def test_session_saves_scores_and_shows_best(_the_snake, tmp_path):
+    from scores import ScoreStore
+
+    _the_snake.init_display()
+    store = ScoreStore(tmp_path / 'scores.log')
+    store.add(70, 8, 100, 1)
+    session = _the_snake.GameSession(scores=store)
+    game = session.game
+    assert game.info.best == 70
+    assert session.renderer._panel()[-1] == 70
+
+    game.info.score = 90
+    assert session.renderer._panel()[-1] == 90
+    session.save_score()
+    assert store.best() == 90 and game.info.best == 90
+    assert store.top()[0].seed == game.seed
+    store.close()
@@ -0,0 +1,119 @@
+def test_occupied_follows_positions(_the_snake):
+    snake = _the_snake.Snake()
+    snake.length = 4
+    for _ in range(10):
+        snake.move()
+        assert snake.occupied == set(snake.positions)
+        assert len(snake.positions) <= snake.length
+    assert snake.get_head_position() == snake.positions[0]
+
+
+def test_moving_into_vacated_tail_is_not_collision(_the_snake):
+    snake = _the_snake.Snake()
+    snake.length = 4
+    for direction in (_the_snake.RIGHT, _the_snake.DOWN, _the_snake.LEFT):
+        snake.next_direction = direction
+        snake.move()
+    snake.next_direction = _the_snake.UP
+    snake.move()
+    assert not snake.collided
+    assert snake.last is not None
+
+
+def test_reset_clears_body(_the_snake):
+    snake = _the_snake.Snake()
+    snake.length = 3
+    snake.move()
+    snake.move()
+    snake.reset()
+    assert list(snake.positions) == [snake.position]
+    assert snake.occupied == {snake.position}
+    assert not snake.collided
+
+
+def test_game_objects_have_no_instance_dict(_the_snake):
+    for obj in (_the_snake.GameObject(), _the_snake.Snake(),
+                _the_snake.Apple(), _the_snake.GameInfo(),
+                _the_snake.PackedSnake()):
+        assert not hasattr(obj, '__dict__')
+
+
+def test_packed_snake_moves_like_snake(_the_snake):
+    import random
+
+    rng = random.Random(2)
+    for grid in (_the_snake.GridConfig(6, 5), _the_snake.GridConfig(300, 300)):
+        snake = _the_snake.Snake(grid=grid)
+        packed = _the_snake.PackedSnake(grid=grid)
+        for tick in range(400):
+            if tick % 3 == 0:
+                snake.length = packed.length = snake.length + 1
+            direction = rng.choice(_the_snake.DIRECTIONS)
+            snake.next_direction = packed.next_direction = direction
+            snake.move()
+            packed.move()
+            assert list(packed.positions) == list(snake.positions)
+            assert packed.last == snake.last
+            assert packed.collided == snake.collided
+            assert packed.get_head_position() == snake.get_head_position()
+            if snake.collided:
+                snake.reset(random.Random(tick))
+                packed.reset(random.Random(tick))
+                continue
+            for position in list(snake.positions)[:5] + [(0, 0), (3, 4)]:
+                assert (position in packed.occupied) == (
+                    position in snake.occupied)
+    assert packed.bits is None
+
+
+def test_packed_snake_switches_to_bit_set(_the_snake):
+    grid = _the_snake.GridConfig(16, 16)
+    snake = _the_snake.PackedSnake(grid=grid)
+    snake.length = 40
+    snake.direction = _the_snake.DOWN
+    for _ in range(30):
+        snake.move()
+    assert snake.bits is not None
+    assert set(snake.occupied) == set(snake.positions)
+    assert len(snake.occupied) == 16
+
+
+def test_packed_snake_indexes_medium_body_in_set(_the_snake):
+    grid = _the_snake.GridConfig(300, 300)
+    snake = _the_snake.PackedSnake(position=(0, 0), grid=grid)
+    snake.length = 100
+    for _ in range(snake.SCAN_LENGTH - 1):
+        snake.move()
+    assert snake.index is None
+    for _ in range(50):
+        snake.move()
+    assert snake.bits is None
+    assert snake.index == {snake.to_cell(position)
+                           for position in snake.positions}
+    snake.length = 300
+    for _ in range(250):
+        snake.move()
+    assert snake.index is None and snake.bits is not None
+    assert set(snake.occupied) == set(snake.positions)
+
+
+def test_game_runs_with_packed_snake(_the_snake):
+    import pygame as pg
+
+    _the_snake.init_display()
+    game = _the_snake.SnakeGame(3)
+    game.snake = _the_snake.PackedSnake()
+    game.snake.length = 5
+    renderer = _the_snake.Renderer(game)
+    renderer.draw()
+    for action in (_the_snake.UP, None, _the_snake.LEFT, None) * 10:
+        _, _, done = game.step(action)
+        renderer.track()
+        if done:
+            game.reset()
+            renderer.invalidate()
+        renderer.draw()
+        incremental = pg.image.tostring(_the_snake.screen, 'RGB')
+        renderer.draw_full()
+        assert pg.image.tostring(_the_snake.screen, 'RGB') == incremental
+    assert game.info.score == game.clone().info.score
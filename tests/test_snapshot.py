@@ -0,0 +1,103 @@
+import pytest
+
+
+def _played_game(_the_snake, seed, grid=None):
+    import tournament
+
+    game = _the_snake.SnakeGame(seed, grid=grid)
+    for _ in range(150):
+        tournament.greedy_policy(game.snake, game.apple)
+        _, _, done = game.step()
+        if done:
+            game.reset()
+    return game
+
+
+def _assert_same(first, second):
+    assert first.state == second.state
+    assert list(first.snake.positions) == list(second.snake.positions)
+    assert first.snake.occupied == second.snake.occupied
+    assert first.snake.direction == second.snake.direction
+    assert first.snake.next_direction == second.snake.next_direction
+    assert first.snake.last == second.snake.last
+    assert first.snake.collided == second.snake.collided
+    assert first.ticks == second.ticks and first.seed == second.seed
+    assert list(first.free_cells) == list(second.free_cells)
+    assert first.rng.getstate() == second.rng.getstate()
+
+
+def test_clone_plays_out_identically(_the_snake):
+    import tournament
+
+    game = _played_game(_the_snake, 4)
+    game.snake.next_direction = _the_snake.UP
+    clone = game.clone()
+    _assert_same(game, clone)
+    for current in (game, clone):
+        for _ in range(400):
+            tournament.greedy_policy(current.snake, current.apple)
+            _, _, done = current.step()
+            if done:
+                current.reset()
+    _assert_same(game, clone)
+
+
+def test_restore_in_place(_the_snake):
+    game = _played_game(_the_snake, 5)
+    snapshot = game.snapshot()
+    expected = game.clone()
+    for _ in range(20):
+        game.step(_the_snake.LEFT)
+    game.restore(snapshot)
+    _assert_same(game, expected)
+
+
+def test_restore_into_recording_game(_the_snake, tmp_path):
+    expected = _played_game(_the_snake, 8)
+    assert expected.snake.last is not None
+    _the_snake.init_display()
+    session = _the_snake.GameSession(record_dir=tmp_path)
+    game = session.game
+    game.restore(expected.snapshot())
+    _assert_same(game, expected)
+    # Восстановленная игра не записывается, и сессия не сохраняет повтор
+    assert not game.record and game.recorder is None
+    session.start_new_game()
+    assert list(tmp_path.iterdir()) == []
+    assert game.ticks == 0
+
+
+def test_snapshot_file_is_memory_mapped(_the_snake, tmp_path):
+    import mmap
+
+    from snapshot import GameSnapshot
+
+    grid = _the_snake.GridConfig(300, 300)
+    game = _played_game(_the_snake, 6, grid)
+    path = tmp_path / 'game.snap'
+    game.snapshot().save(path)
+    loaded = GameSnapshot.load(path)
+    assert isinstance(loaded.data, mmap.mmap)
+    _, body, _, _ = loaded.arrays()
+    assert body.format == 'I' and len(body) == len(game.snake.positions)
+    restored = loaded.restore()
+    _assert_same(game, restored)
+    assert restored.grid.width == 300
+
+
+def test_snapshot_is_compact(_the_snake):
+    game = _played_game(_the_snake, 7)
+    snapshot = game.snapshot()
+    _, body, _, _ = snapshot.arrays()
+    assert body.format == 'H'
+    assert len(snapshot.data) < 4096
+    assert snapshot.copy().data == snapshot.data
+
+
+def test_bad_snapshot_is_rejected(_the_snake):
+    from snapshot import GameSnapshot
+
+    data = bytearray(_the_snake.SnakeGame(1).snapshot().data)
+    data[:4] = b'XXXX'
+    with pytest.raises(ValueError):
+        GameSnapshot(bytes(data))
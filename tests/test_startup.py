@@ -0,0 +1,23 @@
+import subprocess
+import sys
+
+from conftest import BASE_DIR
+
+
+def test_import_does_not_open_window():
+    code = (
+        'import pygame, the_snake\n'
+        'assert not pygame.display.get_init()\n'
+        'assert pygame.display.get_surface() is None\n'
+        'game = the_snake.SnakeGame()\n'
+        'game.step()\n'
+    )
+    subprocess.run([sys.executable, '-c', code], cwd=BASE_DIR, check=True,
+                   timeout=10)
+
+
+def test_init_display_replaces_screen(_the_snake):
+    surface = _the_snake.init_display()
+    assert _the_snake.screen is surface
+    assert surface.get_size() == (_the_snake.SCREEN_WIDTH,
+                                  _the_snake.SCREEN_HEIGHT)
@@ -0,0 +1,33 @@
+import pygame as pg
+
+
+def test_state_transitions(_the_snake):
+    machine = _the_snake.StateMachine()
+    assert machine.is_playing
+    machine.pause()
+    assert machine.state == _the_snake.STATE_PAUSED
+    assert machine.resume() == _the_snake.STATE_PAUSED
+    machine.game_over()
+    machine.pause()
+    assert machine.state == _the_snake.STATE_GAME_OVER
+    assert machine.resume() == _the_snake.STATE_GAME_OVER
+    assert machine.is_playing
+
+
+def test_pause_key_pauses_game(_the_snake):
+    _the_snake.init_display()
+    machine = _the_snake.StateMachine()
+    pg.event.clear()
+    pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_p))
+    _the_snake.handle_keys(_the_snake.Snake(), machine=machine)
+    assert machine.state == _the_snake.STATE_PAUSED
+
+
+def test_wait_for_resume_blocks_until_key(_the_snake):
+    _the_snake.init_display()
+    machine = _the_snake.StateMachine()
+    machine.game_over()
+    pg.event.clear()
+    pg.event.post(pg.event.Event(pg.KEYDOWN, key=pg.K_a))
+    assert _the_snake.wait_for_resume(machine) == _the_snake.STATE_GAME_OVER
+    assert machine.is_playing
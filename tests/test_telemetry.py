@@ -0,0 +1,101 @@
+import json
+import threading
+
+
+def _events(path):
+    with open(path, encoding='utf-8') as file:
+        return [json.loads(line) for line in file]
+
+
+def test_game_events_are_written(_the_snake, tmp_path):
+    import tournament
+    from telemetry import TelemetryWriter
+
+    path = tmp_path / 'events.jsonl'
+    writer = TelemetryWriter(path)
+    game = _the_snake.SnakeGame(3, telemetry=writer)
+    for _ in range(300):
+        tournament.greedy_policy(game.snake, game.apple)
+        _, _, done = game.step()
+        if done:
+            game.reset()
+    writer.close()
+
+    events = _events(path)
+    names = [event['event'] for event in events]
+    assert names[0] == 'game_start'
+    assert events[0]['seed'] == 3
+    assert names.count('tick') == 300
+    scores = game.info.score + sum(
+        event['score'] for event in events if event['event'] == 'game_over')
+    assert names.count('apple') * _the_snake.APPLE_REWARD == scores
+    assert all(event['step_ns'] >= 0 for event in events
+               if event['event'] == 'tick')
+    assert writer.stats() == {'emitted': len(events), 'written': len(events),
+                              'dropped': 0, 'failed': 0,
+                              'batches': writer.stats()['batches']}
+
+
+def test_full_queue_drops_and_counts(tmp_path, monkeypatch):
+    from telemetry import TelemetryWriter
+
+    path = tmp_path / 'events.jsonl'
+    writer = TelemetryWriter(path, maxsize=2, batch_size=1)
+    gate = threading.Event()
+    write = writer._write
+
+    def slow_write(batch):
+        gate.wait()
+        write(batch)
+
+    monkeypatch.setattr(writer, '_write', slow_write)
+    sent = [writer.emit('tick', tick=tick) for tick in range(20)]
+    gate.set()
+    writer.close()
+
+    stats = writer.stats()
+    assert stats['emitted'] == 20
+    assert stats['dropped'] == sent.count(False) >= 17
+    assert stats['written'] == sent.count(True)
+    assert [event['tick'] for event in _events(path)] == [
+        tick for tick, ok in enumerate(sent) if ok]
+
+
+def test_blocking_writer_keeps_every_event(tmp_path):
+    from telemetry import TelemetryWriter
+
+    path = tmp_path / 'events.jsonl'
+    writer = TelemetryWriter(path, maxsize=2, block=True)
+    for tick in range(500):
+        writer.emit('tick', tick=tick)
+    writer.close()
+
+    assert writer.stats()['dropped'] == 0
+    assert [event['tick'] for event in _events(path)] == list(range(500))
+
+
+def test_failed_write_is_reported_and_close_returns(tmp_path, monkeypatch):
+    import time
+
+    import pytest
+
+    from telemetry import TelemetryWriter
+
+    writer = TelemetryWriter(tmp_path / 'events.jsonl', maxsize=2,
+                             batch_size=1)
+
+    def full_disk(batch):
+        raise OSError(28, 'No space left on device')
+
+    monkeypatch.setattr(writer, '_write', full_disk)
+    writer.emit('tick', tick=0)
+    deadline = time.monotonic() + 5
+    while writer._error is None and time.monotonic() < deadline:
+        time.sleep(0.001)
+    # Мёртвая запись — не переполненная очередь: события не «отброшены»
+    assert not any(writer.emit('tick', tick=tick) for tick in range(1, 200))
+    with pytest.raises(OSError):
+        writer.close()
+    assert not writer._thread.is_alive()
+    assert writer.stats() == {'emitted': 200, 'written': 0, 'dropped': 0,
+                              'failed': 200, 'batches': 0}
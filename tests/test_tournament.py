@@ -0,0 +1,22 @@
+def test_episode_is_reproducible(_the_snake):
+    import tournament
+
+    first = tournament.run_episode(tournament.greedy_policy, 7, 2000)
+    second = tournament.run_episode('tournament:greedy_policy', 7, 2000)
+    assert first == second
+    assert first.score > 0
+    assert first.cause in (_the_snake.CAUSE_COLLISION, _the_snake.CAUSE_WIN,
+                           tournament.CAUSE_TIMEOUT)
+
+
+def test_tournament_streams_all_episodes():
+    import tournament
+
+    streamed = []
+    stats = tournament.run_tournament(
+        'tournament:idle_policy', range(10), workers=2, max_ticks=50,
+        chunksize=3, on_result=streamed.append)
+    assert sorted(result.seed for result in streamed) == list(range(10))
+    assert stats['episodes'] == 10
+    assert stats['ticks'] == 500
+    assert stats['causes'] == {tournament.CAUSE_TIMEOUT: 10}
@@ -1,7 +1,20 @@
-from random import choice, randint
+from array import array
+from collections import OrderedDict, deque, namedtuple
+from pathlib import Path
+from types import MappingProxyType
+import argparse
+import concurrent.futures
+import json
+import random
+import struct
+import time
 
 import pygame as pg
 
+from scores import ScoreStore
+from telemetry import TelemetryWriter
+from topology import Topology
+
 # Константы для размеров поля и сетки:
 SCREEN_WIDTH, SCREEN_HEIGHT = 640, 480
 GRID_SIZE = 20
@@ -11,12 +24,16 @@ GAME_WIDTH = SCREEN_WIDTH - INFO_PANEL_WIDTH  # Ширина игрового п
 GRID_WIDTH = GAME_WIDTH // GRID_SIZE  # Количество ячеек по горизонтали
 FIELD_BORDER_COLOR = (255, 0, 0)
 FIELD_CENTER = GRID_WIDTH // 2, GRID_HEIGHT // 2
+GAME_FIELD_RECT = pg.Rect(0, 0, GAME_WIDTH, SCREEN_HEIGHT)
 
 # Направления движения:
 UP = (0, -1)
 DOWN = (0, 1)
 LEFT = (-1, 0)
 RIGHT = (1, 0)
+DIRECTIONS = (UP, DOWN, LEFT, RIGHT)
+DIRECTION_CODES = {
+    direction: code for code, direction in enumerate(DIRECTIONS)}
 
 # Цвет фона:
 BOARD_BACKGROUND_COLOR = (0, 0, 99)
@@ -33,19 +50,431 @@ SEP_COLOR = (100, 100, 100)
 PANEL_COLOR = (40, 40, 40)
 FONT_COLOR = (255, 255, 255)
 
-# Скорость движения змейки:
+# Текст информационной панели:
+INFO_FONT_SIZE = 30
+INFO_TEXT_X = GAME_WIDTH + 20
+INFO_TEXT_TOP = 20
+INFO_LINE_HEIGHT = 40
+PAUSE_FONT_SIZE = 36
+
+# Размер кэшей отрисовки:
+RENDER_CACHE_SIZE = 128
+
+# Отступ в клетках от края видимой области, после которого камера
+# переводит змейку в центр экрана:
+CAMERA_MARGIN = 4
+
+# Скорость движения змейки (логических ходов в секунду):
 SPEED = 10
 
-# Настройка игрового окна:
-screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+# Частота отрисовки кадров:
+RENDER_FPS = 60
+
+# Сколько отставших ходов можно догнать за один кадр:
+MAX_CATCH_UP_TICKS = 5
+
+# Как долго ждать события на паузе, мс. Ожидание блокирующее, таймаут
+# лишь даёт циклу периодически проснуться (например, для Ctrl+C):
+IDLE_WAIT_MS = 1000
+
+# Состояния игры:
+STATE_PLAYING = 'playing'
+STATE_PAUSED = 'paused'
+STATE_GAME_OVER = 'game_over'
+
+# Профилирование кадра: фазы, окно для перцентилей, частота обновления
+# строк в панели (в кадрах):
+PROFILE_PHASES = ('input', 'move', 'apple', 'render', 'info', 'display',
+                  'wait')
+PROFILE_WINDOW = 300
+PROFILE_REFRESH_FRAMES = 30
+PROFILE_FONT_SIZE = 22
+PROFILE_LINE_HEIGHT = 24
 
-# Заголовок окна игрового поля:
-pg.display.set_caption('Змейка')
+# Сколько поворотов можно нажать заранее:
+INPUT_QUEUE_SIZE = 3
+LATENCY_SAMPLES = 256
+
+# Сколько секунд после хода бот может думать, пока змейка не пошла по инерции
+DECISION_DEADLINE = 0.5 / SPEED
+
+# Очки за съеденное яблоко:
+APPLE_REWARD = 10
+
+# Причины окончания игры:
+CAUSE_COLLISION = 'collision'
+CAUSE_WIN = 'win'  # Змейка заняла всё поле
+
+# Поверхность для отрисовки. До вызова init_display() это внеэкранный
+# буфер, так что импорт модуля не создаёт окно:
+screen = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
 
 # Настройка времени:
 clock = pg.time.Clock()
 
 
+def init_display():
+    """
+    Initialize PyGame and open the game window.
+
+    Called once on start of the game, importing the module does not touch
+    the display.
+
+    Returns:
+        pg.Surface: The window surface, also stored in ``screen``.
+    """
+    global screen
+    pg.init()
+    # Настройка игрового окна:
+    screen = pg.display.set_mode((SCREEN_WIDTH, SCREEN_HEIGHT), 0, 32)
+    # Заголовок окна игрового поля:
+    pg.display.set_caption('Змейка')
+    # В очередь попадают только обрабатываемые события:
+    pg.event.set_blocked(None)
+    pg.event.set_allowed(HANDLED_EVENTS)
+    return screen
+
+
+class BoardFullError(Exception):
+    """Raised when there is no free cell left on the board."""
+
+
+class GridConfig:
+    """
+    Size of the board and of its cells on the screen.
+
+    The board may be larger than the game field of the window; then only
+    a ``view_width`` x ``view_height`` part of it is shown (see Camera).
+
+    Attributes:
+        width (int): Board width in cells.
+        height (int): Board height in cells.
+        cell_size (int): Cell size in pixels.
+        view_width (int): Number of visible columns.
+        view_height (int): Number of visible rows.
+        center (tuple): The middle cell of the board.
+        topology (Topology): Neighbor tables of the board, built on first
+            use.
+    """
+
+    def __init__(self, width=GRID_WIDTH, height=GRID_HEIGHT,
+                 cell_size=GRID_SIZE):
+        """
+        Initialize the configuration.
+
+        Args:
+            width (int): Board width in cells.
+            height (int): Board height in cells.
+            cell_size (int): Cell size in pixels.
+        """
+        self.width = width
+        self.height = height
+        self.cell_size = cell_size
+        self.view_width = min(width, GAME_WIDTH // cell_size)
+        self.view_height = min(height, SCREEN_HEIGHT // cell_size)
+        self.center = width // 2, height // 2
+        self.topology = Topology.for_size(width, height)
+
+    @property
+    def cells(self):
+        """Get the number of cells on the board."""
+        return self.width * self.height
+
+    def __repr__(self):
+        """Get the text form of the configuration."""
+        return (f'GridConfig({self.width}, {self.height}, '
+                f'{self.cell_size})')
+
+
+# Поле по умолчанию совпадает с игровой областью окна:
+DEFAULT_GRID = GridConfig()
+
+
+class FreeCells:
+    """
+    Index of the board cells not covered by the snake.
+
+    The free cells form an array with swap-remove, so adding, removing
+    and uniform sampling are all O(1). Slot ``i`` of the array holds cell
+    number ``i`` (``y * width + x``) unless it was overwritten, and only
+    the overwritten slots are stored: memory depends on the part of the
+    board the game has touched, not on the size of the board.
+    """
+
+    def __init__(self, cells=(), grid=None):
+        """
+        Build the index.
+
+        Args:
+            cells (iterable): Initially free cells.
+            grid (GridConfig, optional): The board.
+        """
+        self.grid = grid or DEFAULT_GRID
+        self._slots = {}  # Перезаписанные ячейки массива: слот -> клетка
+        self._index = {}  # Клетки не на своём месте: клетка -> слот
+        self._count = 0
+        for cell in cells:
+            self.add(cell)
+
+    @classmethod
+    def for_board(cls, occupied=(), grid=None):
+        """
+        Build the index for the whole board minus the occupied cells.
+
+        Args:
+            occupied (iterable, optional): Cells that are not free.
+            grid (GridConfig, optional): The board.
+
+        Returns:
+            FreeCells: The new index.
+        """
+        free_cells = cls(grid=grid)
+        free_cells._count = free_cells.grid.cells
+        for cell in occupied:
+            free_cells.remove(cell)
+        return free_cells
+
+    def __len__(self):
+        """Get the number of free cells."""
+        return self._count
+
+    def __contains__(self, cell):
+        """Check whether the cell is free."""
+        slot = self._slot_of(cell)
+        return slot < self._count and self._cell_at(slot) == cell
+
+    def __iter__(self):
+        """Iterate over the free cells."""
+        return (self._cell_at(slot) for slot in range(self._count))
+
+    def add(self, cell):
+        """Mark the cell as free."""
+        if cell not in self:
+            self._put(self._count, cell)
+            self._count += 1
+
+    def remove(self, cell):
+        """Mark the free cell as occupied."""
+        slot = self._slot_of(cell)
+        self._count -= 1
+        last = self._cell_at(self._count)
+        self._slots.pop(self._count, None)
+        self._index.pop(cell, None)
+        if slot != self._count:
+            self._put(slot, last)
+
+    def overrides(self):
+        """
+        Get the state of the index in a compact form.
+
+        Returns:
+            tuple: Number of free cells and a read-only ``{slot: cell}``
+            mapping of the slots that do not hold their own cell.
+        """
+        return self._count, MappingProxyType(self._slots)
+
+    @classmethod
+    def from_overrides(cls, count, overrides, grid=None):
+        """
+        Rebuild an index from the result of ``overrides``, given as
+        ``(slot, cell)`` pairs.
+
+        The order of the cells, and so the result of ``sample`` with the
+        same random state, is the same as in the original index.
+        """
+        free_cells = cls(grid=grid)
+        free_cells._count = count
+        for slot, cell in overrides:
+            free_cells._slots[slot] = cell
+            free_cells._index[cell] = slot
+        return free_cells
+
+    def _cell_at(self, slot):
+        cell = self._slots.get(slot)
+        if cell is None:
+            width = self.grid.width
+            cell = slot % width, slot // width
+        return cell
+
+    def _slot_of(self, cell):
+        slot = self._index.get(cell)
+        if slot is None:
+            slot = cell[1] * self.grid.width + cell[0]
+        return slot
+
+    def _put(self, slot, cell):
+        width = self.grid.width
+        if slot == cell[1] * width + cell[0]:
+            self._slots.pop(slot, None)
+            self._index.pop(cell, None)
+        else:
+            self._slots[slot] = cell
+            self._index[cell] = slot
+
+    def sample(self, rng=None):
+        """
+        Pick a uniformly random free cell.
+
+        Args:
+            rng (random.Random, optional): Source of randomness, the global
+                ``random`` module by default.
+
+        Raises:
+            BoardFullError: If there are no free cells.
+        """
+        if not self._count:
+            raise BoardFullError('На поле не осталось свободных клеток')
+        return self._cell_at((rng or random).randrange(self._count))
+
+
+class RenderCache:
+    """
+    Cache of pre-rendered surfaces.
+
+    Holds text surfaces keyed by string, cell sprites keyed by color,
+    pixel rectangles of the cells of the screen grid and the static
+    background (board, panel, separator, field border and panel title).
+    Text, sprite and rectangle caches are bounded and evict the least
+    recently used entries.
+    """
+
+    def __init__(self, maxsize=RENDER_CACHE_SIZE):
+        """
+        Initialize empty caches.
+
+        Args:
+            maxsize (int): Maximum number of entries in each cache.
+        """
+        self.maxsize = maxsize
+        self.fonts = {}
+        self.texts = OrderedDict()
+        self.cells = OrderedDict()
+        self.rects = OrderedDict()
+        self._background = None
+
+    def _lookup(self, store, key, factory):
+        surface = store.get(key)
+        if surface is None:
+            surface = store[key] = factory()
+            if len(store) > self.maxsize:
+                store.popitem(last=False)
+        else:
+            store.move_to_end(key)
+        return surface
+
+    def font(self, size):
+        """Get the default font of the given size."""
+        font = self.fonts.get(size)
+        if font is None:
+            if not pg.font.get_init():
+                pg.font.init()
+            font = self.fonts[size] = pg.font.Font(None, size)
+        return font
+
+    def text(self, text, color=FONT_COLOR, size=INFO_FONT_SIZE):
+        """Get the rendered text surface."""
+        return self._lookup(
+            self.texts, (text, color, size),
+            lambda: self.font(size).render(text, True, color))
+
+    def cell(self, color, size=GRID_SIZE):
+        """Get the sprite of a grid cell of the given color and size."""
+        def build():
+            sprite = pg.Surface((size, size))
+            sprite.fill(color)
+            pg.draw.rect(sprite, BORDER_COLOR, sprite.get_rect(), 1)
+            return sprite
+
+        return self._lookup(self.cells, (color, size), build)
+
+    def rect(self, position, size=GRID_SIZE):
+        """
+        Get the pixel rectangle of a screen cell.
+
+        The rectangles of the cells of the game field are kept in a table
+        indexed by screen cell and shared, so they must not be changed;
+        a cell outside the field gets a new rectangle.
+        """
+        x, y = position
+        columns = GAME_WIDTH // size
+        if not (0 <= x < columns and 0 <= y < SCREEN_HEIGHT // size):
+            return pg.Rect(x * size, y * size, size, size)
+        rects = self.rects.get(size)
+        if rects is None:
+            rects = self._lookup(
+                self.rects, size,
+                lambda: [None] * (columns * (SCREEN_HEIGHT // size)))
+        index = y * columns + x
+        rect = rects[index]
+        if rect is None:
+            rect = rects[index] = pg.Rect(x * size, y * size, size, size)
+        return rect
+
+    def background(self):
+        """Get the static background of the whole screen."""
+        if self._background is None:
+            background = pg.Surface((SCREEN_WIDTH, SCREEN_HEIGHT))
+            background.fill(BOARD_BACKGROUND_COLOR)
+            pg.draw.rect(background, PANEL_COLOR, pg.Rect(
+                GAME_WIDTH, 0, INFO_PANEL_WIDTH, SCREEN_HEIGHT))
+            pg.draw.rect(background, SEP_COLOR,
+                         pg.Rect(GAME_WIDTH - 1, 0, 2, SCREEN_HEIGHT))
+            pg.draw.rect(background, FIELD_BORDER_COLOR, GAME_FIELD_RECT, 2)
+            background.blit(self.text('Статистика'),
+                            (INFO_TEXT_X, INFO_TEXT_TOP))
+            self._background = background
+        return self._background
+
+    def clear(self):
+        """Drop all cached surfaces."""
+        self.texts.clear()
+        self.cells.clear()
+        self.rects.clear()
+        self._background = None
+
+
+render_cache = RenderCache()
+
+
+def cell_rect(position, size=GRID_SIZE):
+    """
+    Get the screen rectangle of a grid cell.
+
+    Args:
+        position (tuple): The (x, y) position of the cell on the screen
+            grid.
+        size (int): Cell size in pixels.
+
+    Returns:
+        pg.Rect: The cell rectangle in pixels, shared: do not change it.
+    """
+    return render_cache.rect(position, size)
+
+
+def draw_cell(position, color, size=GRID_SIZE):
+    """
+    Draw a filled grid cell with a border.
+
+    Returns:
+        pg.Rect: The repainted rectangle.
+    """
+    rect = cell_rect(position, size)
+    screen.blit(render_cache.cell(color, size), rect)
+    return rect
+
+
+def erase_cell(position, size=GRID_SIZE):
+    """
+    Restore a grid cell from the static background.
+
+    Returns:
+        pg.Rect: The repainted rectangle.
+    """
+    rect = cell_rect(position, size)
+    screen.blit(render_cache.background(), rect, rect)
+    return rect
+
+
 class GameObject:
     """
     Base class for all game objects.
@@ -55,6 +484,9 @@ class GameObject:
         body_color (tuple): The color of the object.
     """
 
+    # Без __dict__ у каждого объекта: их бывают десятки тысяч
+    __slots__ = ('position', 'body_color')
+
     def __init__(self, body_color=None, position=FIELD_CENTER):
         """
         Initialize the base game object.
@@ -82,38 +514,56 @@ class Apple(GameObject):
     Inherits from GameObject.
     """
 
-    def randomize_position(self, occupied_positions=None):
+    __slots__ = ('grid',)
+
+    def randomize_position(self, occupied_positions=None, free_cells=None,
+                           rng=None, grid=None):
         """
         Randomly creates the apple position on the game board,
         avoiding occupied cells.
+
+        Args:
+            occupied_positions (set, optional): Cells to avoid.
+            free_cells (FreeCells, optional): Index of free cells. When given
+                the position is sampled from it in O(1).
+            rng (random.Random, optional): Source of randomness, the global
+                ``random`` module by default.
+            grid (GridConfig, optional): The board, the apple's own by
+                default.
+
+        Raises:
+            BoardFullError: If every cell of the board is occupied.
         """
+        rng = rng or random
+        if free_cells is not None:
+            self.position = free_cells.sample(rng)
+            return
+
+        grid = grid or self.grid
         occupied_positions = occupied_positions or []
+        if len(occupied_positions) >= grid.cells:
+            raise BoardFullError('На поле не осталось свободных клеток')
 
         while True:
-            self.position = (randint(0, GRID_WIDTH - 1),
-                             randint(0, GRID_HEIGHT - 1))
+            self.position = (rng.randint(0, grid.width - 1),
+                             rng.randint(0, grid.height - 1))
             if self.position not in occupied_positions:
                 break
 
     def draw(self):
         """Draw the apple on the screen."""
-        rect = pg.Rect(
-            (self.position[0] * GRID_SIZE,
-             self.position[1] * GRID_SIZE),
-            (GRID_SIZE, GRID_SIZE)
-        )
-        pg.draw.rect(screen, self.body_color, rect)
-        pg.draw.rect(screen, BORDER_COLOR, rect, 1)
+        draw_cell(self.position, self.body_color)
 
     def __init__(self, occupied_positions=None, body_color=APPLE_COLOR,
-                 position=None):
+                 position=None, free_cells=None, rng=None, grid=None):
         """
         Initialize the apple with a random position and color.
         Apple color is set to red with APPLE_COLOR constant.
         """
         super().__init__(body_color, position)
+        self.grid = grid or DEFAULT_GRID
         if position is None:
-            self.randomize_position(occupied_positions)
+            self.randomize_position(occupied_positions, free_cells, rng)
 
 
 class Snake(GameObject):
@@ -123,43 +573,38 @@ class Snake(GameObject):
     Inherits from GameObject.
     """
 
-    def __init__(self, body_color=SNAKE_COLOR, position=FIELD_CENTER):
+    __slots__ = ('grid', 'positions', 'occupied', 'length', 'direction',
+                 'next_direction', 'last', 'collided')
+
+    def __init__(self, body_color=SNAKE_COLOR, position=None, grid=None):
         """
         Initialize the snake with a starting position and color.
         Args:
             body_color (tuple): RGB color for the snake (default: SNAKE_COLOR).
-            position (tuple): Initial position (x, y) (default: FIELD_CENTER).
+            position (tuple): Initial position (x, y) (default: the center
+                of the board).
+            grid (GridConfig): The board (default: DEFAULT_GRID).
         """
+        self.grid = grid or DEFAULT_GRID
+        if position is None:
+            position = self.grid.center
         super().__init__(body_color=body_color, position=position)
-        self.positions = [self.position]
+        self.positions = deque([self.position])
+        self.occupied = {self.position}  # Клетки, занятые телом змейки
         self.length = 1
         self.direction = RIGHT
         self.next_direction = None
         self.last = None  # Last segment position for erasing
+        self.collided = False
 
     def draw(self):
         """Draw the snake on the screen."""
+        # Затирание последнего сегмента
+        if self.last is not None and self.last not in self.occupied:
+            erase_cell(self.last)
+
         for position in self.positions:
-            rect = pg.Rect(
-                (position[0] * GRID_SIZE, position[1] * GRID_SIZE),
-                (GRID_SIZE, GRID_SIZE)
-            )
-            pg.draw.rect(screen, self.body_color, rect)
-            pg.draw.rect(screen, BORDER_COLOR, rect, 1)
-
-        # Отрисовка головы змейки
-        head_rect = pg.Rect(
-            (self.positions[0][0] * GRID_SIZE,
-             self.positions[0][1] * GRID_SIZE),
-            (GRID_SIZE, GRID_SIZE)
-        )
-        pg.draw.rect(screen, self.body_color, head_rect)
-        pg.draw.rect(screen, BORDER_COLOR, head_rect, 1)
-
-    # Затирание последнего сегмента
-        if self.last:
-            last_rect = pg.Rect(self.last, (GRID_SIZE, GRID_SIZE))
-            pg.draw.rect(screen, BOARD_BACKGROUND_COLOR, last_rect)
+            draw_cell(position, self.body_color)
 
     def update_direction(self):
         """
@@ -185,166 +630,1725 @@ class Snake(GameObject):
         Move the snake in the current direction.
 
         Updates the position of the snake and manages its length.
+        The tail is released before the head moves, so entering the cell
+        the tail has just left is not a collision.
         """
         self.update_direction()
         head_x, head_y = self.get_head_position()
         dir_x, dir_y = self.direction
-        new_x = (head_x + dir_x) % GRID_WIDTH
-        new_y = (head_y + dir_y) % GRID_HEIGHT
+        new_x = (head_x + dir_x) % self.grid.width
+        new_y = (head_y + dir_y) % self.grid.height
 
         new_head = (new_x, new_y)
-        self.positions.insert(0, new_head)
-
-        if len(self.positions) > self.length:
+        if len(self.positions) >= self.length:
             self.last = self.positions.pop()
+            self.occupied.discard(self.last)
         else:
             self.last = None
 
-    def reset(self):
+        self.collided = new_head in self.occupied
+        self.positions.appendleft(new_head)
+        self.occupied.add(new_head)
+
+    def reset(self, rng=None):
         """
         Reset the snake to its initial state.
 
         Clears the positions and resets the length and direction.
+
+        Args:
+            rng (random.Random, optional): Source of randomness for the new
+                direction, the global ``random`` module by default.
         """
-        self.positions = [self.position]
+        self.positions = deque([self.position])
+        self.occupied = {self.position}
         self.length = 1
-        self.direction = choice([UP, DOWN, LEFT, RIGHT])
+        self.direction = (rng or random).choice(DIRECTIONS)
         self.next_direction = None
         self.last = None
+        self.collided = False
+
+
+class PackedSnake(GameObject):
+    """
+    Snake with the body packed into integer cells.
+
+    A cell is ``y * width + x``. The body is a ring buffer in an
+    ``array('I')``, 4 bytes per segment, with unused slots set to EMPTY.
+    Collisions are found through the cheapest index for the length of the
+    body: up to SCAN_LENGTH segments by scanning that array in C, then
+    through a set of the covered cells, and once the set would take more
+    memory than a bit set of the board (one bit per cell, SET_CELL_BYTES
+    per cell of the set) through the bit set. ``positions`` and
+    ``occupied`` are read-only views that behave like those of Snake, so
+    the renderer and the game rules work with either class; ``move``
+    follows the same rules.
+
+    Attributes:
+        cells (array): Ring buffer of the body cells.
+        index (set): Covered cells while the snake is of medium length,
+            None otherwise.
+        bits (bytearray): Bit set of the covered cells, None while the
+            snake is short.
+        length (int): Target length of the snake.
+        direction (tuple): Current direction.
+        next_direction (tuple): Direction to apply on the next move.
+        collided (bool): Whether the last move hit the body.
+    """
+
+    EMPTY = 0xFFFFFFFF
+    SCAN_LENGTH = 32  # До этой длины тело проверяется перебором массива
+    SET_CELL_BYTES = 64  # Примерный расход памяти на клетку во множестве
+
+    __slots__ = ('grid', 'cells', 'index', 'bits', 'head', 'size', 'length',
+                 'direction', 'next_direction', 'collided', '_last')
+
+    def __init__(self, body_color=SNAKE_COLOR, position=None, grid=None):
+        """
+        Initialize the snake, like Snake.
+
+        Args:
+            body_color (tuple): RGB color for the snake.
+            position (tuple): Initial position, the center by default.
+            grid (GridConfig): The board, DEFAULT_GRID by default.
+        """
+        self.grid = grid or DEFAULT_GRID
+        if position is None:
+            position = self.grid.center
+        super().__init__(body_color=body_color, position=position)
+        self.direction = RIGHT
+        self._clear()
+
+    @property
+    def positions(self):
+        """Get the body as (x, y) positions, head first."""
+        return PackedPositions(self)
+
+    @property
+    def occupied(self):
+        """Get the set-like view of the occupied positions."""
+        return PackedOccupancy(self)
+
+    @property
+    def last(self):
+        """Get the position vacated by the last move, or None."""
+        return None if self._last < 0 else self.to_position(self._last)
+
+    def to_cell(self, position):
+        """Convert an (x, y) position to a cell number."""
+        return position[1] * self.grid.width + position[0]
+
+    def to_position(self, cell):
+        """Convert a cell number to an (x, y) position."""
+        positions = self.grid.topology.positions
+        if positions is not None:
+            return positions[cell]
+        return cell % self.grid.width, cell // self.grid.width
+
+    def cell_at(self, index):
+        """Get the cell of the segment ``index``, 0 being the head."""
+        return self.cells[(self.head - index) % len(self.cells)]
+
+    def is_occupied(self, cell):
+        """Check whether the body covers the cell."""
+        if self.bits is not None:
+            return self.bits[cell >> 3] >> (cell & 7) & 1 == 1
+        if self.index is not None:
+            return cell in self.index
+        return cell in self.cells
+
+    def update_index(self):
+        """Switch to the set or the bit set as the body grows."""
+        if self.bits is not None:
+            return
+        if self.grid.cells // 8 <= self.size * self.SET_CELL_BYTES:
+            self.bits = bytearray((self.grid.cells + 7) // 8)
+            for index in range(self.size):
+                cell = self.cell_at(index)
+                self.bits[cell >> 3] |= 1 << (cell & 7)
+            self.index = None
+        elif self.index is None and self.size > self.SCAN_LENGTH:
+            self.index = {self.cell_at(index) for index in range(self.size)}
+
+    def draw(self):
+        """Draw the snake on the screen."""
+        if self._last >= 0 and not self.is_occupied(self._last):
+            erase_cell(self.last)
+        for position in self.positions:
+            draw_cell(position, self.body_color)
+
+    def update_direction(self):
+        """Apply the next direction if one is set."""
+        if self.next_direction:
+            self.direction = self.next_direction
+            self.next_direction = None
+
+    def get_head_position(self):
+        """Get the (x, y) position of the head."""
+        return self.to_position(self.cells[self.head])
+
+    def move(self):
+        """Move the snake one cell, with the same rules as Snake.move."""
+        self.update_direction()
+        cells = self.cells
+        head = cells[self.head]
+        cell_steps = self.grid.topology.cell_steps
+        if cell_steps is not None:
+            new_head = cell_steps[self.direction][head]
+        else:
+            width, height = self.grid.width, self.grid.height
+            new_head = ((head // width + self.direction[1]) % height * width
+                        + (head % width + self.direction[0]) % width)
+        self._last = -1
+        if self.size >= self.length:
+            tail = (self.head - self.size + 1) % len(cells)
+            self._last = cells[tail]
+            cells[tail] = self.EMPTY
+            self.size -= 1
+            if self.bits is not None:
+                self.bits[self._last >> 3] &= ~(1 << (self._last & 7)) & 0xFF
+            elif self.index is not None:
+                self.index.discard(self._last)
+
+        self.collided = self.is_occupied(new_head)
+        if self.size == len(cells):
+            self._grow()
+        self.head = (self.head + 1) % len(self.cells)
+        self.cells[self.head] = new_head
+        self.size += 1
+        if self.bits is not None:
+            self.bits[new_head >> 3] |= 1 << (new_head & 7)
+            return
+        if self.index is not None:
+            self.index.add(new_head)
+        self.update_index()
+
+    def reset(self, rng=None):
+        """Reset the snake to its initial state, like Snake.reset."""
+        self._clear()
+        self.direction = (rng or random).choice(DIRECTIONS)
+
+    def _clear(self):
+        self.cells = array('I', [self.to_cell(self.position)])
+        self.index = None
+        self.bits = None
+        self.head = 0
+        self.size = 1
+        self.length = 1
+        self.next_direction = None
+        self._last = -1
+        self.collided = False
+        self.update_index()
+
+    def _grow(self):
+        # Буфер заполнен: тело от хвоста к голове, затем столько же места
+        body = [self.cell_at(index) for index in range(self.size - 1, -1, -1)]
+        self.cells = array('I', body)
+        self.cells.extend([self.EMPTY] * self.size)
+        self.head = self.size - 1
+
+
+class PackedPositions:
+    """Read-only sequence of the (x, y) positions of a PackedSnake."""
+
+    __slots__ = ('snake',)
+
+    def __init__(self, snake):
+        """Create a view of the snake's body."""
+        self.snake = snake
+
+    def __len__(self):
+        """Get the number of segments."""
+        return self.snake.size
+
+    def __getitem__(self, index):
+        """Get the position of a segment, 0 being the head."""
+        size = self.snake.size
+        if not -size <= index < size:
+            raise IndexError('Нет такого сегмента змейки')
+        return self.snake.to_position(self.snake.cell_at(index % size))
+
+    def __iter__(self):
+        """Iterate over the positions from the head to the tail."""
+        snake = self.snake
+        for index in range(snake.size):
+            yield snake.to_position(snake.cell_at(index))
+
+
+class PackedOccupancy:
+    """Read-only set-like view of the cells covered by a PackedSnake."""
+
+    __slots__ = ('snake',)
+
+    def __init__(self, snake):
+        """Create a view of the snake's occupied cells."""
+        self.snake = snake
+
+    def __contains__(self, position):
+        """Check whether the body covers the position."""
+        return self.snake.is_occupied(self.snake.to_cell(position))
+
+    def __iter__(self):
+        """Iterate over the covered positions."""
+        return iter(set(self.snake.positions))
+
+    def __len__(self):
+        """Get the number of covered cells."""
+        return len(set(self.snake.positions))
 
 
 class GameInfo:
     """Класс для отображения игровой информации в правой панели"""
 
+    __slots__ = ('panel_rect', 'panel_color', 'score', 'best')
+
     def __init__(self):
-        self.font = pg.font.Font(None, 30)
         self.panel_rect = pg.Rect(
             GAME_WIDTH, 0, INFO_PANEL_WIDTH, SCREEN_HEIGHT)
         self.panel_color = PANEL_COLOR  # Темно-серый цвет панели
         self.score = 0
+        self.best = None  # Рекорд из таблицы рекордов, если она ведётся
 
-    def draw(self, snake_length, score):
-        """Отрисовка информационной панели"""
-        # Рисуем фон панели
-        pg.draw.rect(screen, self.panel_color, self.panel_rect)
-        separator = pg.Rect(GAME_WIDTH - 1, 0, 2, SCREEN_HEIGHT)
-        pg.draw.rect(screen, SEP_COLOR, separator)
-
-        # Отступы для текста
-        x_pos = GAME_WIDTH + 20
-        y_pos = 20
-        line_height = 40
-
-        # Заголовок
-        title = self.font.render('Статистика', True, FONT_COLOR)
-        screen.blit(title, (x_pos, y_pos))
-        y_pos += line_height
-
-        # Длина змейки
-        length_text = self.font.render(
-            f'Длина: {snake_length}', True, FONT_COLOR)
-        screen.blit(length_text, (x_pos, y_pos))
-        y_pos += line_height
-
-        # Очки
-        score_text = self.font.render(f'Очки: {score}', True, FONT_COLOR)
-        screen.blit(score_text, (x_pos, y_pos))
-        y_pos += line_height
+    def draw(self, snake_length, score, extra_lines=(), best=None):
+        """
+        Отрисовка информационной панели
+
+        Args:
+            snake_length (int): Длина змейки.
+            score (int): Очки.
+            extra_lines (iterable, optional): Дополнительные строки мелким
+                шрифтом, например показатели профилировщика.
+            best (int, optional): Рекорд; строка не выводится, если None.
+        """
+        # Фон панели и заголовок берём из готового фона
+        screen.blit(render_cache.background(), self.panel_rect,
+                    self.panel_rect)
+
+        y_pos = INFO_TEXT_TOP + INFO_LINE_HEIGHT
+        lines = [f'Длина: {snake_length}', f'Очки: {score}']
+        if best is not None:
+            lines.append(f'Рекорд: {best}')
+        for line in lines:
+            screen.blit(render_cache.text(line), (INFO_TEXT_X, y_pos))
+            y_pos += INFO_LINE_HEIGHT
+
+        for line in extra_lines:
+            screen.blit(render_cache.text(line, size=PROFILE_FONT_SIZE),
+                        (INFO_TEXT_X, y_pos))
+            y_pos += PROFILE_LINE_HEIGHT
 
     def reset(self):
         """Reset the game info to initial state."""
         self.score = 0
 
 
+GameState = namedtuple('GameState', 'head length apple score')
+
+
+class SnakeGame:
+    """
+    Headless game engine: the rules of the game without display or clock.
+
+    Attributes:
+        snake (Snake): The player's snake.
+        apple (Apple): The apple on the board.
+        free_cells (FreeCells): Cells not covered by the snake.
+        info (GameInfo): Score keeping.
+        ticks (int): Number of steps made since the last reset.
+        cause (str): Why the game ended, None while it is running.
+        seed (int): Seed of the current game.
+        rng (random.Random): Source of randomness of this game.
+        recorder (ReplayRecorder): Records the moves when recording is on.
+        profiler (FrameProfiler): Times the move and apple phases when set.
+        telemetry (TelemetryWriter): Receives the game events when set.
+        grid (GridConfig): Size of the board.
+    """
+
+    def __init__(self, seed=None, record=False, grid=None, telemetry=None):
+        """
+        Create a new game with a fresh snake and apple.
+
+        Args:
+            seed (int, optional): Seed of the game's random generator. Games
+                with the same seed and actions play out identically.
+            record (bool): Record the moves of every game for a replay.
+            grid (GridConfig, optional): Size of the board, DEFAULT_GRID by
+                default.
+            telemetry (TelemetryWriter, optional): Stream of game events:
+                game starts, apples, ends and the time of every step.
+        """
+        self.grid = grid or DEFAULT_GRID
+        self.record = record
+        self.profiler = None
+        self.telemetry = telemetry
+        self.info = GameInfo()
+        self.new_game(seed)
+
+    def new_game(self, seed=None):
+        """
+        Start a game from scratch, exactly as ``SnakeGame(seed)`` would.
+
+        Args:
+            seed (int, optional): Seed of the game, random by default.
+        """
+        if seed is None:
+            seed = random.getrandbits(63)
+        self.seed = seed
+        self.rng = random.Random(seed)
+        self.snake = Snake(grid=self.grid)
+        self.free_cells = FreeCells.for_board(self.snake.occupied, self.grid)
+        self.apple = Apple(free_cells=self.free_cells, rng=self.rng,
+                           grid=self.grid)
+        self.info.reset()
+        self.ticks = 0
+        self.cause = None
+        self.recorder = (ReplayRecorder(seed, self.grid) if self.record
+                         else None)
+        self._emit_start()
+
+    def replay(self):
+        """
+        Get the replay of the current game.
+
+        Returns:
+            Replay: The recorded moves and the score so far.
+        """
+        return self.recorder.finish(self.info.score)
+
+    @property
+    def state(self):
+        """
+        Get a compact view of the current game state.
+
+        Returns:
+            GameState: Head position, length, apple position and score.
+        """
+        return GameState(self.snake.get_head_position(), self.snake.length,
+                         self.apple.position, self.info.score)
+
+    def step(self, action=None):
+        """
+        Advance the game by one tick.
+
+        Args:
+            action (tuple, optional): New direction for the snake. Reversals
+                are ignored the same way ``handle_keys`` ignores them.
+
+        Returns:
+            tuple: ``(state, reward, done)`` after the move.
+        """
+        if self.telemetry is None:
+            return self._step(action)
+        start = time.perf_counter_ns()
+        state, reward, done = self._step(action)
+        self._emit_step(reward, done, time.perf_counter_ns() - start)
+        return state, reward, done
+
+    def _step(self, action):
+        snake = self.snake
+        if action is not None and action != opposite(snake.direction):
+            snake.next_direction = action
+        snake.move()
+        self.ticks += 1
+        if self.recorder is not None:
+            self.recorder.record(snake.direction)
+
+        head = snake.get_head_position()
+        if snake.last is not None:
+            self.free_cells.add(snake.last)
+        if self.profiler is not None:
+            self.profiler.mark('move')
+            self.profiler.count_tick()
+        if snake.collided:
+            self.cause = CAUSE_COLLISION
+            return self.state, 0, True
+
+        self.free_cells.remove(head)
+        reward = 0
+        if head == self.apple.position:
+            snake.length += 1
+            self.info.score += APPLE_REWARD
+            reward = APPLE_REWARD
+            if self.free_cells:
+                self.apple.randomize_position(free_cells=self.free_cells,
+                                              rng=self.rng)
+            else:
+                self.cause = CAUSE_WIN
+        if self.profiler is not None:
+            self.profiler.mark('apple')
+        return self.state, reward, self.cause is not None
+
+    def snapshot(self):
+        """Pack the current state into a GameSnapshot."""
+        # snapshot сам импортирует the_snake, поэтому импорт здесь
+        from snapshot import GameSnapshot
+        return GameSnapshot.capture(self)
+
+    def restore(self, snapshot):
+        """Return the game to the state of a GameSnapshot, unrecorded."""
+        snapshot.restore(self)
+
+    def clone(self):
+        """
+        Get an independent copy of the game, e.g. for lookahead.
+
+        Returns:
+            SnakeGame: A game that plays out exactly like this one.
+        """
+        from snapshot import GameSnapshot
+        return GameSnapshot.capture(self).restore()
+
+    def reset(self):
+        """
+        Start a new game after the previous one has ended.
+
+        A recording game starts from a new seed drawn from its generator,
+        with a new recorder, so that every game has its own replay.
+        """
+        if self.record:
+            self.new_game(self.rng.getrandbits(63))
+            return
+        for cell in self.snake.positions:
+            self.free_cells.add(cell)
+        self.snake.reset(self.rng)
+        self.free_cells.remove(self.snake.get_head_position())
+        self.apple.randomize_position(free_cells=self.free_cells,
+                                      rng=self.rng)
+        self.info.reset()
+        self.ticks = 0
+        self.cause = None
+        self._emit_start()
+
+    def _emit_start(self):
+        if self.telemetry is not None:
+            self.telemetry.emit('game_start', seed=self.seed,
+                                width=self.grid.width,
+                                height=self.grid.height)
+
+    def _emit_step(self, reward, done, step_ns):
+        telemetry = self.telemetry
+        telemetry.emit('tick', tick=self.ticks, step_ns=step_ns)
+        if reward:
+            telemetry.emit('apple', tick=self.ticks, score=self.info.score,
+                           length=self.snake.length)
+        if done:
+            telemetry.emit('game_over', cause=self.cause, tick=self.ticks,
+                           score=self.info.score, length=self.snake.length)
+
+
+class ReplayMismatchError(Exception):
+    """Raised when a replay does not reproduce its recorded result."""
+
+
+class Replay:
+    """
+    Compact record of one game: the seed and the moves made.
+
+    The direction of every tick is run-length encoded. The binary form is
+    a little-endian header (magic, version, seed, ticks, score, number of
+    runs, board width and height) followed by the runs, each a direction
+    code byte and a varint run length. Version 1 files have no board size
+    and are played on the default board.
+
+    Attributes:
+        seed (int): Seed of the game.
+        runs (list): ``(direction code, number of ticks)`` pairs.
+        ticks (int): Number of recorded ticks.
+        score (int): Score at the end of the recording.
+        width (int): Board width of the game.
+        height (int): Board height of the game.
+    """
+
+    MAGIC = b'SNKR'
+    VERSION = 2
+    HEADER = struct.Struct('<4sBQIII')
+    BOARD = struct.Struct('<II')
+
+    def __init__(self, seed, runs=(), ticks=0, score=0, width=GRID_WIDTH,
+                 height=GRID_HEIGHT):
+        """Initialize the replay."""
+        self.seed = seed
+        self.runs = [tuple(run) for run in runs]
+        self.ticks = ticks
+        self.score = score
+        self.width = width
+        self.height = height
+
+    def directions(self):
+        """Iterate over the direction of every tick."""
+        for code, count in self.runs:
+            direction = DIRECTIONS[code]
+            for _ in range(count):
+                yield direction
+
+    def new_game(self):
+        """Create the game the replay starts from, on its board."""
+        grid = DEFAULT_GRID
+        if (self.width, self.height) != (grid.width, grid.height):
+            grid = GridConfig(self.width, self.height)
+        return SnakeGame(self.seed, grid=grid)
+
+    def play(self):
+        """
+        Play the replay headless, as fast as possible.
+
+        Returns:
+            SnakeGame: The game after the last recorded tick.
+        """
+        game = self.new_game()
+        for direction in self.directions():
+            game.step(direction)
+        return game
+
+    def verify(self):
+        """
+        Play the replay and check that it reproduces the recorded score.
+
+        Returns:
+            SnakeGame: The game after the last recorded tick.
+
+        Raises:
+            ReplayMismatchError: If the final score or ticks differ.
+        """
+        return self.check(self.play())
+
+    def check(self, game):
+        """
+        Check that a game played from the replay reproduced its result.
+
+        Returns:
+            SnakeGame: The game.
+
+        Raises:
+            ReplayMismatchError: If the final score or ticks differ.
+        """
+        if (game.info.score, game.ticks) != (self.score, self.ticks):
+            raise ReplayMismatchError(
+                f'Ожидалось {self.score} очков за {self.ticks} ходов, '
+                f'получено {game.info.score} очков за {game.ticks} ходов')
+        return game
+
+    def to_bytes(self):
+        """Encode the replay into its binary form."""
+        data = bytearray(self.HEADER.pack(
+            self.MAGIC, self.VERSION, self.seed, self.ticks, self.score,
+            len(self.runs)))
+        data += self.BOARD.pack(self.width, self.height)
+        for code, count in self.runs:
+            data.append(code)
+            while count >= 0x80:
+                data.append(count & 0x7F | 0x80)
+                count >>= 7
+            data.append(count)
+        return bytes(data)
+
+    @classmethod
+    def from_bytes(cls, data):
+        """Decode a replay from its binary form."""
+        magic, version, seed, ticks, score, run_count = cls.HEADER.unpack_from(
+            data)
+        if magic != cls.MAGIC or version not in (1, cls.VERSION):
+            raise ValueError('Неизвестный формат записи игры')
+        board = GRID_WIDTH, GRID_HEIGHT
+        offset = cls.HEADER.size
+        if version > 1:
+            board = cls.BOARD.unpack_from(data, offset)
+            offset += cls.BOARD.size
+        runs = []
+        for _ in range(run_count):
+            code = data[offset]
+            count = shift = 0
+            while True:
+                offset += 1
+                byte = data[offset]
+                count |= (byte & 0x7F) << shift
+                shift += 7
+                if byte < 0x80:
+                    break
+            offset += 1
+            runs.append((code, count))
+        return cls(seed, runs, ticks, score, *board)
+
+    def save(self, path):
+        """Write the replay to a file."""
+        Path(path).write_bytes(self.to_bytes())
+
+    @classmethod
+    def load(cls, path):
+        """Read a replay from a file."""
+        return cls.from_bytes(Path(path).read_bytes())
+
+
+class ReplayRecorder:
+    """Collects the moves of a game into run-length encoded runs."""
+
+    def __init__(self, seed, grid=None):
+        """Start recording a game with the given seed and board."""
+        self.seed = seed
+        self.grid = grid or DEFAULT_GRID
+        self.runs = []
+        self.ticks = 0
+
+    def record(self, direction):
+        """Record the direction the snake moved in on this tick."""
+        code = DIRECTION_CODES[direction]
+        if self.runs and self.runs[-1][0] == code:
+            self.runs[-1][1] += 1
+        else:
+            self.runs.append([code, 1])
+        self.ticks += 1
+
+    def finish(self, score):
+        """
+        Build the replay of the moves recorded so far.
+
+        Args:
+            score (int): Score reached by the game.
+
+        Returns:
+            Replay: The replay.
+        """
+        return Replay(self.seed, self.runs, self.ticks, score,
+                      self.grid.width, self.grid.height)
+
+
+def opposite(direction):
+    """
+    Get the direction opposite to the given one.
+
+    Args:
+        direction (tuple): Direction of movement.
+
+    Returns:
+        tuple: The reversed direction.
+    """
+    return -direction[0], -direction[1]
+
+
+def wrapped_distance(first, second, width, height):
+    """
+    Get the number of moves between two cells of a board with wrapped edges.
+
+    Args:
+        first (tuple): The (x, y) position of one cell.
+        second (tuple): The (x, y) position of the other cell.
+        width (int): Board width in cells.
+        height (int): Board height in cells.
+
+    Returns:
+        int: The Manhattan distance, going over the edges where shorter.
+    """
+    dx = (first[0] - second[0]) % width
+    dy = (first[1] - second[1]) % height
+    return min(dx, width - dx) + min(dy, height - dy)
+
+
+def percentile(values, q):
+    """
+    Get a percentile of a sample by the nearest-rank method.
+
+    Args:
+        values (iterable): The sample, in any order.
+        q (float): Percentile from 0 to 100.
+
+    Returns:
+        float: The value at the percentile, 0 for an empty sample.
+    """
+    values = sorted(values)
+    if not values:
+        return 0.0
+    return values[min(len(values) - 1, int(len(values) * q / 100))]
+
+
+class Camera:
+    """
+    The part of the board shown on the screen.
+
+    The view is ``grid.view_width`` x ``grid.view_height`` cells starting
+    at ``(x, y)`` and wraps around the edges of the board like the snake
+    does. Along an axis where the whole board fits on the screen the view
+    never moves.
+
+    Attributes:
+        x (int): Leftmost visible column.
+        y (int): Topmost visible row.
+        width (int): Number of visible columns.
+        height (int): Number of visible rows.
+    """
+
+    def __init__(self, grid=None):
+        """
+        Initialize the camera centered on the middle of the board.
+
+        Args:
+            grid (GridConfig, optional): The board.
+        """
+        self.grid = grid or DEFAULT_GRID
+        self.width = self.grid.view_width
+        self.height = self.grid.view_height
+        self.margin = min(CAMERA_MARGIN, self.width // 4, self.height // 4)
+        self.x = self.y = 0
+        self.center_on(self.grid.center)
+
+    def center_on(self, position):
+        """Move the view so that the position is in its middle."""
+        self.x = self._center(self.x, position[0], self.width,
+                              self.grid.width)
+        self.y = self._center(self.y, position[1], self.height,
+                              self.grid.height)
+
+    def follow(self, position):
+        """
+        Recenter the view when the position comes close to its edge.
+
+        Returns:
+            bool: True if the view has moved.
+        """
+        old = self.x, self.y
+        if not self._inside(position[0], self.x, self.width, self.grid.width):
+            self.x = self._center(self.x, position[0], self.width,
+                                  self.grid.width)
+        if not self._inside(position[1], self.y, self.height,
+                            self.grid.height):
+            self.y = self._center(self.y, position[1], self.height,
+                                  self.grid.height)
+        return (self.x, self.y) != old
+
+    def to_screen(self, position):
+        """
+        Get the screen cell of a board position.
+
+        Returns:
+            tuple: ``(column, row)`` on the screen, None if not visible.
+        """
+        column = (position[0] - self.x) % self.grid.width
+        row = (position[1] - self.y) % self.grid.height
+        if column < self.width and row < self.height:
+            return column, row
+        return None
+
+    def visible(self):
+        """Iterate over ``(board position, screen cell)`` of the view."""
+        grid = self.grid
+        for row in range(self.height):
+            y = (self.y + row) % grid.height
+            for column in range(self.width):
+                yield ((self.x + column) % grid.width, y), (column, row)
+
+    def _inside(self, coordinate, start, view, size):
+        offset = (coordinate - start) % size
+        return self.margin <= offset < view - self.margin
+
+    @staticmethod
+    def _center(start, coordinate, view, size):
+        # Вдоль оси, которая целиком помещается на экране, вид не двигается
+        if view < size:
+            return (coordinate - view // 2) % size
+        return start
+
+
+class Renderer:
+    """
+    Draws a SnakeGame on the screen.
+
+    In incremental mode only the cells changed since the previous frame
+    are repainted: the new heads and vacated tail cells recorded by
+    ``track``, the apple and the panel when its numbers change. Only
+    those rectangles are passed to ``pg.display.update``.
+
+    Boards larger than the game field are drawn through a Camera that
+    follows the head; when the view moves the whole field is repainted.
+    """
+
+    def __init__(self, game, incremental=True, profiler=None,
+                 offscreen=False):
+        """
+        Initialize the renderer.
+
+        Args:
+            game (SnakeGame): The game to draw.
+            incremental (bool): Repaint only changed cells when True.
+            profiler (FrameProfiler, optional): Times the drawing phases and
+                provides extra lines for the panel.
+            offscreen (bool): Only draw to ``screen``, without updating the
+                display, e.g. to capture frames with no window open.
+        """
+        self.game = game
+        self.incremental = incremental
+        self.profiler = profiler
+        self.offscreen = offscreen
+        self.camera = Camera(game.grid)
+        self.needs_full_redraw = True
+        self._apple_position = None
+        self._panel_values = None
+        self._dirty = []
+
+    def invalidate(self):
+        """Request a full redraw on the next frame."""
+        self.needs_full_redraw = True
+
+    def track(self):
+        """
+        Remember the cells changed by the last game step.
+
+        Called after every step, so several steps can be drawn in one frame.
+        """
+        snake = self.game.snake
+        self._dirty.append(snake.get_head_position())
+        if snake.last is not None:
+            self._dirty.append(snake.last)
+
+    def draw(self):
+        """
+        Draw the current frame and update the display.
+
+        Returns:
+            list: Updated rectangles, or None after a full redraw.
+        """
+        if self.camera.follow(self.game.snake.get_head_position()):
+            self.needs_full_redraw = True
+        if self.needs_full_redraw or not self.incremental:
+            self.draw_full()
+            rects = None
+            if not self.offscreen:
+                pg.display.update()
+        else:
+            rects = self.draw_changes()
+            if rects and not self.offscreen:
+                pg.display.update(rects)
+        self._mark('display')
+        return rects
+
+    def draw_full(self):
+        """Repaint the whole screen."""
+        game = self.game
+        snake = game.snake
+        size = game.grid.cell_size
+        # Фон, панель и границы поля одним блитом
+        screen.blit(render_cache.background(), (0, 0))
+        # Перебор видимых клеток не зависит ни от размера поля, ни от длины
+        for position, cell in self.camera.visible():
+            if position in snake.occupied:
+                draw_cell(cell, snake.body_color, size)
+        cell = self.camera.to_screen(game.apple.position)
+        if cell is not None:
+            draw_cell(cell, game.apple.body_color, size)
+        self._mark('render')
+        game.info.draw(*self._panel())
+        self._mark('info')
+        self._remember()
+        self._dirty.clear()
+        self.needs_full_redraw = False
+
+    def draw_changes(self):
+        """
+        Repaint the cells changed since the previous frame.
+
+        Returns:
+            list: The repainted rectangles.
+        """
+        game = self.game
+        snake = game.snake
+        size = game.grid.cell_size
+        to_screen = self.camera.to_screen
+        rects = []
+        for position in dict.fromkeys(self._dirty):
+            cell = to_screen(position)
+            if cell is None:
+                continue
+            if position in snake.occupied:
+                rects.append(draw_cell(cell, snake.body_color, size))
+            else:
+                rects.append(erase_cell(cell, size))
+        self._dirty.clear()
+        if game.apple.position != self._apple_position:
+            cell = to_screen(game.apple.position)
+            if cell is not None:
+                rects.append(draw_cell(cell, game.apple.body_color, size))
+        self._mark('render')
+        if self._panel() != self._panel_values:
+            game.info.draw(*self._panel())
+            rects.append(game.info.panel_rect)
+            self._mark('info')
+        self._remember()
+        return rects
+
+    def _panel(self):
+        game = self.game
+        extra_lines = self.profiler.lines if self.profiler is not None else ()
+        best = game.info.best
+        if best is not None:
+            best = max(best, game.info.score)
+        return game.snake.length, game.info.score, extra_lines, best
+
+    def _remember(self):
+        self._apple_position = self.game.apple.position
+        self._panel_values = self._panel()
+
+    def _mark(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+
+
+class TickScheduler:
+    """
+    Fixed-timestep scheduler for the game logic.
+
+    The game advances ``tick_rate`` times per second no matter how often
+    frames are drawn. When a frame takes longer than a tick, the missed
+    ticks are run on the next frame (late ticks), up to ``max_catch_up``;
+    ticks beyond that are dropped so a slow display cannot snowball.
+
+    Attributes:
+        ticks (int): Ticks run so far.
+        late_ticks (int): Ticks run later than their scheduled frame.
+        dropped_ticks (int): Ticks skipped to catch up.
+    """
+
+    def __init__(self, tick_rate=SPEED, max_catch_up=MAX_CATCH_UP_TICKS,
+                 time_func=time.perf_counter):
+        """
+        Initialize the scheduler.
+
+        Args:
+            tick_rate (float): Logical ticks per second.
+            max_catch_up (int): Maximum number of ticks run in one frame.
+            time_func (callable): Clock returning seconds.
+        """
+        self.tick_time = 1 / tick_rate
+        self.max_catch_up = max_catch_up
+        self.time_func = time_func
+        self.ticks = 0
+        self.late_ticks = 0
+        self.dropped_ticks = 0
+        self.reset()
+
+    def reset(self):
+        """Restart timing, e.g. after a pause, without catching up."""
+        self._last_time = self.time_func()
+        self._accumulator = 0.0
+
+    def ticks_due(self):
+        """
+        Get the number of ticks to run in the current frame.
+
+        Returns:
+            int: Number of game steps to make now.
+        """
+        now = self.time_func()
+        self._accumulator += now - self._last_time
+        self._last_time = now
+        due = int(self._accumulator // self.tick_time)
+        self._accumulator -= due * self.tick_time
+        if due > self.max_catch_up:
+            self.dropped_ticks += due - self.max_catch_up
+            due = self.max_catch_up
+        if due > 1:
+            self.late_ticks += due - 1
+        self.ticks += due
+        return due
+
+    def stats(self):
+        """
+        Get the tick counters.
+
+        Returns:
+            dict: Ticks run, late and dropped.
+        """
+        return {'ticks': self.ticks, 'late_ticks': self.late_ticks,
+                'dropped_ticks': self.dropped_ticks}
+
+
+class FrameProfiler:
+    """
+    Low-overhead timing of the phases of every frame.
+
+    ``mark(phase)`` adds the time since the previous mark to the phase, so
+    a frame is timed by a ``begin_frame`` call, a mark after each phase and
+    an ``end_frame`` call. Frame times of the last ``window`` frames give
+    the rolling percentiles; phase means are refreshed for the panel every
+    ``PROFILE_REFRESH_FRAMES`` frames.
+
+    Attributes:
+        totals (dict): Nanoseconds spent in each phase since the start.
+        frames (int): Frames profiled.
+        ticks (int): Game ticks counted.
+        lines (tuple): Text lines for the info panel.
+    """
+
+    def __init__(self, target_tick_rate=SPEED, window=PROFILE_WINDOW,
+                 clock_ns=time.perf_counter_ns):
+        """
+        Initialize the profiler.
+
+        Args:
+            target_tick_rate (float): Expected game ticks per second.
+            window (int): Number of recent frames for the percentiles.
+            clock_ns (callable): Clock returning nanoseconds.
+        """
+        self.target_tick_rate = target_tick_rate
+        self.clock_ns = clock_ns
+        self.totals = dict.fromkeys(PROFILE_PHASES, 0)
+        self.frames = 0
+        self.ticks = 0
+        self.lines = ()
+        self.frame_times = deque(maxlen=window)
+        self._tick_samples = deque(maxlen=window)
+        self._period = dict.fromkeys(PROFILE_PHASES, 0)
+        self._period_frames = 0
+        self._frame_start = self._last = clock_ns()
+
+    def begin_frame(self):
+        """Start timing a frame."""
+        self._frame_start = self._last = self.clock_ns()
+
+    def mark(self, phase):
+        """Attribute the time since the previous mark to the phase."""
+        now = self.clock_ns()
+        elapsed = now - self._last
+        self._last = now
+        self.totals[phase] += elapsed
+        self._period[phase] += elapsed
+
+    def count_tick(self):
+        """Count a game tick."""
+        self.ticks += 1
+
+    def end_frame(self):
+        """Finish timing a frame."""
+        now = self.clock_ns()
+        self.frame_times.append(now - self._frame_start)
+        self._tick_samples.append((now, self.ticks))
+        self.frames += 1
+        self._period_frames += 1
+        if self._period_frames >= PROFILE_REFRESH_FRAMES:
+            self.lines = self._format_lines()
+            self._period = dict.fromkeys(PROFILE_PHASES, 0)
+            self._period_frames = 0
+
+    def percentile(self, q):
+        """
+        Get a percentile of the recent frame times.
+
+        Args:
+            q (float): Percentile from 0 to 100.
+
+        Returns:
+            float: Frame time in milliseconds.
+        """
+        return percentile(self.frame_times, q) / 1e6
+
+    def tick_rate(self):
+        """Get the actual game ticks per second over the recent frames."""
+        if len(self._tick_samples) < 2:
+            return 0.0
+        (start, first), (end, last) = (self._tick_samples[0],
+                                       self._tick_samples[-1])
+        return (last - first) * 1e9 / max(end - start, 1)
+
+    def summary(self):
+        """
+        Get all collected metrics.
+
+        Returns:
+            dict: Frame percentiles, tick rates and phase times.
+        """
+        frames = max(self.frames, 1)
+        return {
+            'frames': self.frames,
+            'ticks': self.ticks,
+            'frame_p50_ms': self.percentile(50),
+            'frame_p99_ms': self.percentile(99),
+            'frame_max_ms': max(self.frame_times, default=0) / 1e6,
+            'tick_rate': self.tick_rate(),
+            'target_tick_rate': self.target_tick_rate,
+            'phase_total_ms': {phase: total / 1e6
+                               for phase, total in self.totals.items()},
+            'phase_mean_ms': {phase: total / 1e6 / frames
+                              for phase, total in self.totals.items()},
+        }
+
+    def export(self, path):
+        """Write the metrics to a JSON file."""
+        Path(path).write_text(json.dumps(self.summary(), indent=2))
+
+    def _format_lines(self):
+        frames = self._period_frames
+        lines = [f'p50: {self.percentile(50):.1f} мс',
+                 f'p99: {self.percentile(99):.1f} мс',
+                 f'ходы/с: {self.tick_rate():.1f} / {self.target_tick_rate}']
+        for phase in PROFILE_PHASES:
+            mean = self._period[phase] / frames / 1e6
+            lines.append(f'{phase}: {mean:.2f} мс')
+        return tuple(lines)
+
+
+class InputQueue:
+    """
+    Bounded queue of turns pressed by the player.
+
+    Each tick consumes at most one turn, so quick presses within one tick
+    are not lost. A turn is checked against the last queued direction, so
+    a fast sequence of presses can't add up to a reversal.
+
+    Attributes:
+        dropped (int): Presses rejected because the queue was full.
+        latencies (deque): Recent press-to-move delays in seconds.
+    """
+
+    def __init__(self, maxlen=INPUT_QUEUE_SIZE, time_func=time.perf_counter):
+        """
+        Initialize an empty queue.
+
+        Args:
+            maxlen (int): Maximum number of pending turns.
+            time_func (callable): Clock returning seconds.
+        """
+        self.maxlen = maxlen
+        self.time_func = time_func
+        self.turns = deque()
+        self.dropped = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+
+    def __len__(self):
+        """Get the number of pending turns."""
+        return len(self.turns)
+
+    def push(self, direction, current_direction):
+        """
+        Queue a turn.
+
+        Args:
+            direction (tuple): The pressed direction.
+            current_direction (tuple): Direction of the snake right now.
+
+        Returns:
+            bool: True if the turn was queued.
+        """
+        last = self.turns[-1][0] if self.turns else current_direction
+        if direction in (last, opposite(last)):
+            return False
+        if len(self.turns) >= self.maxlen:
+            self.dropped += 1
+            return False
+        self.turns.append((direction, self.time_func()))
+        return True
+
+    def apply(self, snake):
+        """Hand the next pending turn to the snake right before it moves."""
+        if self.turns:
+            direction, pressed_at = self.turns.popleft()
+            snake.next_direction = direction
+            self.latencies.append(self.time_func() - pressed_at)
+
+    def clear(self):
+        """Drop the pending turns."""
+        self.turns.clear()
+
+    def stats(self):
+        """
+        Get the input latency statistics.
+
+        Returns:
+            dict: Mean and max press-to-move latency in milliseconds and
+            the number of dropped presses.
+        """
+        latencies = self.latencies
+        return {
+            'latency_mean_ms': (1000 * sum(latencies) / len(latencies)
+                                if latencies else 0.0),
+            'latency_max_ms': 1000 * max(latencies, default=0.0),
+            'dropped_presses': self.dropped,
+        }
+
+
+def decide(policy, state):
+    """
+    Run a policy on a snake and an apple rebuilt from a packed state.
+
+    The job of the worker of a BackgroundController.
+
+    Args:
+        policy (callable): The policy ``policy(snake, apple)``.
+        state (tuple): The state from ``BackgroundController.pack``.
+
+    Returns:
+        tuple: The chosen direction, None if the policy made no choice.
+    """
+    body, length, direction, next_direction, last, apple, grid = state
+    snake = Snake(position=body[0], grid=grid)
+    snake.positions = deque(body)
+    snake.occupied = set(body)
+    snake.length = length
+    snake.direction = direction
+    snake.next_direction = next_direction
+    snake.last = last
+    policy(snake, Apple(position=apple, grid=grid))
+    return snake.next_direction
+
+
+class BackgroundController:
+    """
+    Runs a policy off the game loop, on a worker thread or process.
+
+    After every step the session calls ``submit`` with the new state. The
+    state goes to the worker packed (see ``pack``), so the frame is not
+    held up while the policy thinks. At the next tick boundary the session
+    calls the controller, which never waits for the worker: a decision
+    that finished within ``deadline`` seconds of the submit is applied to
+    ``next_direction``; one that is still running or finished later is a
+    miss, the snake keeps its direction and the answer is discarded. A
+    policy that raises is treated the same way: the error is counted and
+    the game goes on.
+
+    With a process pool the policy must be importable by name, like the
+    policies of ``tournament``.
+
+    Attributes:
+        policy (callable): The policy ``policy(snake, apple)``.
+        deadline (float): Seconds a decision may take.
+        decisions (int): Decisions applied in time.
+        missed (int): Decisions that missed the deadline.
+        errors (int): Decisions in time whose policy raised.
+        latencies (deque): Recent submit-to-result times in seconds, late
+            decisions included.
+    """
+
+    @staticmethod
+    def pack(snake, apple):
+        """
+        Pack the state the policy sees for the worker.
+
+        The body is a tuple of the position tuples of the snake: they never
+        change, so the copy is of references only and the worker gets a
+        state that later moves cannot touch.
+
+        Returns:
+            tuple: The state for ``decide``.
+        """
+        return (tuple(snake.positions), snake.length, snake.direction,
+                snake.next_direction, snake.last, apple.position, snake.grid)
+
+    def __init__(self, policy, deadline=DECISION_DEADLINE, executor=None,
+                 time_func=time.perf_counter):
+        """
+        Initialize the controller.
+
+        Args:
+            policy (callable): The policy to run in the background.
+            deadline (float): Seconds a decision may take.
+            executor (concurrent.futures.Executor, optional): Where the
+                policy runs, a single worker thread by default.
+            time_func (callable): Clock returning seconds.
+        """
+        self.policy = policy
+        self.deadline = deadline
+        self.time_func = time_func
+        self._own_executor = executor is None
+        self.executor = executor or concurrent.futures.ThreadPoolExecutor(
+            1, thread_name_prefix='controller')
+        self.decisions = 0
+        self.missed = 0
+        self.errors = 0
+        self.latencies = deque(maxlen=LATENCY_SAMPLES)
+        self._future = None
+        self._finished = None
+        self._snake = None
+        self._deadline_at = None
+
+    def submit(self, snake, apple):
+        """Start deciding the next move for the current state."""
+        if self._future is not None:
+            self._future.cancel()
+        state = self.pack(snake, apple)
+        submitted_at = self.time_func()
+        self._snake = snake
+        self._deadline_at = submitted_at + self.deadline
+        finished = self._finished = []
+
+        def done(future):
+            # Вызывается в потоке исполнителя
+            if not future.cancelled():
+                finished.append(self.time_func())
+                self.latencies.append(finished[0] - submitted_at)
+
+        self._future = self.executor.submit(decide, self.policy, state)
+        self._future.add_done_callback(done)
+
+    def __call__(self, snake, apple):
+        """Apply the decision for the current state at the tick boundary."""
+        if self._future is None or snake is not self._snake:
+            # Первый ход или новая игра: решения для этого состояния нет
+            self.submit(snake, apple)
+        future = self._future
+        if not future.done():
+            # Не ждём: змейка идёт прямо, а ответ отменит следующий submit
+            self.missed += 1
+            return
+        self._future = None
+        # Колбэк мог ещё не успеть записать время: тогда решение готово
+        # не позже текущего момента
+        finished_at = (self._finished[0] if self._finished
+                       else self.time_func())
+        if finished_at > self._deadline_at:
+            self.missed += 1
+            return
+        if future.exception() is not None:
+            # Ошибка политики не должна останавливать игровой цикл
+            self.errors += 1
+            return
+        direction = future.result()
+        self.decisions += 1
+        if direction is not None and direction != opposite(snake.direction):
+            snake.next_direction = direction
+
+    def close(self):
+        """Stop the worker if the controller created it."""
+        if self._future is not None:
+            self._future.cancel()
+        if self._own_executor:
+            self.executor.shutdown()
+
+    def stats(self):
+        """
+        Get the decision statistics.
+
+        Returns:
+            dict: Decisions in time, missed deadlines, policy errors and
+            the mean, median, 99th percentile and max decision latency in
+            milliseconds.
+        """
+        latencies = list(self.latencies)
+        return {
+            'decisions': self.decisions,
+            'missed_deadlines': self.missed,
+            'errors': self.errors,
+            'decision_mean_ms': (1000 * sum(latencies) / len(latencies)
+                                 if latencies else 0.0),
+            'decision_p50_ms': 1000 * percentile(latencies, 50),
+            'decision_p99_ms': 1000 * percentile(latencies, 99),
+            'decision_max_ms': 1000 * max(latencies, default=0.0),
+        }
+
+
+# Направления, соответствующие клавишам:
+KEY_DIRECTIONS = {pg.K_UP: UP, pg.K_DOWN: DOWN,
+                  pg.K_LEFT: LEFT, pg.K_RIGHT: RIGHT}
+
+# Клавиши паузы:
+PAUSE_KEYS = (pg.K_p, pg.K_SPACE, pg.K_ESCAPE)
+
+# Типы событий, которые обрабатывает игра:
+HANDLED_EVENTS = (pg.QUIT, pg.KEYDOWN, pg.WINDOWEXPOSED)
+
+# Сообщения поверх поля:
+STATE_MESSAGES = {
+    STATE_PAUSED: 'Pause. Press any key to continue...',
+    STATE_GAME_OVER: 'Game Over. Press any key to continue...',
+}
+
+
+class StateMachine:
+    """
+    State of the game session: playing, paused or game over.
+
+    Attributes:
+        state (str): One of STATE_PLAYING, STATE_PAUSED, STATE_GAME_OVER.
+    """
+
+    def __init__(self):
+        """Start in the playing state."""
+        self.state = STATE_PLAYING
+
+    @property
+    def is_playing(self):
+        """Check whether the game is running."""
+        return self.state == STATE_PLAYING
+
+    def pause(self):
+        """Pause a running game."""
+        if self.state == STATE_PLAYING:
+            self.state = STATE_PAUSED
+
+    def game_over(self):
+        """Stop the game after it has ended."""
+        self.state = STATE_GAME_OVER
+
+    def resume(self):
+        """
+        Return to playing.
+
+        Returns:
+            str: The state the game was resumed from.
+        """
+        previous, self.state = self.state, STATE_PLAYING
+        return previous
+
+
 # Функция обработки действий пользователя
 
 
-def handle_keys(game_object):
-    """Process user input for controlling the game object."""
+def handle_keys(game_object, input_queue=None, machine=None):
+    """
+    Process user input for controlling the game object.
+
+    Args:
+        game_object (Snake): The controlled snake.
+        input_queue (InputQueue, optional): Queue for the turns. Without it
+            the turn is set directly to ``next_direction``.
+        machine (StateMachine, optional): Game state to pause.
+    """
     for event in pg.event.get():
         if event.type == pg.QUIT:
             pg.quit()
             raise SystemExit
-        elif event.type == pg.KEYDOWN:
-            if event.key == pg.K_UP and game_object.direction != DOWN:
-                game_object.next_direction = UP
-            elif event.key == pg.K_DOWN and game_object.direction != UP:
-                game_object.next_direction = DOWN
-            elif event.key == pg.K_LEFT and game_object.direction != RIGHT:
-                game_object.next_direction = LEFT
-            elif event.key == pg.K_RIGHT and game_object.direction != LEFT:
-                game_object.next_direction = RIGHT
+        elif (event.type == pg.KEYDOWN and event.key in PAUSE_KEYS
+              and machine is not None):
+            machine.pause()
+        elif event.type == pg.KEYDOWN and event.key in KEY_DIRECTIONS:
+            direction = KEY_DIRECTIONS[event.key]
+            if input_queue is not None:
+                input_queue.push(direction, game_object.direction)
+            elif direction != opposite(game_object.direction):
+                game_object.next_direction = direction
+
+
+def show_message(text):
+    """Display a message over the game field."""
+    text = render_cache.text(text, size=PAUSE_FONT_SIZE)
+    text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
+    screen.blit(text, text_rect)
+    pg.display.flip()
+
 
+def wait_for_resume(machine):
+    """
+    Block until the player presses a key to continue.
+
+    The process sleeps in ``pg.event.wait`` instead of polling, so a
+    paused or finished game uses no CPU.
 
-def pause_game():
+    Returns:
+        str: The state the game was resumed from.
     """
-    Pause the game until the user presses a key.
+    while True:
+        event = pg.event.wait(IDLE_WAIT_MS)
+        if event.type == pg.QUIT:
+            pg.quit()
+            raise SystemExit
+        elif event.type == pg.KEYDOWN:
+            return machine.resume()
+        elif event.type == pg.WINDOWEXPOSED:
+            pg.display.flip()
 
-    Displays a pause message and waits for user input.
+
+class GameSession:
     """
-    font = pg.font.Font(None, 36)
-    text = font.render(
-        'Game Over. Press any key to continue...', True, (255, 255, 255))
-    text_rect = text.get_rect(center=(SCREEN_WIDTH // 2, SCREEN_HEIGHT // 2))
-    screen.blit(text, text_rect)
-    pg.display.flip()
+    Interactive game: the engine with input, timing, states and drawing.
 
-    waiting = True
-    while waiting:
-        for event in pg.event.get():
-            if event.type == pg.KEYDOWN or event.type == pg.QUIT:
-                waiting = False
+    Attributes:
+        game (SnakeGame): The game engine.
+        renderer (Renderer): Draws the game.
+        scheduler (TickScheduler): Fixed-timestep timing of the ticks.
+        input_queue (InputQueue): The player's turns.
+        machine (StateMachine): Playing, paused or game over.
+        profiler (FrameProfiler): Frame timing, None when not profiling.
+        controller (callable): Steers the snake instead of the player, None
+            when the player is in control.
+        telemetry (TelemetryWriter): Stream of game events, None when off.
+        scores (ScoreStore): High-score table, None when off.
+    """
 
+    def __init__(self, record_dir=None, profiler=None, grid=None,
+                 controller=None, telemetry=None, scores=None):
+        """
+        Set up a new session.
 
-def main():
+        Args:
+            record_dir (str, optional): Directory to save replays of the
+                finished games to.
+            profiler (FrameProfiler, optional): Profiler of the frames.
+            grid (GridConfig, optional): Size of the board and its cells.
+            controller (callable, optional): Policy ``controller(snake,
+                apple)`` called before every tick, like the policies of
+                ``tournament``. A controller with a ``submit(snake, apple)``
+                method, like BackgroundController, also gets the state after
+                every step.
+            telemetry (TelemetryWriter, optional): Stream of game events.
+            scores (ScoreStore, optional): Table that receives the result
+                of every finished game; its best score is shown in the
+                panel.
+        """
+        self.record_dir = record_dir
+        self.profiler = profiler
+        self.controller = controller
+        self._submit = getattr(controller, 'submit', None)
+        self.telemetry = telemetry
+        self.game = SnakeGame(record=record_dir is not None, grid=grid,
+                              telemetry=telemetry)
+        self.scores = scores
+        if scores is not None:
+            self.game.info.best = scores.best()
+        self.game.profiler = profiler
+        self.renderer = Renderer(self.game, profiler=profiler)
+        self.scheduler = TickScheduler(SPEED)
+        self.input_queue = InputQueue()
+        self.machine = StateMachine()
+        if self._submit is not None:
+            # Первое решение считается, пока рисуется первый кадр
+            self._submit(self.game.snake, self.game.apple)
+
+    def run(self):
+        """Run frames until the window is closed."""
+        while True:
+            self.run_frame()
+
+    def run_frame(self):
+        """Process input, run the due ticks and draw one frame."""
+        if not self.machine.is_playing:
+            # Пауза или конец игры: ждём нажатия, не нагружая процессор
+            if wait_for_resume(self.machine) == STATE_GAME_OVER:
+                self.start_new_game()
+            self.renderer.invalidate()
+            self.scheduler.reset()
+            self.input_queue.clear()
+        if self.profiler is not None:
+            self.profiler.begin_frame()
+        # Обработка событий — каждый кадр
+        handle_keys(self.game.snake, self.input_queue, self.machine)
+        self._mark('input')
+        # Ход игры с фиксированным шагом: движение, яблоко, столкновения
+        if self.machine.is_playing:
+            self.run_ticks()
+        # Отрисовка
+        self.renderer.draw()
+        if not self.machine.is_playing:
+            show_message(STATE_MESSAGES[self.machine.state])
+        # Частота кадров не зависит от скорости игры
+        clock.tick(RENDER_FPS)
+        if self.profiler is not None:
+            self.profiler.mark('wait')
+            self.profiler.end_frame()
+
+    def run_ticks(self):
+        """Run the game steps due in the current frame."""
+        game = self.game
+        for _ in range(self.scheduler.ticks_due()):
+            self.input_queue.apply(game.snake)
+            if self.controller is not None:
+                self.controller(game.snake, game.apple)
+            _, _, done = game.step()
+            self.renderer.track()
+            if done:
+                self.machine.game_over()
+                self.save_score()
+                break
+            if self._submit is not None:
+                self._submit(game.snake, game.apple)
+
+    def save_score(self):
+        """Add the result of the finished game to the high-score table."""
+        if self.scores is None:
+            return
+        game = self.game
+        self.scores.add(game.info.score, game.snake.length, game.ticks,
+                        game.seed)
+        game.info.best = self.scores.best()
+
+    def start_new_game(self):
+        """Save the replay of the finished game and start a new one."""
+        # Игра, восстановленная из снимка, не записывается
+        if self.record_dir is not None and self.game.record:
+            path = Path(self.record_dir)
+            path.mkdir(parents=True, exist_ok=True)
+            self.game.replay().save(path / f'snake-{self.game.seed}.rpl')
+        self.game.new_game()
+        if self._submit is not None:
+            self._submit(self.game.snake, self.game.apple)
+
+    def report(self):
+        """Print the timing and input statistics of the session."""
+        stats = self.scheduler.stats()
+        if stats['late_ticks'] or stats['dropped_ticks']:
+            print('Опоздавших ходов: {late_ticks}, '
+                  'пропущенных: {dropped_ticks}'.format(**stats))
+        print('Задержка управления: {latency_mean_ms:.1f} мс в среднем, '
+              '{latency_max_ms:.1f} мс макс., потеряно нажатий: '
+              '{dropped_presses}'.format(**self.input_queue.stats()))
+        if self.telemetry is not None:
+            print('Телеметрия: записано событий {written}, потеряно '
+                  '{dropped}, не записано из-за ошибки '
+                  '{failed}'.format(**self.telemetry.stats()))
+
+    def _mark(self, phase):
+        if self.profiler is not None:
+            self.profiler.mark(phase)
+
+
+def main(record_dir=None, profile_path=None, grid=None,
+         telemetry_path=None, scores_path=None):
     """
     Main game loop.
 
     Handles initialization, event processing, drawing, a
     nd game updates.
-    """
-    # Инициализация PyGame:
-    pg.init()
-    snake = Snake()
-    apple = Apple(occupied_positions=snake.positions)
-    game_info = GameInfo()
 
-    while True:
-        # Обработка событий
-        handle_keys(snake)
-        # Движение змейки
-        snake.move()
-        # Проверка столкновения с яблоком
-        if snake.get_head_position() == apple.position:
-            snake.length += 1
-            game_info.score += 10
-            apple.randomize_position(snake.positions)
-
-        # Проверка столкновения с собой
-        elif snake.get_head_position() in snake.positions[1:]:
-            snake.reset()
-            apple.randomize_position(snake.positions)
-            game_info.reset()
-            pause_game()
-
-        # Отрисовка
-        screen.fill(BOARD_BACKGROUND_COLOR)  # Заливаем всё поле фоном
-        game_info.draw(snake.length, game_info.score)
-        # Отрисовка границ игрового поля
-        game_field_rect = pg.Rect(
-            0,  # X-координата начала
-            0,  # Y-координата начала
-            GAME_WIDTH,  # Ширина
-            SCREEN_HEIGHT  # Высота
-        )
-        pg.draw.rect(screen, FIELD_BORDER_COLOR, game_field_rect, 2)
-        snake.draw()
-        apple.draw()
-        pg.display.update()
-
-        # Контроль скорости
-        clock.tick(SPEED)
+    Args:
+        record_dir (str, optional): Directory to save replays of the
+            finished games to.
+        profile_path (str, optional): Enable the frame profiler, show its
+            numbers in the panel and save them to this file on exit.
+        grid (GridConfig, optional): Size of the board and its cells.
+        telemetry_path (str, optional): Stream the game events to this
+            JSON Lines file.
+        scores_path (str, optional): Keep the high-score table in this file.
+    """
+    # Инициализация PyGame и окна:
+    init_display()
+    profiler = FrameProfiler(SPEED) if profile_path else None
+    telemetry = TelemetryWriter(telemetry_path) if telemetry_path else None
+    scores = ScoreStore(scores_path) if scores_path else None
+    session = GameSession(record_dir, profiler, grid, telemetry=telemetry,
+                          scores=scores)
+    try:
+        session.run()
+    finally:
+        if telemetry is not None:
+            telemetry.close()
+        if scores is not None:
+            scores.close()
+        session.report()
+        if profiler is not None:
+            profiler.export(profile_path)
+
+
+def parse_grid_size(text):
+    """Parse a board size like ``100x100``."""
+    width, _, height = text.partition('x')
+    return int(width), int(height)
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description='Змейка')
+    parser.add_argument('--grid', type=parse_grid_size, metavar='WxH',
+                        default=(GRID_WIDTH, GRID_HEIGHT),
+                        help='board size in cells')
+    parser.add_argument('--cell-size', type=int, default=GRID_SIZE,
+                        help='cell size in pixels')
+    parser.add_argument('--record', metavar='DIR',
+                        help='save replays of finished games to DIR')
+    parser.add_argument('--profile', metavar='FILE',
+                        help='show frame timings and save them to FILE')
+    parser.add_argument('--telemetry', metavar='FILE',
+                        help='write game events to FILE as JSON Lines')
+    parser.add_argument('--scores', metavar='FILE',
+                        help='keep the high-score table in FILE')
+    return parser.parse_args(argv)
 
 
 if __name__ == '__main__':
-    main()
+    args = parse_args()
+    main(record_dir=args.record, profile_path=args.profile,
+         grid=GridConfig(*args.grid, args.cell_size),
+         telemetry_path=args.telemetry, scores_path=args.scores)
@@ -0,0 +1,101 @@
+"""Neighbor tables of a board with wrapped edges, in flat cell numbers.
+
+Cells are numbered ``y * width + x``, as in FreeCells, GameSnapshot and
+PackedSnake. ``Topology.for_size`` returns the shared topology of a board
+size; its tables are built on first use only, so creating boards costs
+nothing until a packed snake actually moves on one::
+
+    cell_steps = Topology.for_size(22, 24).cell_steps
+    head = cell_steps[1, 0][head]    # one cell to the right
+"""
+from array import array
+from collections import OrderedDict
+
+# Смещения к соседям клетки: вверх, вниз, влево, вправо (как UP, DOWN,
+# LEFT и RIGHT в the_snake):
+OFFSETS = ((0, -1), (0, 1), (-1, 0), (1, 0))
+
+# Таблицы строятся для полей не больше этого числа клеток: на больших полях
+# они заняли бы десятки мегабайт, и ход считается по модулю
+MAX_CELLS = 1 << 16
+CACHE_SIZE = 4  # Сколько размеров полей хранят свои таблицы
+
+
+class Topology:
+    """
+    Lazily built tables of a board with wrapped edges.
+
+    ``cell_steps[direction]`` is an ``array('I')`` with the neighbor of
+    every cell in that direction, the wrap around the edges built in, so a
+    move of a cell number is one lookup instead of two divisions, two
+    modulos and a multiplication. ``positions[cell]`` is the (x, y) tuple
+    of every cell, so code that converts cell numbers hands out existing
+    tuples instead of new ones.
+
+    The tables are built on first access and only for boards of up to
+    ``max_cells`` cells; on larger boards both are None and the callers
+    compute the cells themselves. A topology never changes and is shared
+    by all boards of the same size.
+
+    Attributes:
+        width (int): Board width in cells.
+        height (int): Board height in cells.
+        max_cells (int): Largest board that gets tables.
+    """
+
+    _cache = OrderedDict()
+
+    def __init__(self, width, height, max_cells=MAX_CELLS):
+        """Describe a ``width`` x ``height`` board without building tables."""
+        self.width = width
+        self.height = height
+        self.max_cells = max_cells
+        self._cell_steps = None
+        self._positions = None
+
+    @classmethod
+    def for_size(cls, width, height):
+        """Get the shared topology of a board size."""
+        key = width, height
+        topology = cls._cache.get(key)
+        if topology is None:
+            topology = cls._cache[key] = cls(width, height)
+            if len(cls._cache) > CACHE_SIZE:
+                cls._cache.popitem(last=False)
+        else:
+            cls._cache.move_to_end(key)
+        return topology
+
+    @property
+    def has_tables(self):
+        """Check whether the board is small enough for the tables."""
+        return self.width * self.height <= self.max_cells
+
+    @property
+    def cell_steps(self):
+        """Get ``{direction: array of next cells}``, or None."""
+        if self._cell_steps is None and self.has_tables:
+            width, height = self.width, self.height
+            cells = range(width * height)
+            self._cell_steps = {
+                (dx, dy): array('I', [
+                    (cell // width + dy) % height * width
+                    + (cell % width + dx) % width for cell in cells])
+                for dx, dy in OFFSETS}
+        return self._cell_steps
+
+    @property
+    def positions(self):
+        """Get the (x, y) position of every cell, or None."""
+        if self._positions is None and self.has_tables:
+            self._positions = tuple((x, y) for y in range(self.height)
+                                    for x in range(self.width))
+        return self._positions
+
+    def __reduce__(self):
+        """Pickle by size; the tables are rebuilt or reused on load."""
+        return Topology.for_size, (self.width, self.height)
+
+    def __deepcopy__(self, memo):
+        """Share the tables instead of copying them."""
+        return self
@@ -0,0 +1,208 @@
+"""Headless evaluation of control policies over many seeded games.
+
+A policy is a function ``policy(snake, apple)`` that sets
+``snake.next_direction`` the way ``handle_keys`` does. Episodes are spread
+over a process pool and their results are streamed back as they finish::
+
+    python tournament.py --policy tournament:greedy_policy --episodes 1000
+    python tournament.py --scores scores.log     # add results to the table
+"""
+import argparse
+import importlib
+import json
+import os
+import statistics
+import time
+from collections import Counter, namedtuple
+from concurrent.futures import ProcessPoolExecutor, as_completed
+
+from scores import ScoreStore
+from the_snake import DIRECTIONS, SnakeGame, opposite, wrapped_distance
+
+# Причина окончания эпизода по лимиту ходов:
+CAUSE_TIMEOUT = 'timeout'
+MAX_TICKS = 10_000
+CHUNK_SIZE = 64
+
+EpisodeResult = namedtuple('EpisodeResult', 'seed score length ticks cause')
+
+
+def idle_policy(snake, apple):
+    """Keep moving in the current direction."""
+
+
+def greedy_policy(snake, apple):
+    """
+    Turn towards the apple, avoiding cells taken by the body.
+
+    The tail cell counts as free when the tail is about to move.
+    """
+    width, height = snake.grid.width, snake.grid.height
+    head_x, head_y = snake.get_head_position()
+    tail = snake.positions[-1]
+    tail_moves = len(snake.positions) >= snake.length
+    best = None
+    for direction in DIRECTIONS:
+        if direction == opposite(snake.direction):
+            continue
+        cell = ((head_x + direction[0]) % width,
+                (head_y + direction[1]) % height)
+        if cell in snake.occupied and not (tail_moves and cell == tail):
+            continue
+        distance = wrapped_distance(cell, apple.position, width, height)
+        if best is None or distance < best[0]:
+            best = distance, direction
+    if best is not None:
+        snake.next_direction = best[1]
+
+
+_policies = {}
+
+
+def load_policy(name):
+    """
+    Import a policy by its ``module:function`` name.
+
+    Returns:
+        callable: The policy function.
+    """
+    policy = _policies.get(name)
+    if policy is None:
+        module_name, _, function_name = name.partition(':')
+        module = importlib.import_module(module_name)
+        policy = _policies[name] = getattr(module, function_name)
+    return policy
+
+
+def run_episode(policy, seed, max_ticks=MAX_TICKS):
+    """
+    Play one game until it ends or reaches the tick limit.
+
+    Args:
+        policy (callable or str): The policy or its ``module:function`` name.
+        seed (int): Seed of the game.
+        max_ticks (int): Tick limit of the episode.
+
+    Returns:
+        EpisodeResult: Score, length, ticks and cause of the game end.
+    """
+    if isinstance(policy, str):
+        policy = load_policy(policy)
+    game = SnakeGame(seed)
+    snake, apple = game.snake, game.apple
+    done = False
+    while not done and game.ticks < max_ticks:
+        policy(snake, apple)
+        _, _, done = game.step()
+    return EpisodeResult(seed, game.info.score, snake.length, game.ticks,
+                         game.cause or CAUSE_TIMEOUT)
+
+
+def run_episodes(policy, seeds, max_ticks=MAX_TICKS):
+    """Play a chunk of episodes, one per seed."""
+    return [run_episode(policy, seed, max_ticks) for seed in seeds]
+
+
+def run_tournament(policy, seeds, workers=None, max_ticks=MAX_TICKS,
+                   chunksize=CHUNK_SIZE, on_result=None):
+    """
+    Evaluate a policy over many seeds in a process pool.
+
+    Args:
+        policy (str): ``module:function`` name of the policy, so that it can
+            be sent to the worker processes.
+        seeds (iterable): Seeds of the episodes.
+        workers (int, optional): Number of processes, all CPUs by default.
+        max_ticks (int): Tick limit of every episode.
+        chunksize (int): Episodes per task sent to a worker.
+        on_result (callable, optional): Called with every EpisodeResult as
+            soon as it is available.
+
+    Returns:
+        dict: Aggregated score and throughput statistics.
+    """
+    seeds = list(seeds)
+    chunks = [seeds[i:i + chunksize] for i in range(0, len(seeds), chunksize)]
+    results = []
+    start = time.perf_counter()
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        futures = [executor.submit(run_episodes, policy, chunk, max_ticks)
+                   for chunk in chunks]
+        for future in as_completed(futures):
+            for result in future.result():
+                results.append(result)
+                if on_result is not None:
+                    on_result(result)
+    return summarize(results, time.perf_counter() - start)
+
+
+def summarize(results, elapsed):
+    """
+    Aggregate episode results.
+
+    Args:
+        results (list): EpisodeResult of every episode.
+        elapsed (float): Wall time of the tournament in seconds.
+
+    Returns:
+        dict: Score, length and throughput statistics.
+    """
+    scores = [result.score for result in results]
+    ticks = sum(result.ticks for result in results)
+    elapsed = max(elapsed, 1e-9)
+    return {
+        'episodes': len(results),
+        'ticks': ticks,
+        'elapsed': elapsed,
+        'episodes_per_second': len(results) / elapsed,
+        'ticks_per_second': ticks / elapsed,
+        'score_mean': statistics.fmean(scores) if scores else 0.0,
+        'score_median': statistics.median(scores) if scores else 0,
+        'score_stdev': statistics.pstdev(scores) if scores else 0.0,
+        'score_max': max(scores, default=0),
+        'length_max': max((result.length for result in results), default=0),
+        'causes': dict(Counter(result.cause for result in results)),
+    }
+
+
+def parse_args(argv=None):
+    """Parse the command line arguments."""
+    parser = argparse.ArgumentParser(description=__doc__.splitlines()[0])
+    parser.add_argument('--policy', default='tournament:greedy_policy',
+                        help='policy as module:function')
+    parser.add_argument('--episodes', type=int, default=1000)
+    parser.add_argument('--first-seed', type=int, default=0)
+    parser.add_argument('--workers', type=int, default=os.cpu_count())
+    parser.add_argument('--max-ticks', type=int, default=MAX_TICKS)
+    parser.add_argument('--chunksize', type=int, default=CHUNK_SIZE)
+    parser.add_argument('--stream', action='store_true',
+                        help='print every episode result as a JSON line')
+    parser.add_argument('--scores', metavar='FILE',
+                        help='add every episode result to the high-score '
+                             'table in FILE')
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    """Run a tournament from the command line."""
+    args = parse_args(argv)
+    scores = ScoreStore(args.scores) if args.scores else None
+
+    def on_result(result):
+        if args.stream:
+            print(json.dumps(result._asdict()), flush=True)
+        if scores is not None:
+            scores.add(result.score, result.length, result.ticks, result.seed)
+
+    seeds = range(args.first_seed, args.first_seed + args.episodes)
+    try:
+        stats = run_tournament(args.policy, seeds, args.workers,
+                               args.max_ticks, args.chunksize, on_result)
+    finally:
+        if scores is not None:
+            scores.close()
+    print(json.dumps(stats, indent=2))
+
+
+if __name__ == '__main__':
+    main()